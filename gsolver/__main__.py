@@ -0,0 +1,6 @@
+"""This module runs the gsolver command line interface, see `gsolver.cli`."""
+
+from .cli import main
+
+if __name__ == "__main__":
+    main()
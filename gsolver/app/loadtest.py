@@ -0,0 +1,107 @@
+"""This module contains a load test of a running app with many concurrent sessions.
+
+Every simulated user has its own cookie jar, i.e. its own board, and checks that the
+boards it gets back are its own, i.e. that no state leaks between sessions:
+
+    python -m gsolver.app.main
+    python -m gsolver.app.loadtest --url http://127.0.0.1:5000 --sessions 200
+"""
+
+import argparse
+import json
+import logging
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from http.cookiejar import CookieJar
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def post(opener: urllib.request.OpenerDirector, url: str, body: dict):
+    """This function posts JSON and returns the status code and decoded response."""
+
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(body).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    try:
+        with opener.open(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as error:
+        return error.code, json.loads(error.read() or b"{}")
+
+
+def run_session(
+    url: str, requests: int, latencies: list, statuses: Counter, errors: list
+):
+    """This function simulates one user stepping through and solving their board."""
+
+    opener = urllib.request.build_opener(
+        urllib.request.HTTPCookieProcessor(CookieJar())
+    )
+    with opener.open(f"{url}/get-board") as response:
+        givens = json.loads(response.read())
+
+    for index in range(requests):
+        start = time.perf_counter()
+        status, numbers_by_index = post(
+            opener, f"{url}/solve", {"singleIteration": index < requests - 1}
+        )
+        latencies.append(time.perf_counter() - start)
+        statuses[status] += 1
+
+        if status != 200:
+            continue
+
+        # Givens never change, so a different number means another session's board
+        for key, number in givens.items():
+            if numbers_by_index[key] != number:
+                errors.append(f"Cell {key} is {numbers_by_index[key]} not {number}")
+
+
+def main():
+    """This function runs the load test and prints the latency percentiles."""
+
+    parser = argparse.ArgumentParser(description="Load test the gsolver app.")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5)
+    args = parser.parse_args()
+
+    latencies = []
+    statuses = Counter()
+    errors = []
+    threads = [
+        threading.Thread(
+            target=run_session,
+            args=(args.url, args.requests, latencies, statuses, errors),
+        )
+        for _ in range(args.sessions)
+    ]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    p50, p95, p99 = np.percentile(np.asarray(latencies) * 1000, [50, 95, 99])
+    print(
+        f"{len(latencies)} requests from {args.sessions} sessions in {elapsed:.2f}s, "
+        f"status codes {dict(statuses)}"
+    )
+    print(f"latency p50 {p50:.1f}ms, p95 {p95:.1f}ms, p99 {p99:.1f}ms")
+    print(f"{len(errors)} cross-session errors")
+    for error in errors[:10]:
+        print(error)
+
+
+if __name__ == "__main__":
+    main()
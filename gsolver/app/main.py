@@ -1,15 +1,96 @@
+import json
+import os
+import uuid
+from concurrent.futures import TimeoutError
 from logging import getLogger
+from pathlib import Path
 
-from flask import Flask, jsonify, render_template, request, session
+import numpy as np
+from flask import (
+    Flask,
+    Response,
+    jsonify,
+    render_template,
+    request,
+    session,
+    stream_with_context,
+)
 
+from ..cache import SolutionCache
+from ..parsing import parse_board, parse_layout, read_puzzles
 from ..sudoku import Sudoku
+from .store import SessionStore
+from .workers import PoolSaturated, SolverPool, solve_board, solve_state
 
 logger = getLogger(__name__)
 
+# Search engines that complete boards where propagation stalls, see `gsolver.search`
+SEARCHES = (None, "backtrack", "exact_cover")
+
 app = Flask(__name__)
-app.secret_key = "gsolver"
+app.secret_key = os.environ.get("GSOLVER_SECRET_KEY", "gsolver")
+app.config.update(
+    GSOLVER_WORKERS=int(os.environ.get("GSOLVER_WORKERS", 0)) or None,
+    GSOLVER_MAX_PENDING=int(os.environ.get("GSOLVER_MAX_PENDING", 0)) or None,
+    GSOLVER_SOLVE_TIMEOUT=float(os.environ.get("GSOLVER_SOLVE_TIMEOUT", 10)),
+    GSOLVER_MAX_SESSIONS=int(os.environ.get("GSOLVER_MAX_SESSIONS", 1024)),
+    GSOLVER_SESSION_TTL=float(os.environ.get("GSOLVER_SESSION_TTL", 1800)),
+    GSOLVER_CACHE_SIZE=int(os.environ.get("GSOLVER_CACHE_SIZE", 4096)),
+    GSOLVER_CACHE_PATH=os.environ.get("GSOLVER_CACHE_PATH") or None,
+)
+
+# Every new session starts from the bundled puzzle, which is only read once
+default_givens = read_puzzles(Path(__file__).parent.parent / "sudoku_puzzle.txt")[0]
+
+boards = SessionStore(
+    factory=lambda: Sudoku(puzzle=default_givens, string_keys=True),
+    max_sessions=app.config["GSOLVER_MAX_SESSIONS"],
+    ttl=app.config["GSOLVER_SESSION_TTL"],
+)
+pool = SolverPool(
+    workers=app.config["GSOLVER_WORKERS"],
+    max_pending=app.config["GSOLVER_MAX_PENDING"],
+    timeout=app.config["GSOLVER_SOLVE_TIMEOUT"],
+)
+solutions = SolutionCache(
+    max_size=app.config["GSOLVER_CACHE_SIZE"], path=app.config["GSOLVER_CACHE_PATH"]
+)
+
+
+def get_board_id() -> str:
+    """This function returns the board ID of the request.
+
+    Clients may pass an explicit "boardId" in the JSON body or the query string,
+    otherwise every browser session gets its own board.
+    """
+
+    body = request.get_json(silent=True) or {}
+    board_id = body.get("boardId") or request.args.get("boardId")
+    if board_id:
+        return str(board_id)
 
-sudoku = Sudoku(string_keys=True)
+    if "board_id" not in session:
+        session["board_id"] = uuid.uuid4().hex
+    return session["board_id"]
+
+
+def get_givens(sudoku: Sudoku) -> np.ndarray:
+    """This function returns the (n, n) givens of a puzzle with 0 for empty cells."""
+
+    givens = np.zeros((sudoku.puzzle_size, sudoku.puzzle_size), dtype=np.uint8)
+    for (row, column), number in sudoku.numbers_by_index.items():
+        givens[row - 1, column - 1] = number
+    return givens
+
+
+def error_response(message: str, status: int):
+    """This function returns a JSON error, asking clients to retry if overloaded."""
+
+    response = jsonify({"error": message})
+    response.status_code = status
+    if status in (429, 503):
+        response.headers["Retry-After"] = "1"
+    return response
 
 
 @app.route("/")
@@ -19,36 +100,221 @@ def home():
 
 @app.route("/get-board")
 def get_board():
-    numbers_by_index_str_keys = sudoku.numbers_by_index_str_keys
-    return jsonify(numbers_by_index_str_keys)
+    board = boards.get(session_id=get_board_id())
+    return jsonify(board.sudoku.numbers_by_index_str_keys)
 
 
 @app.route("/update", methods=["POST"])
 def update_board():
-    body = request.get_json()
+    """This function applies the cells the user changed to the board of the session.
+
+    The body holds the "userValues" by "row,column" key, with 0 for cleared cells.
+    Every entry is checked before any is applied, so an invalid entry leaves the board
+    unchanged. Only the cells whose possible solutions changed are returned.
+    """
+
+    body = request.get_json(silent=True) or {}
     logger.debug(f"Update board request: {body}")
 
+    board = boards.get(session_id=get_board_id())
     user_values = body.get("userValues", {})
-    for key, value in user_values.items():
-        sudoku.update(key, value)
+    if not isinstance(user_values, dict):
+        return error_response("Invalid update: userValues is not an object", 400)
+
+    cells = {}
+    with board.lock:
+        try:
+            updates = [
+                board.sudoku.parse_update(key=key, value=value)
+                for key, value in user_values.items()
+            ]
+        except ValueError as error:
+            return error_response(f"Invalid update: {error}", 400)
+
+        for row, column, number in updates:
+            cells.update(board.sudoku.set_number(row=row, column=column, number=number))
+
+    return jsonify({"status": "success", "cells": cells}), 200
+
+
+@app.route("/undo", methods=["POST"])
+def undo():
+    """This function reverts the last edit of the board, see `Sudoku.undo`.
+
+    Only the cells whose possible solutions changed are returned.
+    """
 
-    return jsonify({"status": "success"}), 200
+    board = boards.get(session_id=get_board_id())
+    with board.lock:
+        return jsonify({"cells": board.sudoku.undo()})
+
+
+@app.route("/redo", methods=["POST"])
+def redo():
+    """This function applies the last undone edit of the board again."""
+
+    board = boards.get(session_id=get_board_id())
+    with board.lock:
+        return jsonify({"cells": board.sudoku.redo()})
 
 
 @app.route("/solve", methods=["POST"])
 def solve():
-    body = request.get_json()
+    """This function solves the board of the session.
+
+    A single iteration only visits one unit, so it runs right away and returns the
+    step with only the changed cells (see `Sudoku.get_step`). Full solves run in the
+    worker pool and return every cell.
+    """
+
+    body = request.get_json(silent=True) or {}
     logger.debug(f"Solve request: {body}")
     single_iteration = body.get("singleIteration", False)
     logger.debug(f"Single iteration: {single_iteration}")
 
-    matrix = sudoku.solve(matrix=sudoku.matrix, single_iteration=single_iteration)
-    logger.info(f"Solved matrix: {matrix}/nPatial solution: {sudoku.partial_solution}")
-    numbers_by_index = sudoku.solution_to_numbers_by_index(
-        solution=sudoku.solution, string_keys=True
-    )
+    search = body.get("search")
+    if search not in SEARCHES:
+        return error_response(f"Unknown search {search}", 400)
+
+    board = boards.get(session_id=get_board_id())
+    if not board.lock.acquire(blocking=False):
+        return error_response("A solve of this board is already running", 429)
+
+    if single_iteration:
+        try:
+            board.sudoku.solve(matrix=board.sudoku.matrix, single_iteration=True)
+            return jsonify(board.sudoku.last_step)
+        finally:
+            board.lock.release()
+
+    try:
+        sudoku = board.sudoku
+        matrix, last_solved, partial_solution = pool.run(
+            solve_state,
+            get_givens(sudoku),
+            sudoku.matrix,
+            sudoku.last_solved,
+            sudoku.backend,
+            search,
+            sudoku.layout,
+        )
+
+        sudoku.matrix[...] = matrix
+        sudoku.deduced = True
+        sudoku.last_solved = last_solved
+        sudoku.partial_solution = partial_solution
+        sudoku.solution = sudoku.matrix
+        numbers_by_index = sudoku.solution_to_numbers_by_index(
+            solution=sudoku.solution, string_keys=True
+        )
+    except PoolSaturated:
+        return error_response("Solver is busy, try again later", 429)
+    except TimeoutError:
+        return error_response("Solve timed out", 503)
+    finally:
+        board.lock.release()
+
+    logger.info(f"Partial solution: {partial_solution}")
     return jsonify(numbers_by_index)
 
 
+@app.route("/solve-stream")
+def solve_stream():
+    """This function streams the steps of solving the board as Server-Sent Events.
+
+    Every event holds one step with only the changed cells (see `Sudoku.get_step`),
+    so playing a whole solve costs O(changed cells) per step. The last event is named
+    "done". At most "maxSteps" steps are sent, if given in the query string.
+    """
+
+    board = boards.get(session_id=get_board_id())
+    if not board.lock.acquire(blocking=False):
+        return error_response("A solve of this board is already running", 429)
+
+    max_steps = request.args.get("maxSteps", type=int)
+
+    def events():
+        for step in board.sudoku.iter_steps(max_steps=max_steps):
+            yield f"data: {json.dumps(step)}\n\n"
+
+        done = {"solved": not board.sudoku.partial_solution}
+        yield f"event: done\ndata: {json.dumps(done)}\n\n"
+
+    try:
+        response = Response(
+            stream_with_context(events()),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache"},
+        )
+    except BaseException:
+        board.lock.release()
+        raise
+
+    # The response is closed even if the client disconnects before the first event,
+    # where the generator never runs
+    response.call_on_close(board.lock.release)
+    return response
+
+
+@app.route("/solve-board", methods=["POST"])
+def solve_whole_board():
+    """This function solves a whole board given as JSON.
+
+    The body holds the "board" as a one line string, e.g. 81 characters with "." for
+    empty cells, or as nested lists with 0 for empty cells, and optionally the
+    "search" engine ("backtrack" by default, or null to only propagate) and the
+    "layout" of a sudoku variant (see `gsolver.parsing.parse_layout`). Passing
+    "store": true also makes the board the puzzle of the session.
+
+    Solved boards of the standard layout are cached, so repeated and equivalent boards
+    (see `gsolver.canonical`) are answered without solving them again.
+    """
+
+    body = request.get_json(silent=True) or {}
+    try:
+        givens = parse_board(body["board"])
+    except KeyError:
+        return error_response("Missing board", 400)
+    except (TypeError, ValueError) as error:
+        return error_response(f"Invalid board: {error}", 400)
+
+    try:
+        layout = parse_layout(
+            spec=body.get("layout") or {}, puzzle_size=givens.shape[0]
+        )
+    except (TypeError, ValueError) as error:
+        return error_response(f"Invalid layout: {error}", 400)
+
+    search = body.get("search", "backtrack")
+    if search not in SEARCHES:
+        return error_response(f"Unknown search {search}", 400)
+
+    solution = solutions.get(givens=givens) if layout is None else None
+    status = "solved"
+    if solution is None:
+        try:
+            solution, status = pool.run(solve_board, givens, search, layout)
+        except PoolSaturated:
+            return error_response("Solver is busy, try again later", 429)
+        except TimeoutError:
+            return error_response("Solve timed out", 503)
+
+        if status == "solved" and layout is None:
+            solutions.put(givens=givens, solution=solution)
+
+    if body.get("store"):
+        boards.reset(
+            session_id=get_board_id(),
+            sudoku=Sudoku(puzzle=givens, string_keys=True, layout=layout),
+        )
+
+    return jsonify({"solution": solution.tolist(), "status": status})
+
+
+@app.route("/cache-stats")
+def cache_stats():
+    return jsonify(solutions.stats())
+
+
 if __name__ == "__main__":
-    app.run(debug=True)
+    app.run(debug=True, threaded=True)
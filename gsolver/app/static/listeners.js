@@ -3,12 +3,21 @@ document.getElementById("button-solve").addEventListener("click", function () {
   solveBoard();
 });
 
+// Play every step of the solve when the button is clicked
+document.getElementById("button-play").addEventListener("click", function () {
+  playSolve();
+});
+
 // Try to solve the board when the Enter key is pressed
 document.addEventListener("keydown", function (event) {
   if (event.key === "Enter") {
     solveBoard();
   } else if (event.key === "ArrowRight") {
     solveBoard(true);
+  } else if ((event.ctrlKey || event.metaKey) && event.key === "z") {
+    undoEdit(event.shiftKey);
+  } else if ((event.ctrlKey || event.metaKey) && event.key === "y") {
+    undoEdit(true);
   }
 });
 
@@ -25,10 +34,14 @@ window.addEventListener("load", function () {
         input.addEventListener("keydown", function (event) {
           if (event.key === "Enter") {
             solveBoard();
-          } else {
+          } else if (!event.ctrlKey && !event.metaKey) {
             this.value = "";
+            editedCells.add(this.parentNode.index);
           }
         });
+        input.addEventListener("input", function () {
+          editedCells.add(this.parentNode.index);
+        });
         input.addEventListener("keypress", function (event) {
           var allowedCharacters = "123456789";
           if (
@@ -1,3 +1,6 @@
+// Keys of the cells the user changed since the last update, only these are sent
+var editedCells = new Set();
+
 // Create a Sudoku board
 function createSudokuBoard(numbers_by_index) {
   // Get the board container
@@ -50,6 +53,11 @@ function updateSudokuBoard(numbers_by_index) {
     var options = cell.options;
     var cellInput = cell.cellInput;
 
+    // Only cells that changed are sent while stepping through a solve
+    if (!numbers_by_index.hasOwnProperty(key)) {
+      continue;
+    }
+
     // Check if the cell is read-only
     if (cell.readOnly) {
       // Ensure that the value is correct
@@ -65,8 +73,9 @@ function updateSudokuBoard(numbers_by_index) {
     } else {
       // Check if the value is a list
       if (Array.isArray(numbers_by_index[key])) {
-        // Display the list as a comma-separated string
+        // Display the list as a comma-separated string, e.g. of a cleared cell
         options.textContent = numbers_by_index[key].join(",");
+        cellInput.value = "";
       } else {
         options.textContent = "";
         cellInput.value = numbers_by_index[key];
@@ -82,14 +91,14 @@ function getUserUpdatedSudokuBoardValues() {
   // Create an object to store the user input
   var userInput = {};
 
-  // Update the value of each cell
+  // Only send the cells the user changed, not the values filled in by the solver
   for (var i = 0; i < cells.length; i++) {
     var cell = cells[i];
     var key = cell.index;
     var cellInput = cell.cellInput;
 
-    // Check if the cell is read-only
-    if (cellInput.readOnly) {
+    // Check if the cell is read-only or unchanged
+    if (cellInput.readOnly || !editedCells.has(key)) {
       continue;
     } else {
       // Get the value of the cell
@@ -102,5 +111,6 @@ function getUserUpdatedSudokuBoardValues() {
     }
   }
 
+  editedCells.clear();
   return userInput;
 }
@@ -13,8 +13,62 @@ function solveBoard(singleIteration = false) {
       headers: {
         "Content-Type": "application/json",
       },
+    })
+      .then((response) =>
+        response.json().then((data) => ({ ok: response.ok, data: data }))
+      )
+      .then(({ ok, data }) => {
+        // The server answers 429/503 with an error when the solver is busy
+        if (!ok) {
+          console.log("Solve failed: " + data.error);
+          return;
+        }
+        // A single iteration only returns the cells that changed in its step
+        updateSudokuBoard((numbers_by_index = singleIteration ? data.cells : data));
+      });
+  });
+}
+
+function playSolve() {
+  // Stream every step of the solve and only update the cells that changed
+  fetch("/update", {
+    method: "POST",
+    body: JSON.stringify({ userValues: getUserUpdatedSudokuBoardValues() }),
+    headers: {
+      "Content-Type": "application/json",
+    },
+  }).then(() => {
+    var source = new EventSource("/solve-stream");
+    source.onmessage = function (event) {
+      updateSudokuBoard((numbers_by_index = JSON.parse(event.data).cells));
+    };
+    source.addEventListener("done", function () {
+      source.close();
+    });
+    source.onerror = function () {
+      source.close();
+    };
+  });
+}
+
+function undoEdit(redo = false) {
+  // Send the pending edits, then revert (or reapply) the last one and only update
+  // the cells that changed
+  fetch("/update", {
+    method: "POST",
+    body: JSON.stringify({ userValues: getUserUpdatedSudokuBoardValues() }),
+    headers: {
+      "Content-Type": "application/json",
+    },
+  }).then(() => {
+    fetch(redo ? "/redo" : "/undo", {
+      method: "POST",
+      body: JSON.stringify({}),
+      headers: {
+        "Content-Type": "application/json",
+      },
     })
       .then((response) => response.json())
-      .then((data) => updateSudokuBoard((numbers_by_index = data)));
+      .then((data) => updateSudokuBoard((numbers_by_index = data.cells)));
   });
 }
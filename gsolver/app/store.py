@@ -0,0 +1,103 @@
+"""This module contains the bounded store of per-session solver state of the app.
+
+Every browser session, or explicit board ID, gets its own `Sudoku`, so concurrent
+users never see each other's boards. The store holds at most `max_sessions` boards:
+boards unused for `ttl` seconds expire, and the least recently used board is evicted
+when a new one would exceed the bound.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from ..sudoku import Sudoku
+
+logger = logging.getLogger(__name__)
+
+
+class BoardSession:
+    """This class represents the solver state of one session.
+
+    Requests of the same session are serialized with `lock`, requests of different
+    sessions never wait on each other.
+    """
+
+    def __init__(self, sudoku: Sudoku):
+        self.sudoku = sudoku
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+
+class SessionStore:
+    """This class represents a thread-safe LRU/TTL store of board sessions."""
+
+    def __init__(
+        self,
+        factory: Callable[[], Sudoku],
+        max_sessions: int = 1024,
+        ttl: float = 1800.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.clock = clock
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def get(self, session_id: str) -> BoardSession:
+        """This function returns the session of an ID, creating it if needed."""
+
+        now = self.clock()
+        with self.lock:
+            self.evict_expired(now=now)
+
+            session = self.sessions.get(session_id)
+            if session is None:
+                session = self.create(session_id=session_id)
+            else:
+                self.sessions.move_to_end(session_id)
+
+            session.last_used = now
+            return session
+
+    def reset(self, session_id: str, sudoku: Sudoku) -> BoardSession:
+        """This function replaces the board of a session, e.g. with a new puzzle."""
+
+        with self.lock:
+            self.sessions.pop(session_id, None)
+            return self.create(session_id=session_id, sudoku=sudoku)
+
+    def create(self, session_id: str, sudoku: Sudoku | None = None) -> BoardSession:
+        """This function adds a new session, evicting the least recently used one."""
+
+        while len(self.sessions) >= self.max_sessions:
+            evicted_id, _ = self.sessions.popitem(last=False)
+            self.evictions += 1
+            logger.info(f"Evicted least recently used session {evicted_id}")
+
+        session = BoardSession(sudoku=sudoku or self.factory())
+        session.last_used = self.clock()
+        self.sessions[session_id] = session
+        return session
+
+    def evict_expired(self, now: float):
+        """This function removes the sessions that were unused for `ttl` seconds.
+
+        Sessions are ordered by last use, so only the oldest ones are looked at.
+        """
+
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if now - session.last_used < self.ttl:
+                break
+
+            del self.sessions[session_id]
+            self.evictions += 1
+            logger.info(f"Evicted expired session {session_id}")
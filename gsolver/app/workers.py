@@ -0,0 +1,136 @@
+"""This module contains the worker pool that runs the CPU-heavy solves of the app.
+
+Solves run in worker processes, so a long search never blocks the web server threads.
+The pool accepts at most `max_pending` solves at once (running or queued). Beyond that
+`submit` raises `PoolSaturated` right away instead of letting the queue, and with it
+the latency of every request, grow without bound. Callers wait at most `timeout`
+seconds for a result.
+
+Worker functions only take and return arrays, so the per-session `Sudoku` stays in
+the web server process and is updated with the result.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable
+
+import numpy as np
+
+from ..batch import STATUS_NAMES, solve_batch
+from ..sudoku import Sudoku
+from ..tables import Layout
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturated(Exception):
+    """This class represents the error raised when the pool has no capacity left."""
+
+
+class SolverPool:
+    """This class represents a bounded process pool for solves."""
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        max_pending: int | None = None,
+        timeout: float = 10.0,
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 4 * self.workers
+        self.timeout = timeout
+
+        self.slots = threading.BoundedSemaphore(self.max_pending)
+        self.lock = threading.Lock()
+        self.executor = None
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        """This function starts the worker processes on first use."""
+
+        with self.lock:
+            if self.executor is None:
+                logger.info(f"Starting solver pool with {self.workers} workers")
+                self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self.executor
+
+    def submit(self, function: Callable, *args) -> Future:
+        """This function submits a solve, or raises `PoolSaturated` when it is full."""
+
+        if not self.slots.acquire(blocking=False):
+            raise PoolSaturated(f"{self.max_pending} solves are already pending")
+
+        try:
+            future = self.get_executor().submit(function, *args)
+        except BrokenProcessPool:
+            # A crashed worker breaks the whole executor, so start a new one next time
+            self.slots.release()
+            with self.lock:
+                self.executor = None
+            raise
+        except BaseException:
+            self.slots.release()
+            raise
+
+        # The slot is freed when the solve finishes, even if the caller timed out
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    def run(self, function: Callable, *args):
+        """This function runs a solve and waits at most `timeout` seconds for it.
+
+        Raises:
+            PoolSaturated: If `max_pending` solves are already pending.
+            concurrent.futures.TimeoutError: If the solve took too long.
+        """
+
+        future = self.submit(function, *args)
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def shutdown(self):
+        """This function stops the worker processes."""
+
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
+
+
+def solve_state(
+    givens: np.ndarray,
+    matrix: np.ndarray,
+    last_solved: tuple[str, int],
+    backend: str,
+    search: str | None,
+    layout: Layout | None = None,
+) -> tuple[np.ndarray, tuple[str, int], bool]:
+    """This function continues solving the state of a session in a worker process.
+
+    Returns:
+        The updated matrix, the last solved unit and whether the solution is partial.
+    """
+
+    sudoku = Sudoku(puzzle=givens, backend=backend, layout=layout)
+    sudoku.matrix[...] = matrix
+    sudoku.last_solved = last_solved
+    sudoku.solve(matrix=sudoku.matrix, search=search)
+    return sudoku.matrix, sudoku.last_solved, sudoku.partial_solution
+
+
+def solve_board(
+    givens: np.ndarray, search: str | None, layout: Layout | None = None
+) -> tuple[np.ndarray, str]:
+    """This function solves a whole board in a worker process.
+
+    Returns:
+        The (n, n) solution, where unsolved cells are 0, and the status name.
+    """
+
+    solutions, status = solve_batch(puzzles=givens[None], search=search, layout=layout)
+    return solutions[0], STATUS_NAMES[status[0]]
@@ -0,0 +1,230 @@
+"""This module contains code to solve many sudoku puzzles at once.
+
+The puzzles are stacked into a single (N, n * n) bitmask array (see `gsolver.bitmask`)
+and every propagation pass updates a whole group of units (all rows, all columns or all
+blocks) of all the boards that are still active in one vectorized call. Boards are dropped
+from the active set as soon as they are solved, stalled or contradict.
+"""
+
+import logging
+import time
+
+import numpy as np
+
+from . import bitmask
+from .search import find_solution
+from .strategies import apply_strategies
+from .tables import Layout, get_tables
+
+logger = logging.getLogger(__name__)
+
+SOLVED = 0
+PARTIAL = 1
+CONTRADICTION = 2
+STATUS_NAMES = ("solved", "partial", "contradiction")
+
+
+def givens_to_bitmask(givens: np.ndarray) -> np.ndarray:
+    """This function converts an (N, n, n) array of givens to an (N, n * n) bitmask array.
+
+    Empty cells are given as 0 and get every bit set.
+    """
+
+    givens = np.asarray(givens)
+    puzzle_size = givens.shape[-1]
+    dtype = bitmask.mask_dtype(puzzle_size)
+
+    shifts = np.clip(givens, 1, None).astype(dtype) - dtype.type(1)
+    cells = np.where(
+        givens > 0,
+        np.left_shift(dtype.type(1), shifts),
+        dtype.type(bitmask.full_mask(puzzle_size)),
+    )
+
+    return cells.reshape(givens.shape[0], puzzle_size * puzzle_size)
+
+
+def bitmask_to_solutions(cells: np.ndarray, puzzle_size: int) -> np.ndarray:
+    """This function converts an (N, n * n) bitmask array to an (N, n, n) number array.
+
+    Cells that are not solved are returned as 0.
+    """
+
+    solved = bitmask.popcount(cells) == 1
+    numbers = np.where(solved, bitmask.single_bit_index(cells) + 1, 0)
+
+    numbers = numbers.astype(np.min_scalar_type(puzzle_size))
+    return numbers.reshape(-1, puzzle_size, puzzle_size)
+
+
+def is_valid(
+    cells: np.ndarray, puzzle_size: int, layout: Layout | None = None
+) -> np.ndarray:
+    """This function checks which fully solved boards use every number once per unit."""
+
+    full_mask = bitmask.full_mask(puzzle_size)
+    okay = np.ones(cells.shape[0], dtype=bool)
+    for units in get_tables(puzzle_size=puzzle_size, layout=layout).units.values():
+        numbers = np.bitwise_or.reduce(cells[:, units], axis=-1)
+        okay &= np.all(numbers == full_mask, axis=-1)
+
+    return okay
+
+
+def propagate_batch(
+    cells: np.ndarray,
+    puzzle_size: int,
+    strategies: tuple[str, ...] = (),
+    uses: np.ndarray | None = None,
+    layout: Layout | None = None,
+) -> np.ndarray:
+    """This function runs the alternating strategy on a stack of boards in place.
+
+    Args:
+        cells: An (N, n * n) bitmask array, updated in place.
+        puzzle_size: The size of the sudoku puzzles, i.e. "n".
+        strategies: The higher-order strategies tried on boards where the singles
+            stall, in order (see `gsolver.strategies`). Boards they make progress on
+            stay active.
+        uses: An (N, 1 + len(strategies)) counter array. If given, the iterations
+            in which the singles, and then every strategy, made progress on a board
+            are counted in place.
+        layout: The blocks and extra units of a sudoku variant, see
+            `gsolver.tables.Layout`. None for the standard rows, columns and blocks.
+
+    Returns:
+        An array with the status (SOLVED, PARTIAL or CONTRADICTION) of every board.
+    """
+
+    units = get_tables(puzzle_size=puzzle_size, layout=layout).units
+    status = np.full(cells.shape[0], PARTIAL, dtype=np.uint8)
+    active = np.arange(cells.shape[0])
+
+    num_iterations = 0
+    while active.size:
+        num_iterations += 1
+
+        boards = cells[active]
+        boards_prev = boards.copy()
+
+        # 1. Solve for rows, 2. columns and 3. blocks, then the groups of extra units,
+        # of all active boards at once
+        okay = np.ones(active.size, dtype=bool)
+        for group_units in units.values():
+            okay &= bitmask.update_units(cells=boards, units=group_units)
+
+        # 4. Fail fast on cells without any possible solution left
+        counts = bitmask.popcount(boards)
+        okay &= np.all(counts > 0, axis=-1)
+
+        solved = okay & np.all(counts == 1, axis=-1)
+        okay[solved] = is_valid(
+            cells=boards[solved], puzzle_size=puzzle_size, layout=layout
+        )
+        solved &= okay
+
+        unchanged = np.all(boards == boards_prev, axis=-1)
+        stalled = okay & ~solved & unchanged
+        if uses is not None:
+            uses[active[okay & ~unchanged], 0] += 1
+
+        if strategies and stalled.any():
+            stalled_boards = boards[stalled]
+            stalled_uses = None if uses is None else uses[active[stalled], 1:]
+            changed = apply_strategies(
+                cells=stalled_boards,
+                puzzle_size=puzzle_size,
+                strategies=strategies,
+                uses=stalled_uses,
+                layout=layout,
+            )
+            if uses is not None:
+                uses[active[stalled], 1:] = stalled_uses
+            boards[stalled] = stalled_boards
+            stalled[stalled] = ~changed
+
+        cells[active] = boards
+        status[active[~okay]] = CONTRADICTION
+        status[active[solved]] = SOLVED
+
+        # 5. Drop finished boards from the active set and repeat from 1
+        active = active[okay & ~solved & ~stalled]
+
+    logger.info(f"num_iterations = {num_iterations}")
+
+    return status
+
+
+def solve_batch(
+    puzzles: np.ndarray,
+    chunk_size: int = 4096,
+    search: str | None = None,
+    strategies: tuple[str, ...] = (),
+    layout: Layout | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """This function solves a batch of sudoku puzzles.
+
+    Args:
+        puzzles: An (N, n, n) integer array of givens where empty cells are 0.
+        chunk_size: The number of boards propagated together. Chunks keep the
+            temporary arrays of a propagation pass small enough to stay in cache.
+        search: If given, boards where propagation stalls are completed with the
+            "backtrack" or "exact_cover" search engine (see `gsolver.search`).
+        strategies: The higher-order strategies tried where the singles stall, see
+            `propagate_batch`.
+        layout: The blocks and extra units of a sudoku variant, see
+            `propagate_batch`.
+
+    Returns:
+        A tuple of the (N, n, n) solutions, where unsolved cells are 0, and an (N,)
+        array with the status of every board as an index into `STATUS_NAMES`.
+    """
+
+    puzzles = np.asarray(puzzles)
+    puzzle_size = puzzles.shape[-1]
+
+    start = time.perf_counter()
+    cells = givens_to_bitmask(givens=puzzles)
+    status = np.empty(puzzles.shape[0], dtype=np.uint8)
+    for start_index in range(0, puzzles.shape[0], chunk_size):
+        chunk = slice(start_index, start_index + chunk_size)
+        status[chunk] = propagate_batch(
+            cells=cells[chunk],
+            puzzle_size=puzzle_size,
+            strategies=strategies,
+            layout=layout,
+        )
+
+    if search is not None:
+        for index in np.flatnonzero(status == PARTIAL):
+            board = cells[index].reshape(puzzle_size, puzzle_size)
+            solution = find_solution(cells=board, search=search, layout=layout)
+            if solution is None:
+                status[index] = CONTRADICTION
+            else:
+                cells[index] = solution.reshape(-1)
+                status[index] = SOLVED
+
+    solutions = bitmask_to_solutions(cells=cells, puzzle_size=puzzle_size)
+    elapsed = time.perf_counter() - start
+
+    logger.info(
+        f"Solved {np.sum(status == SOLVED)}/{puzzles.shape[0]} boards in "
+        f"{elapsed:.3f}s ({puzzles.shape[0] / max(elapsed, 1e-9):.0f} boards/s)"
+    )
+
+    return solutions, status
+
+
+if __name__ == "__main__":
+    from pathlib import Path
+
+    from .parsing import read_puzzles
+
+    puzzle = read_puzzles(Path(__file__).parent / "sudoku_puzzle.txt")[0]
+
+    for number_boards in (1, 100, 10000, 100000):
+        start = time.perf_counter()
+        solutions, status = solve_batch(np.repeat(puzzle[None], number_boards, axis=0))
+        elapsed = time.perf_counter() - start
+        print(f"{number_boards} boards: {number_boards / elapsed:.0f} boards/s")
@@ -0,0 +1,327 @@
+"""This module contains the benchmark suite of the solver.
+
+The bundled corpora in `gsolver/corpora` hold puzzles in the one line format:
+
+- easy: 9x9 puzzles with 36 clues, solved by the alternating strategy alone.
+- medium: 9x9 puzzles with 27 clues, solved by the alternating strategy alone.
+- hard: 9x9 puzzles with about 24 clues where the alternating strategy stalls.
+- 17_clue: minimal 9x9 puzzles with 17 clues.
+- 16x16, 25x25: larger puzzles with about half of the cells empty.
+- 36x36, 49x49: larger puzzles with about 40% of the cells empty, where search needs at
+  most 200 nodes after propagation, like published puzzles of these sizes. Puzzles
+  with half of the cells emptied at random are often so close to the phase transition
+  that any depth first search is slow.
+
+Every corpus is solved with every backend ("matrix", "bitmask" and the vectorized
+"batch" solver) and additionally stepped with `single_iteration=True`. The results
+(solves/s, latency percentiles, iterations, units processed and peak memory) are
+written as JSON so runs can be diffed, and compared against a baseline run:
+
+    python -m gsolver benchmark --output results.json
+    python -m gsolver benchmark --baseline results.json --threshold 0.1
+"""
+
+import json
+import logging
+import platform
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from .batch import SOLVED, solve_batch
+from .parsing import read_puzzles
+from .sudoku import Sudoku
+
+logger = logging.getLogger(__name__)
+
+CORPORA_DIR = Path(__file__).parent / "corpora"
+CORPORA = ("easy", "medium", "hard", "17_clue", "16x16", "25x25", "36x36", "49x49")
+BACKENDS = ("matrix", "bitmask", "batch")
+
+
+def load_corpus(name: str, limit: int | None = None) -> np.ndarray:
+    """This function loads the (N, n, n) givens of a bundled corpus."""
+
+    puzzles = read_puzzles(CORPORA_DIR / f"{name}.txt")
+    return puzzles[:limit]
+
+
+def latency_summary(latencies: list[float]) -> dict[str, float]:
+    """This function returns the mean and p50/p95/p99 latency in milliseconds."""
+
+    latencies_ms = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    return {
+        "mean": float(latencies_ms.mean()),
+        "p50": float(p50),
+        "p95": float(p95),
+        "p99": float(p99),
+    }
+
+
+def peak_memory(function: Callable[[np.ndarray], object], puzzles: np.ndarray) -> int:
+    """This function returns the peak memory in bytes allocated to solve one puzzle."""
+
+    peak = 0
+    tracemalloc.start()
+    try:
+        for puzzle in puzzles:
+            tracemalloc.reset_peak()
+            start, _ = tracemalloc.get_traced_memory()
+            function(puzzle)
+            _, end = tracemalloc.get_traced_memory()
+            peak = max(peak, end - start)
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+
+def solve_puzzle(
+    puzzle: np.ndarray,
+    backend: str,
+    search: str | None,
+    strategies: tuple[str, ...] = (),
+) -> Sudoku:
+    """This function solves a single puzzle with a `Sudoku` backend."""
+
+    sudoku = Sudoku(puzzle=puzzle, backend=backend, strategies=strategies)
+    sudoku.solve(matrix=sudoku.matrix, search=search)
+    return sudoku
+
+
+def step_puzzle(puzzle: np.ndarray, backend: str, max_steps: int) -> list[float]:
+    """This function steps through a puzzle and returns the latency of every step.
+
+    The steps are those of `Sudoku.iter_steps`, including building the step with the
+    changed cells, as served to the app.
+    """
+
+    sudoku = Sudoku(puzzle=puzzle, backend=backend)
+    latencies = []
+    start = time.perf_counter()
+    for _ in sudoku.iter_steps(max_steps=max_steps):
+        latencies.append(time.perf_counter() - start)
+        start = time.perf_counter()
+
+    return latencies
+
+
+def benchmark_solve(
+    puzzles: np.ndarray,
+    backend: str,
+    search: str | None,
+    strategies: tuple[str, ...] = (),
+) -> dict[str, object]:
+    """This function benchmarks full solves of every puzzle with one backend.
+
+    The batch backend solves the whole corpus at once for its throughput, and every
+    puzzle on its own, like the `/solve-board` worker does, for its latencies.
+    """
+
+    if backend == "batch":
+        start = time.perf_counter()
+        _, status = solve_batch(puzzles=puzzles, search=search, strategies=strategies)
+        elapsed = time.perf_counter() - start
+
+        latencies = []
+        for puzzle in puzzles:
+            start = time.perf_counter()
+            solve_batch(puzzles=puzzle[None], search=search, strategies=strategies)
+            latencies.append(time.perf_counter() - start)
+
+        return {
+            "solved": int(np.sum(status == SOLVED)),
+            "solves_per_second": len(puzzles) / elapsed,
+            "latency_ms": latency_summary(latencies),
+            "peak_memory_bytes": peak_memory(
+                lambda puzzle: solve_batch(
+                    puzzles=puzzle[None], search=search, strategies=strategies
+                ),
+                puzzles[:5],
+            ),
+        }
+
+    latencies = []
+    iterations = []
+    units_processed = []
+    solved = 0
+    for puzzle in puzzles:
+        start = time.perf_counter()
+        sudoku = solve_puzzle(
+            puzzle=puzzle, backend=backend, search=search, strategies=strategies
+        )
+        latencies.append(time.perf_counter() - start)
+
+        iterations.append(sudoku.number_iterations)
+        units_processed.append(sudoku.units_processed)
+        solved += int(sudoku.is_solved(sudoku.matrix))
+
+    return {
+        "solved": solved,
+        "solves_per_second": len(puzzles) / sum(latencies),
+        "latency_ms": latency_summary(latencies),
+        "iterations_mean": float(np.mean(iterations)),
+        "units_processed_mean": float(np.mean(units_processed)),
+        "peak_memory_bytes": peak_memory(
+            lambda puzzle: solve_puzzle(
+                puzzle=puzzle, backend=backend, search=search, strategies=strategies
+            ),
+            puzzles[:5],
+        ),
+    }
+
+
+def benchmark_single_iteration(
+    puzzles: np.ndarray, backend: str, max_steps: int
+) -> dict[str, object]:
+    """This function benchmarks stepping through every puzzle one unit at a time."""
+
+    latencies = []
+    steps = []
+    for puzzle in puzzles:
+        puzzle_latencies = step_puzzle(
+            puzzle=puzzle, backend=backend, max_steps=max_steps
+        )
+        latencies.extend(puzzle_latencies)
+        steps.append(len(puzzle_latencies))
+
+    return {
+        "steps_per_second": len(latencies) / sum(latencies),
+        "latency_ms": latency_summary(latencies),
+        "iterations_mean": float(np.mean(steps)),
+        "peak_memory_bytes": peak_memory(
+            lambda puzzle: step_puzzle(puzzle=puzzle, backend=backend, max_steps=1),
+            puzzles[:5],
+        ),
+    }
+
+
+def run_benchmarks(
+    corpora: tuple[str, ...] = CORPORA,
+    backends: tuple[str, ...] = BACKENDS,
+    search: str | None = "backtrack",
+    limit: int | None = 20,
+    max_steps: int = 500,
+    strategies: tuple[str, ...] = (),
+) -> dict[str, object]:
+    """This function runs the benchmarks and returns the machine-readable results."""
+
+    results = []
+    for corpus in corpora:
+        puzzles = load_corpus(name=corpus, limit=limit)
+        for backend in backends:
+            logger.info(f"Benchmarking {backend} on {corpus} ({len(puzzles)} puzzles)")
+            result = benchmark_solve(
+                puzzles=puzzles, backend=backend, search=search, strategies=strategies
+            )
+            results.append(
+                {"corpus": corpus, "backend": backend, "mode": "solve"}
+                | {"count": len(puzzles)}
+                | result
+            )
+
+            if backend == "batch":
+                continue
+
+            result = benchmark_single_iteration(
+                puzzles=puzzles, backend=backend, max_steps=max_steps
+            )
+            results.append(
+                {"corpus": corpus, "backend": backend, "mode": "single_iteration"}
+                | {"count": len(puzzles)}
+                | result
+            )
+
+    return {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "search": search,
+        "strategies": list(strategies),
+        "limit": limit,
+        "results": results,
+    }
+
+
+def result_key(result: dict[str, object]) -> tuple[str, str, str]:
+    """This function returns the key identifying a result across runs."""
+    return result["corpus"], result["backend"], result["mode"]
+
+
+def throughput(result: dict[str, object]) -> float:
+    """This function returns the solves or steps per second of a result."""
+    return result.get("solves_per_second", result.get("steps_per_second"))
+
+
+def find_regressions(
+    results: dict[str, object], baseline: dict[str, object], threshold: float
+) -> list[str]:
+    """This function lists the results that are slower than the baseline.
+
+    A result regresses if its throughput dropped by more than `threshold`, e.g. 0.1
+    for 10%, or if it solves fewer puzzles than the baseline.
+    """
+
+    baseline_results = {result_key(result): result for result in baseline["results"]}
+
+    regressions = []
+    for result in results["results"]:
+        previous = baseline_results.get(result_key(result))
+        if previous is None:
+            continue
+
+        name = "/".join(result_key(result))
+        change = throughput(result) / throughput(previous) - 1
+        if change < -threshold:
+            regressions.append(f"{name}: throughput {change:+.1%}")
+        if result.get("solved", 0) < previous.get("solved", 0):
+            regressions.append(
+                f"{name}: solved {result['solved']} < {previous['solved']}"
+            )
+
+    return regressions
+
+
+def format_results(results: dict[str, object]) -> str:
+    """This function formats the results as a human-readable table."""
+
+    lines = [
+        f"{'corpus':<8} {'backend':<8} {'mode':<16} {'per sec':>10} {'p50 ms':>9} "
+        f"{'p95 ms':>9} {'p99 ms':>9} {'iters':>7} {'peak KB':>9}"
+    ]
+    for result in results["results"]:
+        # Results of older runs may lack the percentiles, and batch solves iterations
+        latency = result["latency_ms"]
+        percentiles = [
+            f"{latency[name]:>9.3f}" if name in latency else f"{'-':>9}"
+            for name in ("p50", "p95", "p99")
+        ]
+        iterations = result.get("iterations_mean")
+        iterations = f"{'-':>7}" if iterations is None else f"{iterations:>7.1f}"
+        lines.append(
+            f"{result['corpus']:<8} {result['backend']:<8} {result['mode']:<16} "
+            f"{throughput(result):>10.1f} {' '.join(percentiles)} {iterations} "
+            f"{result['peak_memory_bytes'] / 1024:>9.1f}"
+        )
+
+    return "\n".join(lines)
+
+
+def save_results(results: dict[str, object], path: str | Path):
+    """This function writes the results as JSON."""
+
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2)
+
+
+def load_results(path: str | Path) -> dict[str, object]:
+    """This function reads results written by `save_results`."""
+
+    with open(path, "r") as file:
+        return json.load(file)
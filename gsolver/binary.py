@@ -0,0 +1,256 @@
+"""This module contains code to store sudoku boards in a compact binary format.
+
+A binary board file starts with a 16 byte header followed by fixed size records, one
+per board, so a range of boards can be sliced out of a memory-mapped file without
+reading the rest of it.
+
+Header (little endian):
+    magic       4 bytes  b"GSLV"
+    version     uint8    1
+    kind        uint8    0 for cells (givens or solutions), 1 for candidates
+    puzzle_size uint16   n
+    count       uint64   number of boards, or `STREAMED` if the file was written to
+                         a stream that cannot seek back to the header, e.g. a pipe.
+                         The count then follows from the file size.
+
+Records:
+    cells       n * n numbers with 0 for empty cells, packed two per byte (4 bits
+                each) for puzzles up to 15x15 and one per byte (uint8) otherwise.
+    candidates  n * n * n bits, i.e. the bitmask of every cell (see `gsolver.bitmask`)
+                packed with `np.packbits`, for partially solved boards.
+"""
+
+import logging
+import struct
+from pathlib import Path
+from typing import BinaryIO, Iterable
+
+import numpy as np
+
+from . import bitmask
+from .parsing import iter_puzzles
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"GSLV"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHQ")
+CELLS = 0
+CANDIDATES = 1
+KINDS = ("cells", "candidates")
+STREAMED = 2**64 - 1
+
+
+def record_size(kind: int, puzzle_size: int) -> int:
+    """This function returns the number of bytes used to store one board."""
+
+    number_cells = puzzle_size * puzzle_size
+    if kind == CANDIDATES:
+        return (number_cells * puzzle_size + 7) // 8
+    if puzzle_size <= 15:
+        return (number_cells + 1) // 2
+    return number_cells
+
+
+def encode_records(boards: np.ndarray, kind: int) -> np.ndarray:
+    """This function encodes an (N, n, n) array of boards to an (N, record) byte array.
+
+    Boards of kind `CELLS` hold numbers, boards of kind `CANDIDATES` hold bitmasks.
+    """
+
+    puzzle_size = boards.shape[-1]
+    boards = boards.reshape(boards.shape[0], puzzle_size * puzzle_size)
+
+    if kind == CANDIDATES:
+        shifts = np.arange(puzzle_size, dtype=boards.dtype)
+        bits = ((boards[..., None] >> shifts) & boards.dtype.type(1)).astype(np.uint8)
+        return np.packbits(bits.reshape(boards.shape[0], -1), axis=-1)
+
+    numbers = boards.astype(np.uint8)
+    if puzzle_size > 15:
+        return numbers
+
+    if numbers.shape[1] % 2:
+        numbers = np.pad(numbers, ((0, 0), (0, 1)))
+    return (numbers[:, 0::2] << 4) | numbers[:, 1::2]
+
+
+def decode_records(records: np.ndarray, kind: int, puzzle_size: int) -> np.ndarray:
+    """This function decodes an (N, record) byte array to an (N, n, n) array of boards."""
+
+    number_cells = puzzle_size * puzzle_size
+    shape = (records.shape[0], puzzle_size, puzzle_size)
+
+    if kind == CANDIDATES:
+        dtype = bitmask.mask_dtype(puzzle_size)
+        bits = np.unpackbits(records, axis=-1, count=number_cells * puzzle_size)
+        bits = bits.reshape(records.shape[0], number_cells, puzzle_size).astype(dtype)
+        shifts = np.arange(puzzle_size, dtype=dtype)
+        return np.bitwise_or.reduce(bits << shifts, axis=-1).reshape(shape)
+
+    if puzzle_size > 15:
+        return np.array(records).reshape(shape)
+
+    numbers = np.empty((records.shape[0], records.shape[1] * 2), dtype=np.uint8)
+    numbers[:, 0::2] = records >> 4
+    numbers[:, 1::2] = records & 0x0F
+    return numbers[:, :number_cells].reshape(shape)
+
+
+class BoardWriter:
+    """This class represents a binary board file that boards are streamed into.
+
+    The board count in the header is written when the writer is closed. Writers on a
+    stream that cannot seek, e.g. stdout, write `STREAMED` as the count instead. Streams
+    are flushed, but not closed, by the writer.
+    """
+
+    def __init__(
+        self, path: str | Path | BinaryIO, puzzle_size: int, kind: int = CELLS
+    ):
+        self.puzzle_size = puzzle_size
+        self.kind = kind
+        self.count = 0
+
+        if isinstance(path, (str, Path)):
+            self.path = Path(path)
+            self.file = open(self.path, "wb")
+        else:
+            self.path = getattr(path, "name", "stream")
+            self.file = path
+
+        # The header is rewritten with the board count on close, if the stream allows
+        self.header_offset = self.file.tell() if self.file.seekable() else None
+        count = STREAMED if self.header_offset is None else 0
+        self.file.write(HEADER.pack(MAGIC, VERSION, kind, puzzle_size, count))
+
+    def write(self, boards: np.ndarray):
+        """This function appends an (N, n, n) array of boards to the file."""
+
+        if boards.shape[1:] != (self.puzzle_size, self.puzzle_size):
+            raise ValueError(
+                f"Boards of shape {boards.shape[1:]} do not match puzzle size "
+                f"{self.puzzle_size}"
+            )
+
+        self.file.write(encode_records(boards=boards, kind=self.kind).tobytes())
+        self.count += boards.shape[0]
+
+    def close(self):
+        """This function writes the board count and closes the file."""
+
+        if self.header_offset is not None:
+            end = self.file.tell()
+            self.file.seek(self.header_offset)
+            self.file.write(
+                HEADER.pack(MAGIC, VERSION, self.kind, self.puzzle_size, self.count)
+            )
+            self.file.seek(end)
+
+        if isinstance(self.path, Path):
+            self.file.close()
+        else:
+            self.file.flush()
+        logger.info(f"Wrote {self.count} {KINDS[self.kind]} boards to [{self.path}]")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class BoardFile:
+    """This class represents a memory-mapped binary board file.
+
+    Boards are only read and decoded when they are sliced, e.g. `board_file[10:20]`
+    returns the (10, n, n) boards 10 to 19 without reading any other record.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+
+        with open(self.path, "rb") as file:
+            header = file.read(HEADER.size)
+
+        if len(header) < HEADER.size:
+            raise ValueError(f"File [{self.path}] is not a binary board file")
+
+        magic, version, self.kind, self.puzzle_size, self.count = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"File [{self.path}] is not a binary board file")
+
+        self.record_size = record_size(kind=self.kind, puzzle_size=self.puzzle_size)
+        if self.count == STREAMED:
+            size = self.path.stat().st_size - HEADER.size
+            self.count = size // self.record_size
+        if self.count == 0:
+            self.records = np.empty((0, self.record_size), dtype=np.uint8)
+        else:
+            self.records = np.memmap(
+                self.path,
+                dtype=np.uint8,
+                mode="r",
+                offset=HEADER.size,
+                shape=(self.count, self.record_size),
+            )
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int | slice) -> np.ndarray:
+        if isinstance(index, slice):
+            records = self.records[index]
+        else:
+            records = self.records[index][None]
+
+        boards = decode_records(
+            records=np.asarray(records), kind=self.kind, puzzle_size=self.puzzle_size
+        )
+        return boards if isinstance(index, slice) else boards[0]
+
+
+def is_board_file(path: str | Path) -> bool:
+    """This function checks whether a file starts with the binary board file magic."""
+
+    with open(path, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def write_boards(path: str | Path, boards: np.ndarray, kind: int = CELLS):
+    """This function writes an (N, n, n) array of boards to a binary board file."""
+
+    with BoardWriter(path=path, puzzle_size=boards.shape[-1], kind=kind) as writer:
+        writer.write(boards=boards)
+
+
+def convert(lines: Iterable[str], path: str | Path, chunk_size: int = 4096) -> int:
+    """This function converts puzzles in a text format to a binary board file.
+
+    The text is streamed in chunks, see `gsolver.parsing.iter_puzzles`, and all
+    puzzles must have the same size.
+
+    Returns:
+        The number of boards written.
+    """
+
+    writer = None
+    chunk = []
+    for puzzle in iter_puzzles(lines=lines):
+        if writer is None:
+            writer = BoardWriter(path=path, puzzle_size=puzzle.shape[0])
+
+        chunk.append(puzzle)
+        if len(chunk) == chunk_size:
+            writer.write(boards=np.stack(chunk))
+            chunk = []
+
+    if writer is None:
+        logger.error("No puzzles found to convert")
+        return 0
+
+    if chunk:
+        writer.write(boards=np.stack(chunk))
+    writer.close()
+
+    return writer.count
@@ -0,0 +1,167 @@
+"""This module contains code to represent sudoku candidates as bitmasks.
+
+Instead of the nxnxn one-hot matrix used by `Sudoku`, each cell is stored as a single
+unsigned integer where bit `k` is set if the number `k + 1` is still a possible solution
+for that cell. A solved cell therefore has exactly one bit set.
+
+All functions operate on a flat array of cells with any number of leading (board)
+dimensions, i.e. an array of shape (..., n * n), and a `units` array of flat cell
+indices of shape (..., n). This lets the same kernels update one unit, a whole group of
+units, or a whole stack of boards in one call.
+"""
+
+import logging
+from functools import lru_cache
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def mask_dtype(puzzle_size: int) -> np.dtype:
+    """This function returns the smallest unsigned dtype that fits a cell bitmask."""
+
+    for dtype in (np.uint16, np.uint32, np.uint64):
+        if puzzle_size <= np.dtype(dtype).itemsize * 8:
+            return np.dtype(dtype)
+
+    raise ValueError(f"Puzzle size {puzzle_size} does not fit in a 64 bit mask")
+
+
+def full_mask(puzzle_size: int) -> int:
+    """This function returns the bitmask with all numbers of the puzzle allowed."""
+    return (1 << puzzle_size) - 1
+
+
+@lru_cache(maxsize=None)
+def popcount_table() -> np.ndarray:
+    """This function returns a lookup table of set bits for every 16 bit integer."""
+
+    values = np.arange(1 << 16, dtype=np.uint32)
+    table = np.zeros(1 << 16, dtype=np.uint8)
+    for bit in range(16):
+        table += ((values >> bit) & 1).astype(np.uint8)
+
+    table.flags.writeable = False
+    return table
+
+
+def popcount(masks: np.ndarray) -> np.ndarray:
+    """This function returns the number of set bits (candidates) for every mask."""
+
+    masks = np.asarray(masks)
+    table = popcount_table()
+    if masks.dtype.itemsize <= 2:
+        return table[masks]
+
+    counts = np.zeros(masks.shape, dtype=np.uint8)
+    chunk = masks.dtype.type(0xFFFF)
+    for shift in range(0, masks.dtype.itemsize * 8, 16):
+        counts += table[(masks >> masks.dtype.type(shift)) & chunk]
+
+    return counts
+
+
+def single_bit_index(masks: np.ndarray) -> np.ndarray:
+    """This function returns the bit index of masks that have exactly one bit set."""
+
+    masks = np.asarray(masks)
+    return popcount(masks - masks.dtype.type(1)).astype(np.intp)
+
+
+def numbers_by_index_to_bitmask(
+    numbers_by_index: dict[tuple[int, int], int], puzzle_size: int
+) -> np.ndarray:
+    """This function converts the numbers_by_index to a (n, n) bitmask matrix.
+
+    Empty cells have every bit set, cells that are given have a single bit set.
+    """
+
+    logger.info("Converting numbers_by_index to bitmask")
+
+    dtype = mask_dtype(puzzle_size)
+    matrix = np.full((puzzle_size, puzzle_size), full_mask(puzzle_size), dtype=dtype)
+    for (row, column), number in numbers_by_index.items():
+        matrix[row - 1, column - 1] = 1 << (number - 1)
+
+    return matrix
+
+
+def matrix_to_bitmask(matrix: np.ndarray) -> np.ndarray:
+    """This function converts a nxnxn one-hot matrix to a (n, n) bitmask matrix."""
+
+    puzzle_size = matrix.shape[-1]
+    dtype = mask_dtype(puzzle_size)
+    weights = np.left_shift(dtype.type(1), np.arange(puzzle_size, dtype=dtype))
+
+    masks = np.where(matrix == 1, weights, 0).astype(dtype)
+    return np.bitwise_or.reduce(masks, axis=-1)
+
+
+def bitmask_to_matrix(cells: np.ndarray, puzzle_size: int) -> np.ndarray:
+    """This function converts a (n, n) bitmask matrix to a nxnxn one-hot matrix."""
+
+    shifts = np.arange(puzzle_size, dtype=cells.dtype)
+    return ((cells[..., None] >> shifts) & cells.dtype.type(1)).astype(np.uint8)
+
+
+def mask_to_numbers(mask: int, puzzle_size: int) -> list[int]:
+    """This function returns the numbers allowed by a single cell bitmask."""
+    mask = int(mask)
+    return [bit + 1 for bit in range(puzzle_size) if mask >> bit & 1]
+
+
+def remove_impossible_solutions(cells: np.ndarray, units: np.ndarray) -> np.ndarray:
+    """Remove solved numbers from the unsolved cells of every unit.
+
+    Returns a boolean array with one value per board which is False if any unit of that
+    board contains the same solved number twice.
+    """
+
+    vectors = cells[..., units]
+    solved = popcount(vectors) == 1
+    solved_vectors = np.where(solved, vectors, 0)
+    unavailable_numbers = np.bitwise_or.reduce(solved_vectors, axis=-1)
+
+    # A duplicate solved number shows up as fewer bits than solved cells
+    okay = popcount(unavailable_numbers) == np.sum(solved, axis=-1)
+    okay = np.all(okay, axis=tuple(range(okay.ndim - units.ndim + 1, okay.ndim)))
+
+    cells[..., units] = np.where(
+        solved, vectors, vectors & ~unavailable_numbers[..., None]
+    )
+
+    return okay
+
+
+def use_single_appearance_solution(cells: np.ndarray, units: np.ndarray):
+    """Solve unsolved cells holding a number that appears only once in their unit."""
+
+    vectors = cells[..., units]
+    solved = popcount(vectors) == 1
+
+    # Accumulate the numbers seen at least once and at least twice in each unit
+    once = np.zeros(vectors.shape[:-1], dtype=vectors.dtype)
+    twice = np.zeros_like(once)
+    for index in range(vectors.shape[-1]):
+        twice |= once & vectors[..., index]
+        once |= vectors[..., index]
+
+    single_appearance_solutions = (once & ~twice)[..., None] & vectors
+    cells[..., units] = np.where(
+        ~solved & (single_appearance_solutions != 0),
+        single_appearance_solutions,
+        vectors,
+    )
+
+
+def update_units(cells: np.ndarray, units: np.ndarray) -> np.ndarray:
+    """This function updates the possible solutions for a group of units."""
+
+    # 1. Remove solved numbers from unsolved cells
+    okay = remove_impossible_solutions(cells=cells, units=units)
+
+    # 2. Find possible solutions that only appear once in the unsolved cells
+    use_single_appearance_solution(cells=cells, units=units)
+
+    return okay
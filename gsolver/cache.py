@@ -0,0 +1,162 @@
+"""This module contains a cache of sudoku solutions keyed on canonical puzzles.
+
+Puzzles are looked up by their canonical form (see `gsolver.canonical`), so a puzzle
+that was solved before with relabeled numbers, swapped rows, bands, columns or
+stacks, or transposed, is a hit as well. Solutions are stored in canonical form and
+mapped back through the inverse transform of the requested puzzle.
+
+Canonicalizing a puzzle costs about as much as solving an easy one, so the cache also
+keeps the `max_size` most recently requested puzzles as given, which answers exact
+repeats without canonicalizing them.
+
+The cache keeps the `max_size` most recently used solutions in memory and, given a
+`path`, also stores every solution in a `dbm` file that survives restarts:
+
+    cache = SolutionCache(max_size=4096, path="solutions.db")
+    solution = cache.get(givens)
+    if solution is None:
+        solution = solve(givens)
+        cache.put(givens, solution)
+    cache.stats()  # {"hits": ..., "exact_hits": ..., "misses": ..., ...}
+"""
+
+import dbm
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from .canonical import canonical_form
+
+logger = logging.getLogger(__name__)
+
+
+class SolutionCache:
+    """This class represents a thread-safe LRU cache with an optional disk tier."""
+
+    def __init__(self, max_size: int = 4096, path: str | Path | None = None):
+        self.max_size = max_size
+        self.path = path
+        self.entries = OrderedDict()
+        self.exact = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.exact_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.disk = None if path is None else dbm.open(str(path), "c")
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @staticmethod
+    def key(canonical: np.ndarray) -> bytes:
+        """This function returns the key of a canonical puzzle."""
+        return canonical.astype(np.uint8).tobytes()
+
+    @staticmethod
+    def exact_key(givens: np.ndarray) -> bytes:
+        """This function returns the key of a puzzle as given."""
+        return np.asarray(givens, dtype=np.uint8).tobytes()
+
+    def get(self, givens: np.ndarray) -> np.ndarray | None:
+        """This function returns the cached (n, n) solution of a puzzle, if any."""
+
+        exact_key = self.exact_key(givens=givens)
+        with self.lock:
+            solution = self.exact.get(exact_key)
+            if solution is not None:
+                self.exact.move_to_end(exact_key)
+                self.hits += 1
+                self.exact_hits += 1
+                return solution.astype(np.asarray(givens).dtype)
+
+        canonical, transform = canonical_form(givens=givens)
+        key = self.key(canonical=canonical)
+
+        with self.lock:
+            solution = self.entries.get(key)
+            if solution is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            elif self.disk is not None and key in self.disk:
+                solution = np.frombuffer(self.disk[key], dtype=np.uint8)
+                solution = solution.reshape(canonical.shape)
+                self.insert(key=key, solution=solution)
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+                return None
+
+            solution = transform.invert(solution)
+            self.insert_exact(key=exact_key, solution=solution)
+
+        return solution.astype(np.asarray(givens).dtype)
+
+    def put(self, givens: np.ndarray, solution: np.ndarray):
+        """This function caches the (n, n) solution of a puzzle.
+
+        Only complete solutions should be cached, partial ones are not mapped back
+        correctly if the puzzle has more than one solution.
+        """
+
+        canonical, transform = canonical_form(givens=givens)
+        key = self.key(canonical=canonical)
+        exact_solution = np.array(solution, dtype=np.uint8)
+        solution = transform.apply(exact_solution)
+
+        with self.lock:
+            self.insert(key=key, solution=solution)
+            self.insert_exact(
+                key=self.exact_key(givens=givens), solution=exact_solution
+            )
+            if self.disk is not None:
+                self.disk[key] = solution.tobytes()
+
+    def insert(self, key: bytes, solution: np.ndarray):
+        """This function adds a solution to memory, evicting the least recently used."""
+
+        solution.flags.writeable = False
+        self.entries[key] = solution
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def insert_exact(self, key: bytes, solution: np.ndarray):
+        """This function adds the solution of a puzzle as given to memory."""
+
+        solution.flags.writeable = False
+        self.exact[key] = solution
+        self.exact.move_to_end(key)
+        while len(self.exact) > self.max_size:
+            self.exact.popitem(last=False)
+
+    def stats(self) -> dict[str, int | float]:
+        """This function returns the hit and miss counts of the cache."""
+
+        with self.lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "exact_hits": self.exact_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+    def close(self):
+        """This function closes the disk tier."""
+
+        with self.lock:
+            if self.disk is not None:
+                self.disk.close()
+                self.disk = None
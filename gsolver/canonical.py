@@ -0,0 +1,255 @@
+"""This module contains code to bring sudoku puzzles into a canonical form.
+
+Two puzzles are equivalent if one can be turned into the other by the validity
+preserving transformations of a sudoku:
+
+- relabeling the numbers,
+- permuting the rows within a band, and the bands (groups of sqrt(n) rows),
+- permuting the columns within a stack, and the stacks (groups of sqrt(n) columns),
+- transposing the grid.
+
+The canonical form is the lexicographically smallest grid among the transformations,
+with numbers relabeled in order of first appearance. Trying every transformation is
+far too slow (over 3 million row and column orders for 9x9), so rows and columns are
+first ordered by signatures that no transformation changes, e.g. their number of
+givens and the signatures of the lines they cross. Only lines with equal signatures
+are tried in every order, which for most puzzles leaves a handful of candidates.
+
+If more than `max_candidates` orders remain, e.g. for highly symmetric puzzles, only
+the first ones are tried. The result is then still a valid transformation of the
+puzzle, so solutions map back correctly, but equivalent puzzles may get different
+canonical forms.
+"""
+
+import itertools
+import logging
+import math
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class Transform:
+    """This class represents a transformation of a puzzle into its canonical form.
+
+    Attributes:
+        transpose: Whether the grid is transposed first.
+        rows: The row order, i.e. canonical row `i` is row `rows[i]`.
+        columns: The column order, i.e. canonical column `j` is column `columns[j]`.
+        labels: Maps every number to its canonical number, with 0 for empty cells.
+    """
+
+    def __init__(
+        self,
+        transpose: bool,
+        rows: np.ndarray,
+        columns: np.ndarray,
+        labels: np.ndarray,
+    ):
+        self.transpose = transpose
+        self.rows = rows
+        self.columns = columns
+        self.labels = labels
+
+        self.inverse_labels = np.empty_like(labels)
+        self.inverse_labels[labels] = np.arange(labels.size, dtype=labels.dtype)
+
+    def apply(self, grid: np.ndarray) -> np.ndarray:
+        """This function maps a (n, n) grid, e.g. a solution, to the canonical form."""
+
+        grid = grid.T if self.transpose else grid
+        return self.labels[grid[np.ix_(self.rows, self.columns)]]
+
+    def invert(self, grid: np.ndarray) -> np.ndarray:
+        """This function maps a (n, n) grid in canonical form back to the puzzle."""
+
+        original = np.empty_like(grid)
+        original[np.ix_(self.rows, self.columns)] = self.inverse_labels[grid]
+        return original.T if self.transpose else original
+
+
+def rank(signatures: list[tuple]) -> np.ndarray:
+    """This function replaces signatures by their rank among the distinct signatures."""
+
+    ranks = {
+        signature: index for index, signature in enumerate(sorted(set(signatures)))
+    }
+    return np.array([ranks[signature] for signature in signatures])
+
+
+def line_signatures(
+    grid: np.ndarray, rounds: int = 2
+) -> tuple[np.ndarray, np.ndarray]:
+    """This function returns invariant signatures of the rows and the columns.
+
+    A line starts out with its number of givens, and every round adds the signatures
+    of the lines crossing its givens, paired with how often the given number occurs in
+    the puzzle, and its number of givens per band or stack.
+
+    Returns:
+        The rank of the signature of every row and of every column.
+    """
+
+    puzzle_size = grid.shape[0]
+    sqrt_puzzle_size = math.isqrt(puzzle_size)
+    givens = grid > 0
+
+    # How often a number occurs does not change when the numbers are relabeled
+    number_counts = np.bincount(grid[givens], minlength=puzzle_size + 1)
+    cell_counts = np.where(givens, number_counts[grid], 0)
+
+    # Givens per row and stack, and per column and band
+    row_stacks = givens.reshape(puzzle_size, sqrt_puzzle_size, -1).sum(axis=-1)
+    column_bands = givens.T.reshape(puzzle_size, sqrt_puzzle_size, -1).sum(axis=-1)
+    row_stacks = np.sort(row_stacks, axis=-1)
+    column_bands = np.sort(column_bands, axis=-1)
+
+    row_ranks = givens.sum(axis=1)
+    column_ranks = givens.sum(axis=0)
+    rows, columns = np.nonzero(givens)
+    for _ in range(rounds):
+        # Pairs of the crossing line and the count of the given number, per line
+        row_crossings = [[] for _ in range(puzzle_size)]
+        column_crossings = [[] for _ in range(puzzle_size)]
+        for row, column, count in zip(
+            rows.tolist(), columns.tolist(), cell_counts[rows, columns].tolist()
+        ):
+            row_crossings[row].append((int(column_ranks[column]), count))
+            column_crossings[column].append((int(row_ranks[row]), count))
+
+        row_ranks = rank(
+            [
+                (int(row_ranks[row]), tuple(row_stacks[row]), tuple(sorted(crossings)))
+                for row, crossings in enumerate(row_crossings)
+            ]
+        )
+        column_ranks = rank(
+            [
+                (
+                    int(column_ranks[column]),
+                    tuple(column_bands[column]),
+                    tuple(sorted(crossings)),
+                )
+                for column, crossings in enumerate(column_crossings)
+            ]
+        )
+
+    return row_ranks, column_ranks
+
+
+def tied_orders(ranks: np.ndarray) -> list[tuple[int, ...]]:
+    """This function returns every order of indices that sorts the ranks.
+
+    Indices with equal ranks are tried in every order.
+    """
+
+    indices = sorted(range(len(ranks)), key=lambda index: ranks[index])
+    groups = itertools.groupby(indices, key=lambda index: ranks[index])
+    permutations = [list(itertools.permutations(group)) for _, group in groups]
+    return [sum(order, ()) for order in itertools.product(*permutations)]
+
+
+def line_orders(ranks: np.ndarray, limit: int) -> np.ndarray:
+    """This function returns up to `limit` band-preserving line orders sorted by rank.
+
+    Lines are sorted within their band, and bands by their sorted line ranks.
+    """
+
+    puzzle_size = ranks.size
+    sqrt_puzzle_size = math.isqrt(puzzle_size)
+    bands = ranks.reshape(sqrt_puzzle_size, sqrt_puzzle_size)
+
+    band_ranks = rank([tuple(sorted(band.tolist())) for band in bands])
+    line_options = [tied_orders(band) for band in bands]
+
+    orders = (
+        [
+            band * sqrt_puzzle_size + line
+            for band, lines in zip(band_order, line_order)
+            for line in lines
+        ]
+        for band_order in tied_orders(band_ranks)
+        for line_order in itertools.product(
+            *(line_options[band] for band in band_order)
+        )
+    )
+    return np.array(list(itertools.islice(orders, limit)))
+
+
+def relabel(grids: np.ndarray, puzzle_size: int) -> tuple[np.ndarray, np.ndarray]:
+    """This function relabels the numbers of (M, n * n) grids by first appearance.
+
+    Numbers that do not appear get the remaining labels in ascending order.
+
+    Returns:
+        The relabeled grids and the (M, n + 1) labels of every grid.
+    """
+
+    number_grids, number_cells = grids.shape
+    first = np.full((number_grids, puzzle_size + 1), number_cells, dtype=np.intp)
+    positions = np.broadcast_to(np.arange(number_cells), grids.shape)
+    np.minimum.at(first, (np.arange(number_grids)[:, None], grids), positions)
+
+    # Stable sort, so numbers that do not appear stay in ascending order
+    order = np.argsort(first[:, 1:], axis=1, kind="stable") + 1
+    labels = np.zeros((number_grids, puzzle_size + 1), dtype=grids.dtype)
+    labels[np.arange(number_grids)[:, None], order] = np.arange(1, puzzle_size + 1)
+
+    return labels[np.arange(number_grids)[:, None], grids], labels
+
+
+def canonical_form(
+    givens: np.ndarray, max_candidates: int = 4096
+) -> tuple[np.ndarray, Transform]:
+    """This function returns the canonical form of a puzzle.
+
+    Args:
+        givens: The (n, n) givens with 0 for empty cells.
+        max_candidates: The maximum number of row and column orders tried per
+            orientation, see the module docstring.
+
+    Returns:
+        The (n, n) canonical givens and the transform that maps the puzzle to them.
+    """
+
+    givens = np.asarray(givens, dtype=np.uint8)
+    puzzle_size = givens.shape[0]
+
+    best = None
+    for transpose in (False, True):
+        grid = givens.T if transpose else givens
+        row_ranks, column_ranks = line_signatures(grid=grid)
+
+        rows = line_orders(ranks=row_ranks, limit=max_candidates)
+        columns = line_orders(
+            ranks=column_ranks, limit=max(1, max_candidates // len(rows))
+        )
+        if len(rows) * len(columns) >= max_candidates:
+            logger.debug(f"Trying only the first {max_candidates} line orders")
+
+        grids = grid[rows[:, None, :, None], columns[None, :, None, :]]
+        grids, labels = relabel(
+            grids=grids.reshape(-1, puzzle_size * puzzle_size), puzzle_size=puzzle_size
+        )
+
+        # Narrow the candidates down to the lexicographically smallest grid
+        candidates = np.arange(grids.shape[0])
+        for cell in range(grids.shape[1]):
+            values = grids[candidates, cell]
+            candidates = candidates[values == values.min()]
+            if candidates.size == 1:
+                break
+
+        index = candidates[0]
+        canonical = grids[index].reshape(puzzle_size, puzzle_size)
+        if best is None or tuple(canonical.flat) < tuple(best[0].flat):
+            transform = Transform(
+                transpose=transpose,
+                rows=rows[index // len(columns)],
+                columns=columns[index % len(columns)],
+                labels=labels[index],
+            )
+            best = canonical, transform
+
+    return best
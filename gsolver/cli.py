@@ -0,0 +1,703 @@
+"""This module contains the gsolver command line interface.
+
+Solve a corpus of puzzles, one solution per line in input order:
+
+    python -m gsolver solve puzzles.txt --workers 4 --chunk-size 1024
+    cat puzzles.txt | python -m gsolver solve --search backtrack > solutions.txt
+
+Convert puzzles in a text format to the binary board format (see `gsolver.binary`),
+which the solve command reads as well:
+
+    python -m gsolver convert puzzles.txt puzzles.gsb
+
+Generate unique puzzles, e.g. 100 symmetric medium 9x9 puzzles in the boxed format:
+
+    python -m gsolver generate --size 9 --count 100 --symmetry rotational \
+        --difficulty medium --format boxed --seed 1
+
+Grade the difficulty of puzzles, one JSON object with the grade and its breakdown by
+technique per line, in input order (see `gsolver.grading`):
+
+    python -m gsolver grade puzzles.txt --workers 4 > grades.jsonl
+
+Benchmark the solver on the bundled corpora (see `gsolver.benchmark`) and fail if it
+got more than 10% slower than a previous run:
+
+    python -m gsolver benchmark --output new.json --baseline old.json --threshold 0.1
+
+Serve JSON lines requests (solve, count, grade, step) from a warm daemon on stdin or a
+Unix socket (see `gsolver.daemon`):
+
+    python -m gsolver serve --socket /tmp/gsolver.sock --workers 4
+
+Solve or grade sudoku variants by adding their units to the rows, columns and
+blocks, with `--variant` for the named variants and `--layout` for a JSON layout, e.g.
+the irregular blocks of a jigsaw sudoku (see `gsolver.parsing.parse_layout`):
+
+    python -m gsolver solve puzzles.txt --variant diagonal windoku
+    python -m gsolver solve puzzles.txt --layout jigsaw.json --search backtrack
+
+By default, every output line holds the solution in the one line format ("." for
+unsolved cells) followed by the status of the puzzle: solved, partial or contradiction.
+The solve and generate commands write other formats with `--format` (see
+`gsolver.writers`), e.g. the binary board format:
+
+    python -m gsolver solve puzzles.gsb --format binary -o solutions.gsb
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator
+
+import numpy as np
+
+from . import benchmark, binary, daemon, generator
+from .batch import STATUS_NAMES, solve_batch
+from .grading import Grades, grade_batch
+from .parsing import format_line, iter_puzzles, parse_layout
+from .strategies import DEFAULT_STRATEGIES, STRATEGIES
+from .tables import VARIANTS
+from .writers import WRITERS, OutputWriter, get_writer
+
+logger = logging.getLogger(__name__)
+
+
+def iter_chunks(
+    puzzles: Iterable[np.ndarray], chunk_size: int
+) -> Iterator[np.ndarray]:
+    """This function stacks consecutive puzzles of the same size into chunks."""
+
+    chunk = []
+    for puzzle in puzzles:
+        if chunk and (len(chunk) == chunk_size or puzzle.shape != chunk[0].shape):
+            yield np.stack(chunk)
+            chunk = []
+
+        chunk.append(puzzle)
+
+    if chunk:
+        yield np.stack(chunk)
+
+
+def map_chunks(
+    function: Callable, chunks: Iterable[np.ndarray], workers: int, *args
+) -> Iterator:
+    """This function yields `function(chunk, *args)` for every chunk in input order.
+
+    With more than one worker, the chunks are handled by a process pool. At most two
+    chunks per worker are in flight at any time, so memory stays flat regardless of
+    the number of chunks in the stream.
+    """
+
+    if workers <= 1:
+        for chunk in chunks:
+            yield function(chunk, *args)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(function, chunk, *args))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+
+def solve_chunk(
+    puzzles: np.ndarray,
+    search: str | None = None,
+    strategies: tuple[str, ...] = (),
+    layout: dict | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """This function solves a chunk of puzzles in a worker process.
+
+    The layout is passed as the spec of `parse_layout`, as it depends on the size of
+    the puzzles of the chunk.
+    """
+
+    return solve_batch(
+        puzzles=puzzles,
+        search=search,
+        strategies=strategies,
+        layout=parse_layout(spec=layout or {}, puzzle_size=puzzles.shape[-1]),
+    )
+
+
+def solve_stream(
+    puzzles: Iterable[np.ndarray],
+    workers: int = 1,
+    chunk_size: int = 1024,
+    search: str | None = None,
+    strategies: tuple[str, ...] = (),
+    layout: dict | None = None,
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """This function yields the solutions and status of every chunk in input order."""
+
+    chunks = iter_chunks(puzzles=puzzles, chunk_size=chunk_size)
+    yield from map_chunks(solve_chunk, chunks, workers, search, strategies, layout)
+
+
+def grade_chunk(
+    puzzles: np.ndarray, strategies: tuple[str, ...], layout: dict | None = None
+) -> tuple[np.ndarray, Grades]:
+    """This function grades a chunk of puzzles in a worker process."""
+
+    layout = parse_layout(spec=layout or {}, puzzle_size=puzzles.shape[-1])
+    return puzzles, grade_batch(puzzles=puzzles, strategies=strategies, layout=layout)
+
+
+def grade_stream(
+    puzzles: Iterable[np.ndarray],
+    workers: int = 1,
+    chunk_size: int = 1024,
+    strategies: tuple[str, ...] = DEFAULT_STRATEGIES,
+    layout: dict | None = None,
+) -> Iterator[tuple[np.ndarray, Grades]]:
+    """This function yields the puzzles and grades of every chunk in input order."""
+
+    chunks = iter_chunks(puzzles=puzzles, chunk_size=chunk_size)
+    yield from map_chunks(grade_chunk, chunks, workers, strategies, layout)
+
+
+def get_layout(args: argparse.Namespace) -> dict:
+    """This function returns the layout spec of the `--layout` and `--variant` options.
+
+    Returns:
+        The spec of `gsolver.parsing.parse_layout`, empty for the standard layout.
+    """
+
+    layout = {}
+    if args.layout is not None:
+        with open(args.layout, "r") as file:
+            layout = json.load(file)
+        if not isinstance(layout, dict):
+            raise ValueError(f"Layout {args.layout} is not a JSON object")
+
+    if args.variant:
+        layout["variants"] = [*layout.get("variants", ()), *args.variant]
+
+    return layout
+
+
+def iter_board_file(
+    board_file: binary.BoardFile, chunk_size: int
+) -> Iterator[np.ndarray]:
+    """This function yields the boards of a binary board file, one chunk at a time."""
+
+    for start in range(0, len(board_file), chunk_size):
+        yield from board_file[start : start + chunk_size]
+
+
+class ChunkWriter:
+    """This class represents the writer of the output argument of a command.
+
+    The writer of the format is created for the size of the first chunk, as the size
+    of the puzzles is only known once they are read.
+    """
+
+    def __init__(self, output: str, fmt: str):
+        self.output_file = (
+            sys.stdout.buffer if output == "-" else open(output, "wb")
+        )
+        self.fmt = fmt
+        self.writer: OutputWriter | None = None
+
+    def write(self, solutions: np.ndarray, status: np.ndarray | None = None):
+        """This function writes a chunk of boards, see `OutputWriter.write`."""
+
+        if self.writer is None:
+            self.writer = get_writer(
+                name=self.fmt,
+                stream=self.output_file,
+                puzzle_size=solutions.shape[-1],
+            )
+        elif solutions.shape[-1] != self.writer.puzzle_size and self.fmt == "binary":
+            raise ValueError("Binary board files hold boards of a single size")
+
+        self.writer.write(solutions=solutions, status=status)
+
+    def flush(self):
+        """This function flushes the output file, so the boards so far can be read."""
+        self.output_file.flush()
+
+    def close(self):
+        """This function flushes the writer and closes the output file if opened."""
+
+        if self.writer is not None:
+            self.writer.close()
+        if self.output_file is sys.stdout.buffer:
+            self.output_file.flush()
+        else:
+            self.output_file.close()
+
+
+def solve_command(args: argparse.Namespace):
+    """This function runs the solve command."""
+
+    layout = get_layout(args=args)
+    input_file, puzzles = open_puzzles(args=args)
+    output_file = ChunkWriter(output=args.output, fmt=args.format)
+
+    start = time.perf_counter()
+    status_counts = np.zeros(len(STATUS_NAMES), dtype=int)
+    try:
+        for solutions, status in solve_stream(
+            puzzles=puzzles,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            search=args.search,
+            strategies=tuple(args.strategies),
+            layout=layout,
+        ):
+            output_file.write(solutions=solutions, status=status)
+            status_counts += np.bincount(status, minlength=len(STATUS_NAMES))
+    finally:
+        if input_file is not None:
+            input_file.close()
+        output_file.close()
+
+    elapsed = time.perf_counter() - start
+    total = status_counts.sum()
+    summary = ", ".join(
+        f"{count} {name}" for name, count in zip(STATUS_NAMES, status_counts)
+    )
+    print(
+        f"{total} puzzles ({summary}) in {elapsed:.2f}s "
+        f"({total / max(elapsed, 1e-9):.0f} puzzles/s)",
+        file=sys.stderr,
+    )
+
+
+def open_puzzles(args: argparse.Namespace):
+    """This function opens the puzzle stream of the input argument.
+
+    Binary board files must hold givens, i.e. be of the cells kind, as the candidates
+    kind holds bitmasks rather than numbers.
+
+    Returns:
+        The input file for the caller to close, None for stdin and binary board files,
+        which are memory-mapped, and the puzzles.
+    """
+
+    if args.input != "-" and binary.is_board_file(args.input):
+        board_file = binary.BoardFile(path=args.input)
+        if board_file.kind != binary.CELLS:
+            raise ValueError(
+                f"Binary board file [{args.input}] holds "
+                f"{binary.KINDS[board_file.kind]}, expected cells"
+            )
+
+        return None, iter_board_file(board_file=board_file, chunk_size=args.chunk_size)
+
+    if args.input == "-":
+        return None, iter_puzzles(lines=sys.stdin)
+
+    input_file = open(args.input, "r")
+    return input_file, iter_puzzles(lines=input_file)
+
+
+def grade_command(args: argparse.Namespace):
+    """This function runs the grade command."""
+
+    layout = get_layout(args=args)
+    input_file, puzzles = open_puzzles(args=args)
+    output_file = sys.stdout if args.output == "-" else open(args.output, "w")
+
+    start = time.perf_counter()
+    total = 0
+    try:
+        for chunk, grades in grade_stream(
+            puzzles=puzzles,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            strategies=tuple(args.strategies),
+            layout=layout,
+        ):
+            lines = (
+                {"puzzle": format_line(givens), **grades.breakdown(index)}
+                for index, givens in enumerate(chunk)
+            )
+            output_file.write("".join(json.dumps(line) + "\n" for line in lines))
+            total += len(grades)
+    finally:
+        if input_file is not None:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"{total} puzzles graded in {elapsed:.2f}s "
+        f"({total / max(elapsed, 1e-9):.0f} puzzles/s)",
+        file=sys.stderr,
+    )
+
+
+def convert_command(args: argparse.Namespace):
+    """This function runs the convert command."""
+
+    input_file = sys.stdin if args.input == "-" else open(args.input, "r")
+    try:
+        count = binary.convert(lines=input_file, path=args.output)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+
+    print(f"{count} puzzles written to {args.output}", file=sys.stderr)
+
+
+def generate_command(args: argparse.Namespace):
+    """This function runs the generate command.
+
+    Reports the number of unique puzzles generated per second for every size.
+    """
+
+    output_file = ChunkWriter(output=args.output, fmt=args.format)
+    try:
+        for puzzle_size in args.size:
+            start = time.perf_counter()
+            total = 0
+            for puzzles in generator.generate_stream(
+                puzzle_size=puzzle_size,
+                count=args.count,
+                seed=args.seed,
+                workers=args.workers,
+                clues=args.clues,
+                symmetry=args.symmetry,
+                difficulty=args.difficulty,
+            ):
+                output_file.write(solutions=puzzles)
+                output_file.flush()
+                total += len(puzzles)
+
+            elapsed = time.perf_counter() - start
+            print(
+                f"{total} unique {puzzle_size}x{puzzle_size} puzzles in "
+                f"{elapsed:.2f}s ({total / max(elapsed, 1e-9):.2f} puzzles/s)",
+                file=sys.stderr,
+            )
+    finally:
+        output_file.close()
+
+
+def serve_command(args: argparse.Namespace):
+    """This function runs the serve command until stdin closes or it is interrupted."""
+
+    solver = daemon.SolverDaemon(
+        workers=args.workers,
+        max_pending=args.max_pending,
+        cache_size=args.cache_size,
+        cache_path=args.cache_path,
+        warm_sizes=tuple(args.warm),
+    )
+    try:
+        if args.socket is None:
+            daemon.serve_stdin(solver=solver)
+        else:
+            daemon.serve_socket(solver=solver, path=args.socket)
+    finally:
+        solver.shutdown()
+
+
+def benchmark_command(args: argparse.Namespace):
+    """This function runs the benchmark command.
+
+    Exits with status 1 if a result regressed compared to the baseline.
+    """
+
+    # Per-iteration logging, e.g. of stalled puzzles, would dominate the timings
+    logging.getLogger("gsolver").setLevel(
+        logging.INFO if args.verbose else logging.CRITICAL
+    )
+
+    results = benchmark.run_benchmarks(
+        corpora=tuple(args.corpora),
+        backends=tuple(args.backends),
+        search=args.search,
+        limit=args.limit,
+        strategies=tuple(args.strategies),
+    )
+    print(benchmark.format_results(results=results), file=sys.stderr)
+    if args.output is not None:
+        benchmark.save_results(results=results, path=args.output)
+
+    if args.baseline is None:
+        return
+
+    regressions = benchmark.find_regressions(
+        results=results,
+        baseline=benchmark.load_results(path=args.baseline),
+        threshold=args.threshold,
+    )
+    for regression in regressions:
+        print(f"Regression: {regression}", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+
+
+def add_layout_arguments(parser: argparse.ArgumentParser):
+    """This function adds the layout options of sudoku variants to a command."""
+
+    parser.add_argument(
+        "--variant",
+        nargs="+",
+        choices=tuple(VARIANTS),
+        default=(),
+        help="Variants whose units are added to the rows, columns and blocks.",
+    )
+    parser.add_argument(
+        "--layout",
+        default=None,
+        help="JSON file with the blocks and extra units of a sudoku variant.",
+    )
+
+
+def main(argv: list[str] | None = None):
+    """This function parses the command line arguments and runs the command."""
+
+    parser = argparse.ArgumentParser(
+        prog="python -m gsolver", description="Solve sudoku puzzles."
+    )
+    parser.add_argument("--verbose", action="store_true", help="Log debug output.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    solve_parser = subparsers.add_parser(
+        "solve", help="Solve a stream of puzzles in the boxed or one line format."
+    )
+    solve_parser.add_argument(
+        "input", nargs="?", default="-", help="Puzzle file, or - for stdin."
+    )
+    solve_parser.add_argument(
+        "-o", "--output", default="-", help="Solution file, or - for stdout."
+    )
+    solve_parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of worker processes.",
+    )
+    solve_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=1024,
+        help="Number of puzzles solved together by a worker.",
+    )
+    solve_parser.add_argument(
+        "--search",
+        choices=("backtrack", "exact_cover"),
+        default=None,
+        help="Complete puzzles where propagation stalls by searching.",
+    )
+    solve_parser.add_argument(
+        "--strategies",
+        nargs="+",
+        choices=tuple(STRATEGIES),
+        default=(),
+        help="Higher-order strategies tried in order where the singles stall.",
+    )
+    solve_parser.add_argument(
+        "--format",
+        choices=tuple(WRITERS),
+        default="line",
+        help="Output format of the solutions.",
+    )
+    add_layout_arguments(parser=solve_parser)
+    solve_parser.set_defaults(func=solve_command)
+
+    grade_parser = subparsers.add_parser(
+        "grade", help="Grade the difficulty of a stream of puzzles."
+    )
+    grade_parser.add_argument(
+        "input", nargs="?", default="-", help="Puzzle file, or - for stdin."
+    )
+    grade_parser.add_argument(
+        "-o", "--output", default="-", help="JSON lines file, or - for stdout."
+    )
+    grade_parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of worker processes.",
+    )
+    grade_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=1024,
+        help="Number of puzzles graded together by a worker.",
+    )
+    grade_parser.add_argument(
+        "--strategies",
+        nargs="+",
+        choices=tuple(STRATEGIES),
+        default=DEFAULT_STRATEGIES,
+        help="Strategies tried where the singles stall, in order of cost.",
+    )
+    add_layout_arguments(parser=grade_parser)
+    grade_parser.set_defaults(func=grade_command)
+
+    convert_parser = subparsers.add_parser(
+        "convert", help="Convert puzzles in a text format to the binary board format."
+    )
+    convert_parser.add_argument(
+        "input", nargs="?", default="-", help="Puzzle file, or - for stdin."
+    )
+    convert_parser.add_argument("output", help="Binary board file to write.")
+    convert_parser.set_defaults(func=convert_command)
+
+    generate_parser = subparsers.add_parser(
+        "generate", help="Generate unique puzzles from random full grids."
+    )
+    generate_parser.add_argument(
+        "--size",
+        type=int,
+        nargs="+",
+        default=[9],
+        help="Puzzle sizes to generate, e.g. 9 16.",
+    )
+    generate_parser.add_argument(
+        "--count", type=int, default=10, help="Number of puzzles per size."
+    )
+    generate_parser.add_argument(
+        "--clues",
+        type=int,
+        default=None,
+        help="Maximum number of clues. Default: as few as possible.",
+    )
+    generate_parser.add_argument(
+        "--symmetry",
+        choices=generator.SYMMETRIES,
+        default="none",
+        help="Symmetry of the clue pattern.",
+    )
+    generate_parser.add_argument(
+        "--difficulty",
+        choices=generator.DIFFICULTIES,
+        default=None,
+        help="Difficulty grade of the puzzles. Default: any.",
+    )
+    generate_parser.add_argument(
+        "--format",
+        choices=tuple(WRITERS),
+        default="line",
+        help="Output format of the puzzles.",
+    )
+    generate_parser.add_argument(
+        "--seed", type=int, default=0, help="Seed of the random generators."
+    )
+    generate_parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of worker processes.",
+    )
+    generate_parser.add_argument(
+        "-o", "--output", default="-", help="Puzzle file, or - for stdout."
+    )
+    generate_parser.set_defaults(func=generate_command)
+
+    benchmark_parser = subparsers.add_parser(
+        "benchmark", help="Benchmark the solver on the bundled puzzle corpora."
+    )
+    benchmark_parser.add_argument(
+        "--corpora",
+        nargs="+",
+        choices=benchmark.CORPORA,
+        default=benchmark.CORPORA,
+        help="Corpora to benchmark.",
+    )
+    benchmark_parser.add_argument(
+        "--backends",
+        nargs="+",
+        choices=benchmark.BACKENDS,
+        default=benchmark.BACKENDS,
+        help="Backends to benchmark.",
+    )
+    benchmark_parser.add_argument(
+        "--search",
+        choices=("backtrack", "exact_cover"),
+        default="backtrack",
+        help="Search used where propagation stalls.",
+    )
+    benchmark_parser.add_argument(
+        "--strategies",
+        nargs="+",
+        choices=tuple(STRATEGIES),
+        default=(),
+        help="Higher-order strategies tried in order where the singles stall.",
+    )
+    benchmark_parser.add_argument(
+        "--limit",
+        type=int,
+        default=20,
+        help="Maximum number of puzzles per corpus.",
+    )
+    benchmark_parser.add_argument(
+        "-o", "--output", default=None, help="JSON file to write the results to."
+    )
+    benchmark_parser.add_argument(
+        "--baseline", default=None, help="JSON results of a previous run to compare to."
+    )
+    benchmark_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative throughput drop that counts as a regression.",
+    )
+    benchmark_parser.set_defaults(func=benchmark_command)
+
+    serve_parser = subparsers.add_parser(
+        "serve", help="Answer JSON lines requests from a warm solver daemon."
+    )
+    serve_parser.add_argument(
+        "--socket",
+        default=None,
+        help="Unix socket to listen on. Default: answer requests on stdin.",
+    )
+    serve_parser.add_argument(
+        "--workers", type=int, default=1, help="Number of worker threads."
+    )
+    serve_parser.add_argument(
+        "--max-pending",
+        type=int,
+        default=None,
+        help="Maximum number of requests read ahead. Default: 4 per worker.",
+    )
+    serve_parser.add_argument(
+        "--cache-size", type=int, default=4096, help="Number of cached solutions."
+    )
+    serve_parser.add_argument(
+        "--cache-path", default=None, help="File that keeps the cache across runs."
+    )
+    serve_parser.add_argument(
+        "--warm",
+        type=int,
+        nargs="*",
+        default=[9],
+        help="Puzzle sizes to warm the tables and caches for at start.",
+    )
+    serve_parser.set_defaults(func=serve_command)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.WARNING, stream=sys.stderr
+    )
+
+    # Invalid inputs, e.g. a board file of the wrong kind, end with a usage error
+    try:
+        args.func(args)
+    except ValueError as error:
+        parser.exit(status=2, message=f"{parser.prog}: error: {error}\n")
+    except BrokenPipeError:
+        # The reader of stdout is gone, e.g. `head`. Python flushes stdout again on
+        # exit, so it points at devnull to not fail a second time.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
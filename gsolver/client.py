@@ -0,0 +1,168 @@
+"""This module contains a small client of the solver daemon, see `gsolver.daemon`.
+
+It sends requests over the Unix socket of a running daemon, one at a time or many
+in flight on one connection, and reports the latency percentiles, both end to end and
+as measured by the daemon:
+
+    python -m gsolver serve --socket /tmp/gsolver.sock &
+    python -m gsolver.client --socket /tmp/gsolver.sock gsolver/corpora/easy.txt \
+        --op solve --requests 1000 --connections 4
+
+    with DaemonClient(path="/tmp/gsolver.sock") as client:
+        client.request(op="count", puzzle="1.3....", limit=2)["result"]
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import socket
+import threading
+import time
+
+import numpy as np
+
+from .parsing import format_line, read_puzzles
+
+logger = logging.getLogger(__name__)
+
+
+class DaemonClient:
+    """This class represents a connection to the solver daemon."""
+
+    def __init__(self, path: str):
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.connect(path)
+        self.reader = self.socket.makefile("rb")
+        self.ids = itertools.count()
+
+    def __enter__(self) -> "DaemonClient":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def send(self, op: str, **options) -> int:
+        """This function sends a request without waiting for its response.
+
+        Returns:
+            The ID of the request.
+        """
+
+        request_id = next(self.ids)
+        line = json.dumps({"id": request_id, "op": op, **options}) + "\n"
+        self.socket.sendall(line.encode())
+        return request_id
+
+    def receive(self) -> dict:
+        """This function waits for the next response, of any pending request."""
+
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Daemon closed the connection")
+        return json.loads(line)
+
+    def request(self, op: str, **options) -> dict:
+        """This function sends a request and waits for its response."""
+
+        request_id = self.send(op=op, **options)
+        response = self.receive()
+        if response["id"] != request_id:
+            raise ConnectionError(f"Response to {response['id']} not {request_id}")
+        return response
+
+    def pipeline(self, requests: list[dict], in_flight: int = 64) -> list[dict]:
+        """This function sends requests with up to `in_flight` of them pending.
+
+        Returns:
+            The responses in the order of the requests.
+        """
+
+        responses = {}
+        request_ids = []
+        for request in requests:
+            if len(request_ids) - len(responses) >= in_flight:
+                response = self.receive()
+                responses[response["id"]] = response
+            request_ids.append(self.send(**request))
+
+        while len(responses) < len(request_ids):
+            response = self.receive()
+            responses[response["id"]] = response
+
+        return [responses[request_id] for request_id in request_ids]
+
+    def close(self):
+        """This function closes the connection."""
+
+        self.reader.close()
+        self.socket.close()
+
+
+def run_connection(
+    path: str, requests: list[dict], latencies: list, server_latencies: list
+):
+    """This function sends requests one at a time and records their latencies."""
+
+    with DaemonClient(path=path) as client:
+        for request in requests:
+            start = time.perf_counter()
+            response = client.request(**request)
+            latencies.append(time.perf_counter() - start)
+            server_latencies.append(response["latency_us"] / 1e6)
+            if "error" in response:
+                logger.error(f"Request failed: {response['error']}")
+
+
+def main():
+    """This function sends the puzzles of a file to the daemon and prints latencies."""
+
+    parser = argparse.ArgumentParser(description="Send requests to the gsolver daemon.")
+    parser.add_argument("puzzles", help="Puzzle file, e.g. gsolver/corpora/easy.txt.")
+    parser.add_argument("--socket", default="/tmp/gsolver.sock")
+    parser.add_argument(
+        "--op", default="solve", choices=("ping", "solve", "count", "grade", "step")
+    )
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--connections", type=int, default=1)
+    args = parser.parse_args()
+
+    puzzles = [format_line(givens) for givens in read_puzzles(args.puzzles)]
+    requests = [
+        {"op": args.op, "puzzle": puzzles[index % len(puzzles)]}
+        for index in range(args.requests)
+    ]
+
+    latencies = []
+    server_latencies = []
+    threads = [
+        threading.Thread(
+            target=run_connection,
+            args=(
+                args.socket,
+                requests[index :: args.connections],
+                latencies,
+                server_latencies,
+            ),
+        )
+        for index in range(args.connections)
+    ]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{len(latencies)} {args.op} requests on {args.connections} connections in "
+        f"{elapsed:.2f}s ({len(latencies) / max(elapsed, 1e-9):.0f} requests/s)"
+    )
+    for name, values in (("round trip", latencies), ("daemon", server_latencies)):
+        p50, p95, p99 = np.percentile(np.asarray(values) * 1e6, [50, 95, 99])
+        print(f"{name} latency p50 {p50:.0f}us, p95 {p95:.0f}us, p99 {p99:.0f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+"""This module contains a long-lived solver daemon that answers JSON lines requests.
+
+Every run of the command line interface pays for importing NumPy, building the tables
+of `gsolver.tables` and warming the caches of the kernels before solving a single
+puzzle. The daemon pays this once at start and then answers requests from stdin or a
+Unix domain socket, one JSON object per line:
+
+    python -m gsolver serve --socket /tmp/gsolver.sock --workers 4
+    echo '{"id": 1, "op": "solve", "puzzle": "1.3...."}' | python -m gsolver serve
+
+Every request holds the operation "op", the "puzzle" in the one line format or as
+nested lists with 0 for empty cells (see `gsolver.parsing.parse_board`), an optional
+"id" that is echoed back, and the options of the operation:
+
+- ping: answers right away, to measure the overhead of the daemon.
+- solve: the "solution" in the one line format and its "status". Options: "search"
+  ("backtrack" by default, or null to only propagate) and "strategies". Solved
+  puzzles are cached, see `gsolver.cache`.
+- count: the number of "solutions", up to the "limit" option (2 by default), and
+  whether the puzzle is "unique". Options: "limit" and "search" ("backtrack" by
+  default, or "exact_cover").
+- grade: the grade and breakdown of `gsolver.grading`. Options: "strategies".
+- step: the "steps" of solving the puzzle one unit at a time, as streamed by the app
+  (see `Sudoku.iter_steps`), and whether it is "solved". Options: "max_steps".
+- stats: the number of requests per operation and the statistics of the cache.
+
+Every puzzle operation takes an optional "layout" of a sudoku variant, e.g.
+{"variants": ["diagonal"]} or the irregular "blocks" of a jigsaw sudoku (see
+`gsolver.parsing.parse_layout`). The cache only holds puzzles of the standard layout,
+as the canonical forms of `gsolver.canonical` do not preserve the units of variants.
+
+Every response holds the "id", the "result" or an "error", and the "latency_us" from
+reading the request to answering it, including the time spent waiting for a worker.
+
+Requests are run by a bounded pool of worker threads. Threads keep the warm tables
+and caches shared and cost microseconds per request, where worker processes would
+cost a round trip of the puzzle and result through a pipe. At most `max_pending`
+requests are read ahead, beyond that reading waits for a worker, so a fast client
+cannot grow the queue without bound. With more than one worker, responses may come
+back out of order, so clients match them by "id" (see `gsolver.client`).
+"""
+
+import json
+import logging
+import os
+import signal
+import socketserver
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Iterable
+
+import numpy as np
+
+from .batch import STATUS_NAMES, givens_to_bitmask, solve_batch
+from .cache import SolutionCache
+from .grading import grade_batch
+from .parsing import format_line, parse_board, parse_layout
+from .search import count_solutions
+from .strategies import DEFAULT_STRATEGIES, check_strategies
+from .sudoku import Sudoku
+from .tables import Layout, get_tables
+
+logger = logging.getLogger(__name__)
+
+SEARCHES = (None, "backtrack", "exact_cover")
+COUNT_SEARCHES = ("backtrack", "exact_cover")
+
+
+def get_search(
+    request: dict,
+    default: str | None = "backtrack",
+    searches: tuple[str | None, ...] = SEARCHES,
+) -> str | None:
+    """This function returns the search engine option of a request.
+
+    Args:
+        request: The request.
+        default: The search engine if the request has none.
+        searches: The accepted search engines, where None only propagates.
+    """
+
+    search = request.get("search", default)
+    if search not in searches:
+        raise ValueError(
+            f"Unknown search {json.dumps(search)}, expected one of "
+            f"{json.dumps(searches)}"
+        )
+    return search
+
+
+def get_strategies(request: dict, default: tuple[str, ...] = ()) -> tuple[str, ...]:
+    """This function returns the strategies option of a request."""
+
+    strategies = tuple(request.get("strategies", default))
+    check_strategies(strategies=strategies)
+    return strategies
+
+
+def get_layout(request: dict, puzzle_size: int) -> Layout | None:
+    """This function returns the layout option of a request, None if standard."""
+    return parse_layout(spec=request.get("layout") or {}, puzzle_size=puzzle_size)
+
+
+def ping(daemon: "SolverDaemon", request: dict) -> dict:
+    """This function answers a ping request."""
+    return {}
+
+
+def solve(daemon: "SolverDaemon", request: dict) -> dict:
+    """This function answers a solve request, from the cache if possible."""
+
+    givens = parse_board(request["puzzle"])
+    search = get_search(request=request)
+    strategies = get_strategies(request=request)
+    layout = get_layout(request=request, puzzle_size=givens.shape[0])
+
+    solution = daemon.cache.get(givens=givens) if layout is None else None
+    if solution is not None:
+        return {"solution": format_line(solution), "status": "solved"}
+
+    solutions, status = solve_batch(
+        puzzles=givens[None], search=search, strategies=strategies, layout=layout
+    )
+    status = STATUS_NAMES[status[0]]
+    if status == "solved" and layout is None:
+        daemon.cache.put(givens=givens, solution=solutions[0])
+
+    return {"solution": format_line(solutions[0]), "status": status}
+
+
+def count(daemon: "SolverDaemon", request: dict) -> dict:
+    """This function answers a count request."""
+
+    givens = parse_board(request["puzzle"])
+    limit = request.get("limit", 2)
+    if limit is not None and (not isinstance(limit, int) or limit < 1):
+        raise ValueError(f"Limit {limit} is not a positive integer or null")
+
+    cells = givens_to_bitmask(givens=givens[None])[0].reshape(givens.shape)
+    solutions = count_solutions(
+        cells=cells,
+        limit=limit,
+        search=get_search(request=request, searches=COUNT_SEARCHES),
+        layout=get_layout(request=request, puzzle_size=givens.shape[0]),
+    )
+    return {"solutions": solutions, "unique": solutions == 1}
+
+
+def grade(daemon: "SolverDaemon", request: dict) -> dict:
+    """This function answers a grade request."""
+
+    givens = parse_board(request["puzzle"])
+    strategies = get_strategies(request=request, default=DEFAULT_STRATEGIES)
+    layout = get_layout(request=request, puzzle_size=givens.shape[0])
+    grades = grade_batch(puzzles=givens[None], strategies=strategies, layout=layout)
+    return grades.breakdown(0)
+
+
+def step(daemon: "SolverDaemon", request: dict) -> dict:
+    """This function answers a step request."""
+
+    givens = parse_board(request["puzzle"])
+    sudoku = Sudoku(
+        puzzle=givens,
+        string_keys=True,
+        backend="bitmask",
+        layout=get_layout(request=request, puzzle_size=givens.shape[0]),
+    )
+    steps = list(sudoku.iter_steps(max_steps=request.get("max_steps")))
+    return {"steps": steps, "solved": not sudoku.partial_solution}
+
+
+def stats(daemon: "SolverDaemon", request: dict) -> dict:
+    """This function answers a stats request."""
+
+    with daemon.lock:
+        requests = dict(daemon.requests)
+    return {"requests": requests, "cache": daemon.cache.stats()}
+
+
+OPERATIONS: dict[str, Callable[["SolverDaemon", dict], dict]] = {
+    "ping": ping,
+    "solve": solve,
+    "count": count,
+    "grade": grade,
+    "step": step,
+    "stats": stats,
+}
+
+
+class SolverDaemon:
+    """This class represents the warm state and worker pool of the daemon."""
+
+    def __init__(
+        self,
+        workers: int = 1,
+        max_pending: int | None = None,
+        cache_size: int = 4096,
+        cache_path: str | None = None,
+        warm_sizes: tuple[int, ...] = (9,),
+    ):
+        self.workers = workers
+        self.max_pending = max_pending or 4 * workers
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.slots = threading.BoundedSemaphore(self.max_pending)
+
+        self.cache = SolutionCache(max_size=cache_size, path=cache_path)
+        self.lock = threading.Lock()
+        self.requests = Counter()
+
+        self.warm(sizes=warm_sizes)
+
+    def warm(self, sizes: tuple[int, ...]):
+        """This function builds the tables and runs every operation once per size.
+
+        The empty boards are not cached, so the cache statistics start empty.
+        """
+
+        start = time.perf_counter()
+        for puzzle_size in sizes:
+            get_tables(puzzle_size=puzzle_size)
+            givens = np.zeros((puzzle_size, puzzle_size), dtype=np.uint8)
+            solve_batch(puzzles=givens[None], search="backtrack")
+            count(daemon=self, request={"puzzle": givens.tolist()})
+            grade_batch(puzzles=givens[None])
+
+        logger.info(f"Warmed sizes {sizes} in {time.perf_counter() - start:.2f}s")
+
+    def handle(self, line: str, start: float) -> dict:
+        """This function answers one request line. It never raises.
+
+        Args:
+            line: The JSON request.
+            start: The `time.perf_counter` time the request was read at.
+
+        Returns:
+            The response with the "id", the "result" or an "error", and the
+            "latency_us".
+        """
+
+        response = {"id": None}
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Request is not a JSON object")
+
+            response["id"] = request.get("id")
+            operation = request.get("op")
+            if operation not in OPERATIONS:
+                raise ValueError(
+                    f"Unknown op {operation}, expected one of {tuple(OPERATIONS)}"
+                )
+
+            with self.lock:
+                self.requests[operation] += 1
+            response["result"] = OPERATIONS[operation](daemon=self, request=request)
+        except KeyError as error:
+            response["error"] = f"Missing {error}"
+        except (TypeError, ValueError) as error:
+            response["error"] = str(error)
+        except Exception as error:
+            logger.exception("Request failed")
+            response["error"] = f"Internal error: {error}"
+
+        response["latency_us"] = round((time.perf_counter() - start) * 1e6, 1)
+        return response
+
+    def submit(self, line: str, write: Callable[[str], None]) -> Future:
+        """This function runs a request on a worker and writes its response.
+
+        Waits for a free slot if `max_pending` requests are already pending.
+        """
+
+        start = time.perf_counter()
+        self.slots.acquire()
+        try:
+            future = self.executor.submit(
+                lambda: write(json.dumps(self.handle(line=line, start=start)) + "\n")
+            )
+        except BaseException:
+            self.slots.release()
+            raise
+
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    def serve_lines(self, lines: Iterable[str], write: Callable[[str], None]):
+        """This function answers a stream of request lines until it ends.
+
+        Returns once every response was written. `write` is called from the worker
+        threads and must be thread-safe.
+        """
+
+        pending = set()
+        for line in lines:
+            if not line.strip():
+                continue
+            future = self.submit(line=line, write=write)
+            pending.add(future)
+            future.add_done_callback(pending.discard)
+
+        wait(list(pending))
+
+    def shutdown(self):
+        """This function stops the workers and closes the cache."""
+
+        self.executor.shutdown(wait=True)
+        self.cache.close()
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """This class represents a connection to the daemon over the Unix socket."""
+
+    def handle(self):
+        lock = threading.Lock()
+
+        def write(text: str):
+            with lock:
+                self.wfile.write(text.encode())
+
+        try:
+            self.server.solver.serve_lines(
+                lines=(line.decode() for line in self.rfile), write=write
+            )
+        except (BrokenPipeError, ConnectionResetError):
+            logger.info("Client disconnected")
+
+
+class SocketServer(socketserver.ThreadingUnixStreamServer):
+    """This class represents the Unix socket server, one thread per connection."""
+
+    daemon_threads = True
+
+    def __init__(self, path: str, solver: SolverDaemon):
+        self.solver = solver
+        super().__init__(path, RequestHandler)
+
+
+def serve_stdin(solver: SolverDaemon):
+    """This function answers the requests on stdin until it is closed."""
+
+    lock = threading.Lock()
+
+    def write(text: str):
+        with lock:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+
+    solver.serve_lines(lines=sys.stdin, write=write)
+
+
+def serve_socket(solver: SolverDaemon, path: str):
+    """This function answers the connections to a Unix socket until interrupted.
+
+    Must be called from the main thread, as terminating the daemon exits cleanly.
+    """
+
+    if os.path.exists(path):
+        os.unlink(path)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    with SocketServer(path=path, solver=solver) as server:
+        logger.info(f"Listening on {path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            Path(path).unlink(missing_ok=True)
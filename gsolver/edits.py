@@ -0,0 +1,167 @@
+"""This module contains the edit ledger of interactive puzzles.
+
+Placing a number removes it from the candidates of every peer of the cell. Clearing
+the cell has to give the number back, but only to peers where no other placement
+removed it as well. The ledger keeps a count per cell and number of the placements
+among the peers that remove the number, so both directions only touch the cell and
+its peers:
+
+- place: the count of the number goes up by one in every peer, and peers where it
+  went from 0 to 1 lose the candidate.
+- clear: the count goes down by one in every peer, and peers where it went back to 0
+  get the candidate back, unless they hold a placement themselves.
+
+Every edit is recorded as the cell, the number before and the number after, so undo
+and redo just apply the inverse or the same edit again.
+"""
+
+import logging
+
+import numpy as np
+
+from . import bitmask
+from .tables import Layout, get_tables
+
+logger = logging.getLogger(__name__)
+
+
+class EditLedger:
+    """This class represents the placements of a puzzle and the candidates they leave.
+
+    Attributes:
+        numbers: The placed number of every flat cell, 0 for empty cells.
+        givens: Whether every flat cell is a given, which cannot be edited.
+        counts: An (n * n, n) array with the number of placements among the peers of
+            every cell that remove every number.
+        candidates: The flat bitmask of the numbers every cell can still hold.
+        undo_edits: The applied edits as (cell, previous number, number), last last.
+        redo_edits: The undone edits, last undone last.
+    """
+
+    def __init__(self, givens: np.ndarray, layout: Layout | None = None):
+        puzzle_size = givens.shape[0]
+        tables = get_tables(puzzle_size=puzzle_size, layout=layout)
+
+        self.puzzle_size = puzzle_size
+        self.peers = tables.peers
+        self.full_mask = bitmask.full_mask(puzzle_size)
+        dtype = bitmask.mask_dtype(puzzle_size)
+        self.bits = np.left_shift(dtype.type(1), np.arange(puzzle_size, dtype=dtype))
+
+        self.numbers = np.zeros(puzzle_size * puzzle_size, dtype=np.uint8)
+        self.givens = givens.reshape(-1) > 0
+        number_cells = puzzle_size * puzzle_size
+        self.counts = np.zeros((number_cells, puzzle_size), dtype=np.int16)
+        self.candidates = np.full(number_cells, self.full_mask, dtype=dtype)
+        self.undo_edits = []
+        self.redo_edits = []
+
+        for cell in np.flatnonzero(self.givens).tolist():
+            self.place(cell=cell, number=int(givens.flat[cell]))
+
+    def place(self, cell: int, number: int) -> np.ndarray:
+        """This function places a number in an empty cell.
+
+        Returns:
+            The flat cells whose candidates changed.
+        """
+
+        self.numbers[cell] = number
+        self.candidates[cell] = self.bits[number - 1]
+
+        # Peers lose the number where this is the first placement removing it
+        peers = self.peers[cell]
+        self.counts[peers, number - 1] += 1
+        lost = peers[(self.counts[peers, number - 1] == 1) & (self.numbers[peers] == 0)]
+        self.candidates[lost] &= ~self.bits[number - 1]
+
+        return np.concatenate([[cell], lost])
+
+    def remove(self, cell: int) -> np.ndarray:
+        """This function clears the placed number of a cell.
+
+        Returns:
+            The flat cells whose candidates changed.
+        """
+
+        number = int(self.numbers[cell])
+        self.numbers[cell] = 0
+
+        # The cell can hold every number that no placed peer removes
+        self.candidates[cell] = np.bitwise_or.reduce(
+            np.where(self.counts[cell] == 0, self.bits, 0)
+        )
+
+        # Peers regain the number where this was the last placement removing it
+        peers = self.peers[cell]
+        self.counts[peers, number - 1] -= 1
+        regained = peers[
+            (self.counts[peers, number - 1] == 0) & (self.numbers[peers] == 0)
+        ]
+        self.candidates[regained] |= self.bits[number - 1]
+
+        return np.concatenate([[cell], regained])
+
+    def apply(self, cell: int, number: int) -> tuple[np.ndarray, int]:
+        """This function sets a cell to a number, or clears it with 0, without history.
+
+        Returns:
+            The flat cells whose candidates changed, the edited cell first, and the
+            placed number that was removed, i.e. the candidate that came back, or 0.
+        """
+
+        if self.givens[cell]:
+            row, column = divmod(cell, self.puzzle_size)
+            raise ValueError(f"Cell {row + 1},{column + 1} is a given")
+        if not 0 <= number <= self.puzzle_size:
+            raise ValueError(
+                f"Number {number} is not between 0 and {self.puzzle_size}"
+            )
+
+        changed = [np.empty(0, dtype=np.intp)]
+        removed = int(self.numbers[cell])
+        if removed:
+            changed.append(self.remove(cell=cell))
+        if number:
+            changed.append(self.place(cell=cell, number=number))
+
+        # Both directions list the edited cell first, which `unique` would sort away
+        changed = np.concatenate(changed).astype(np.intp)
+        _, first = np.unique(changed, return_index=True)
+        return changed[np.sort(first)], removed
+
+    def edit(self, cell: int, number: int) -> tuple[np.ndarray, int]:
+        """This function sets or clears a cell and records the edit for undo.
+
+        Nothing changes and nothing is recorded if the cell already holds the number.
+        See `apply` for the return values.
+        """
+
+        previous = int(self.numbers[cell])
+        if previous == number:
+            return np.empty(0, dtype=np.intp), 0
+
+        result = self.apply(cell=cell, number=number)
+        self.undo_edits.append((cell, previous, number))
+        self.redo_edits.clear()
+        return result
+
+    def undo(self) -> tuple[np.ndarray, int]:
+        """This function reverts the last edit, if any. See `apply` for the returns."""
+
+        if not self.undo_edits:
+            return np.empty(0, dtype=np.intp), 0
+
+        cell, previous, number = self.undo_edits.pop()
+        self.redo_edits.append((cell, previous, number))
+        return self.apply(cell=cell, number=previous)
+
+    def redo(self) -> tuple[np.ndarray, int]:
+        """This function applies the last undone edit again, if any. See `apply`."""
+
+        if not self.redo_edits:
+            return np.empty(0, dtype=np.intp), 0
+
+        cell, previous, number = self.redo_edits.pop()
+        self.undo_edits.append((cell, previous, number))
+        return self.apply(cell=cell, number=number)
@@ -0,0 +1,425 @@
+"""This module contains the puzzle generator.
+
+A puzzle is generated in two steps:
+
+1. A random full grid: the diagonal blocks, which do not share any row or column, are
+   filled with random permutations and the rest is completed by `BacktrackingSearch`.
+   Searches that run into the heavy tail of large boards are restarted from a new
+   fill. A random validity preserving transformation (see `gsolver.canonical`) of the
+   grid adds the variety that the deterministic completion lacks.
+2. Clue removal: the cells, or their symmetry orbits, are visited in random order and
+   emptied if the puzzle stays unique, until the target number of clues is reached.
+
+Uniqueness is checked incrementally. The solution is known, so a removal only needs
+to show that the emptied cells cannot hold any other number: every emptied cell is
+restricted to the other numbers and searched for a single solution, which usually
+fails after a few nodes of propagation. Cells that must stay clues are never tried
+again, since removing more clues only allows more solutions.
+
+The difficulty of a puzzle is graded by what closes it:
+
+- easy: naked and hidden singles only,
+- medium: singles and the higher-order strategies of `gsolver.strategies`,
+- hard: search.
+
+Any deduction is sound, so a puzzle that deductions close is unique, and easy and
+medium targets need no search at all. Every puzzle gets its own random generator
+seeded by the seed, the puzzle size and its index, so the output does not depend on
+the number of worker processes.
+"""
+
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator
+
+import numpy as np
+
+from . import bitmask
+from .batch import SOLVED, givens_to_bitmask, propagate_batch
+from .canonical import Transform
+from .search import BacktrackingSearch
+from .strategies import DEFAULT_STRATEGIES
+from .tables import get_tables
+
+logger = logging.getLogger(__name__)
+
+SYMMETRIES = ("none", "rotational", "mirror")
+DIFFICULTIES = ("easy", "medium", "hard")
+
+
+def check_targets(symmetry: str, difficulty: str | None):
+    """This function raises a ValueError for unknown symmetries or difficulties."""
+
+    if symmetry not in SYMMETRIES:
+        raise ValueError(f"Unknown symmetry {symmetry}, expected one of {SYMMETRIES}")
+    if difficulty is not None and difficulty not in DIFFICULTIES:
+        raise ValueError(
+            f"Unknown difficulty {difficulty}, expected one of {DIFFICULTIES}"
+        )
+
+
+def random_transform(puzzle_size: int, rng: np.random.Generator) -> Transform:
+    """This function returns a random validity preserving transformation of a size."""
+
+    sqrt_puzzle_size = int(np.sqrt(puzzle_size))
+
+    def line_order() -> np.ndarray:
+        # Random bands (or stacks), then random lines within every band
+        bands = rng.permutation(sqrt_puzzle_size) * sqrt_puzzle_size
+        return np.concatenate(
+            [band + rng.permutation(sqrt_puzzle_size) for band in bands]
+        )
+
+    labels = np.concatenate([[0], rng.permutation(puzzle_size) + 1])
+    return Transform(
+        transpose=bool(rng.integers(2)),
+        rows=line_order(),
+        columns=line_order(),
+        labels=labels,
+    )
+
+
+def random_grid(
+    puzzle_size: int, rng: np.random.Generator, max_nodes: int | None = None
+) -> np.ndarray:
+    """This function returns a random full grid.
+
+    Args:
+        puzzle_size: The size of the grid, i.e. "n".
+        rng: The random generator.
+        max_nodes: The number of search nodes after which the completion is
+            restarted from a new fill of the diagonal blocks. Defaults to 2 * n * n.
+
+    Returns:
+        The (n, n) grid of numbers.
+    """
+
+    sqrt_puzzle_size = int(np.sqrt(puzzle_size))
+    if max_nodes is None:
+        max_nodes = 2 * puzzle_size * puzzle_size
+
+    blocks = get_tables(puzzle_size=puzzle_size).units["block"]
+    engine = BacktrackingSearch(puzzle_size=puzzle_size)
+    while True:
+        # 1. Fill the diagonal blocks, which never conflict, with random numbers
+        cells = [bitmask.full_mask(puzzle_size)] * (puzzle_size * puzzle_size)
+        for block in range(0, puzzle_size, sqrt_puzzle_size + 1):
+            for cell, number in zip(
+                blocks[block].tolist(), rng.permutation(puzzle_size).tolist()
+            ):
+                cells[cell] = 1 << number
+
+        # 2. Complete the grid, or start over if the search takes too long
+        solution = next(engine.solutions(cells=cells, max_nodes=max_nodes), None)
+        if solution is not None:
+            break
+
+        logger.info(f"Restarting grid completion after {engine.nodes} nodes")
+
+    numbers = np.array([value.bit_length() for value in solution], dtype=np.uint8)
+    grid = numbers.reshape(puzzle_size, puzzle_size)
+
+    # 3. Transform the grid at random
+    return random_transform(puzzle_size=puzzle_size, rng=rng).apply(grid=grid)
+
+
+def symmetry_orbits(puzzle_size: int, symmetry: str) -> list[tuple[int, ...]]:
+    """This function returns the groups of cells that are removed together.
+
+    With "rotational" symmetry a cell is paired with the cell rotated by 180 degrees,
+    with "mirror" symmetry with the cell mirrored at the vertical center line.
+    """
+
+    cells = np.arange(puzzle_size * puzzle_size).reshape(puzzle_size, puzzle_size)
+    if symmetry == "rotational":
+        partners = cells[::-1, ::-1]
+    elif symmetry == "mirror":
+        partners = cells[:, ::-1]
+    else:
+        partners = cells
+
+    orbits = {
+        tuple(sorted({cell, partner}))
+        for cell, partner in zip(cells.flat, partners.flat)
+    }
+    return sorted(orbits)
+
+
+def grade(givens: np.ndarray) -> str:
+    """This function grades a unique (n, n) puzzle as "easy", "medium" or "hard"."""
+
+    puzzle_size = givens.shape[-1]
+    cells = givens_to_bitmask(givens=givens[None])
+    if propagate_batch(cells=cells, puzzle_size=puzzle_size)[0] == SOLVED:
+        return "easy"
+
+    status = propagate_batch(
+        cells=cells, puzzle_size=puzzle_size, strategies=DEFAULT_STRATEGIES
+    )
+    return "medium" if status[0] == SOLVED else "hard"
+
+
+def is_forced(
+    engine: BacktrackingSearch, cells: list[int], cell: int, number: int
+) -> bool:
+    """This function checks whether the clues alone force the number of an empty cell.
+
+    The number is forced if the clues among the peers rule out every other number
+    (a naked single), or the number in every other cell of a unit (a hidden single).
+    Clues are the cells with a single bit in `cells`, everything else is empty.
+    """
+
+    def clues_of(peers: tuple[int, ...]) -> int:
+        seen = 0
+        for peer in peers:
+            value = cells[peer]
+            if not value & (value - 1):
+                seen |= value
+        return seen
+
+    # 1. Naked single
+    if engine.full_mask & ~clues_of(engine.peers[cell]) == number:
+        return True
+
+    # 2. Hidden single in a unit of the cell
+    for unit_index in engine.cell_units[cell]:
+        if all(
+            other == cell
+            or not cells[other] & (cells[other] - 1)
+            or clues_of(engine.peers[other]) & number
+            for other in engine.units[unit_index]
+        ):
+            return True
+
+    return False
+
+
+def keeps_unique(
+    engine: BacktrackingSearch,
+    cells: list[int],
+    removed: tuple[int, ...],
+    max_nodes: int | None = None,
+) -> bool:
+    """This function checks that the removed clues of a unique puzzle are implied.
+
+    Args:
+        engine: The search engine of the puzzle size.
+        cells: The flat cell bitmasks of the puzzle with the clues in place.
+        removed: The cells whose clues are removed.
+        max_nodes: The search budget of every removed cell. A search that runs out
+            of nodes counts as another solution, so the clues are kept.
+
+    Returns:
+        True if no removed cell can hold a number other than its clue.
+    """
+
+    full_mask = engine.full_mask
+    emptied = list(cells)
+    for cell in removed:
+        emptied[cell] = full_mask
+
+    # 1. Dense puzzles: the remaining clues force the removed clues back directly
+    if all(
+        is_forced(engine=engine, cells=emptied, cell=cell, number=cells[cell])
+        for cell in removed
+    ):
+        return True
+
+    # 2. Otherwise search for a solution with another number in a removed cell
+    for cell in removed:
+        restricted = list(emptied)
+        restricted[cell] = full_mask & ~cells[cell]
+
+        start_nodes = engine.nodes
+        solutions = engine.solutions(cells=restricted, max_nodes=max_nodes)
+        if next(solutions, None) is not None:
+            return False
+        if max_nodes is not None and engine.nodes - start_nodes >= max_nodes:
+            return False
+
+    return True
+
+
+def remove_clues(
+    grid: np.ndarray,
+    rng: np.random.Generator,
+    clues: int | None = None,
+    symmetry: str = "none",
+    difficulty: str | None = None,
+    max_nodes: int | None = None,
+) -> np.ndarray:
+    """This function removes clues from a full grid while the puzzle stays unique.
+
+    Args:
+        grid: The (n, n) full grid of numbers.
+        rng: The random generator that orders the removals.
+        clues: Removal stops at this number of clues. None removes as many as
+            possible, which leaves a minimal puzzle without symmetry.
+        symmetry: One of `SYMMETRIES`.
+        difficulty: Removals that make the puzzle harder than this are skipped.
+        max_nodes: The search budget of a uniqueness check, see `keeps_unique`.
+            Defaults to 4 * n * n, which bounds the heavy tail of sparse large
+            puzzles at the cost of a few clues more than a minimal puzzle.
+
+    Returns:
+        The (n, n) givens, where empty cells are 0.
+    """
+
+    puzzle_size = grid.shape[0]
+    if max_nodes is None:
+        max_nodes = 4 * puzzle_size * puzzle_size
+    engine = BacktrackingSearch(puzzle_size=puzzle_size)
+    givens = grid.reshape(-1).copy()
+    cells = [1 << (number - 1) for number in givens.tolist()]
+    max_grade = DIFFICULTIES.index(difficulty) if difficulty is not None else None
+
+    orbits = symmetry_orbits(puzzle_size=puzzle_size, symmetry=symmetry)
+    number_clues = givens.size
+    for index in rng.permutation(len(orbits)).tolist():
+        if clues is not None and number_clues <= clues:
+            break
+
+        orbit = orbits[index]
+        if max_grade is not None and max_grade < DIFFICULTIES.index("hard"):
+            # Deductions only succeed on unique puzzles, so no search is needed
+            candidate = givens.copy()
+            candidate[list(orbit)] = 0
+            puzzle = candidate.reshape(puzzle_size, puzzle_size)
+            if DIFFICULTIES.index(grade(givens=puzzle)) > max_grade:
+                continue
+        elif not keeps_unique(
+            engine=engine, cells=cells, removed=orbit, max_nodes=max_nodes
+        ):
+            continue
+
+        givens[list(orbit)] = 0
+        for cell in orbit:
+            cells[cell] = engine.full_mask
+        number_clues -= len(orbit)
+
+    logger.debug(f"Removed clues down to {number_clues} in {engine.nodes} nodes")
+
+    return givens.reshape(puzzle_size, puzzle_size)
+
+
+def generate_puzzle(
+    puzzle_size: int,
+    rng: np.random.Generator,
+    clues: int | None = None,
+    symmetry: str = "none",
+    difficulty: str | None = None,
+    attempts: int = 10,
+) -> np.ndarray | None:
+    """This function generates a unique puzzle that meets the targets.
+
+    An attempt fails if the clues cannot be reduced to `clues`, or if the puzzle
+    should be "hard" but deductions close it. Every attempt starts from a new grid.
+
+    Args:
+        puzzle_size: The size of the puzzle, i.e. "n".
+        rng: The random generator.
+        clues: The maximum number of clues. None for as few as possible.
+        symmetry: One of `SYMMETRIES`.
+        difficulty: One of `DIFFICULTIES`, or None for any.
+        attempts: The number of grids tried before giving up.
+
+    Returns:
+        The (n, n) givens, where empty cells are 0, or None if every attempt failed.
+    """
+
+    check_targets(symmetry=symmetry, difficulty=difficulty)
+
+    for attempt in range(attempts):
+        grid = random_grid(puzzle_size=puzzle_size, rng=rng)
+        givens = remove_clues(
+            grid=grid, rng=rng, clues=clues, symmetry=symmetry, difficulty=difficulty
+        )
+
+        number_clues = int(np.count_nonzero(givens))
+        if clues is not None and number_clues > clues:
+            logger.info(f"Attempt {attempt + 1} stopped at {number_clues} clues")
+            continue
+        if difficulty is not None and grade(givens=givens) != difficulty:
+            logger.info(f"Attempt {attempt + 1} missed the difficulty {difficulty}")
+            continue
+
+        return givens
+
+    logger.warning(f"No {puzzle_size}x{puzzle_size} puzzle after {attempts} attempts")
+    return None
+
+
+def generate_chunk(
+    puzzle_size: int,
+    seed: int,
+    indices: range,
+    clues: int | None = None,
+    symmetry: str = "none",
+    difficulty: str | None = None,
+) -> np.ndarray:
+    """This function generates the puzzles with the given indices in a worker process.
+
+    Returns:
+        An (M, n, n) array of the puzzles that met the targets, in index order.
+    """
+
+    puzzles = []
+    for index in indices:
+        rng = np.random.default_rng([seed, puzzle_size, index])
+        givens = generate_puzzle(
+            puzzle_size=puzzle_size,
+            rng=rng,
+            clues=clues,
+            symmetry=symmetry,
+            difficulty=difficulty,
+        )
+        if givens is not None:
+            puzzles.append(givens)
+
+    if not puzzles:
+        return np.empty((0, puzzle_size, puzzle_size), dtype=np.uint8)
+
+    return np.stack(puzzles)
+
+
+def generate_stream(
+    puzzle_size: int,
+    count: int,
+    seed: int = 0,
+    workers: int = 1,
+    chunk_size: int = 16,
+    clues: int | None = None,
+    symmetry: str = "none",
+    difficulty: str | None = None,
+) -> Iterator[np.ndarray]:
+    """This function yields chunks of generated puzzles in index order.
+
+    Like `gsolver.cli.solve_stream`, at most two chunks per worker are in flight.
+    Puzzles that miss the targets are left out, so fewer than `count` puzzles may be
+    yielded.
+    """
+
+    check_targets(symmetry=symmetry, difficulty=difficulty)
+
+    chunks = (
+        range(start, min(start + chunk_size, count))
+        for start in range(0, count, chunk_size)
+    )
+    targets = (clues, symmetry, difficulty)
+    if workers <= 1:
+        for indices in chunks:
+            yield generate_chunk(puzzle_size, seed, indices, *targets)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for indices in chunks:
+            pending.append(
+                executor.submit(generate_chunk, puzzle_size, seed, indices, *targets)
+            )
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,187 @@
+"""This module contains the difficulty grader.
+
+`number_iterations` counts propagation sweeps, which says little about how hard a
+puzzle is for a human: a long chain of singles is easy, a single X-Wing is not. The
+grader instead runs the puzzles through the techniques in order of cost, i.e. naked
+and hidden singles, then the strategies of `gsolver.strategies` in the order of
+`DEFAULT_STRATEGIES`, going back to the singles whenever a strategy made progress, and
+finally search where every technique stalls. It records per puzzle
+
+- how often every technique made progress,
+- the number of search nodes and the deepest level of the search tree.
+
+The grade is the weight of the hardest technique that was needed, see `WEIGHTS`, plus
+up to 0.9 for how often techniques beyond the singles were needed (0.05 per use), or
+for searches, for how deep the search went (0.1 per level). The weights are 1.0
+apart, more than `MAX_EXTRA`, so the integer part of the grade is the weight of the
+hardest technique and sorting by grade sorts by the hardest technique first.
+
+Grading is vectorized like `gsolver.batch.solve_batch`: every technique runs over all
+boards of a chunk at once, and only boards that need search are handled one by one.
+"""
+
+import logging
+
+import numpy as np
+
+from .batch import (
+    CONTRADICTION,
+    PARTIAL,
+    SOLVED,
+    STATUS_NAMES,
+    givens_to_bitmask,
+    propagate_batch,
+)
+from .search import BacktrackingSearch
+from .strategies import DEFAULT_STRATEGIES, check_strategies
+from .tables import Layout
+
+logger = logging.getLogger(__name__)
+
+# The grade of every technique when it is the hardest one a puzzle needs, 1.0 apart so
+# the extra of `MAX_EXTRA` never reaches the next technique
+WEIGHTS = {
+    "singles": 1.0,
+    "pointing": 2.0,
+    "box_line": 3.0,
+    "naked_pair": 4.0,
+    "hidden_pair": 5.0,
+    "naked_triple": 6.0,
+    "hidden_triple": 7.0,
+    "x_wing": 8.0,
+    "swordfish": 9.0,
+    "search": 10.0,
+}
+USE_WEIGHT = 0.05
+DEPTH_WEIGHT = 0.1
+MAX_EXTRA = 0.9
+
+
+class Grades:
+    """This class represents the grades and breakdowns of a batch of puzzles.
+
+    Attributes:
+        techniques: The names of the techniques, i.e. "singles" and the strategies.
+        uses: An (N, len(techniques)) array with how often every technique made
+            progress on every puzzle.
+        nodes: An (N,) array with the number of search nodes of every puzzle.
+        depths: An (N,) array with the deepest search level of every puzzle.
+        status: An (N,) array with the status of every puzzle, see `STATUS_NAMES`.
+        grades: An (N,) array with the grade of every puzzle. NaN for puzzles
+            without a solution.
+    """
+
+    def __init__(
+        self,
+        techniques: tuple[str, ...],
+        uses: np.ndarray,
+        nodes: np.ndarray,
+        depths: np.ndarray,
+        status: np.ndarray,
+    ):
+        self.techniques = techniques
+        self.uses = uses
+        self.nodes = nodes
+        self.depths = depths
+        self.status = status
+        self.grades = self.compute_grades()
+
+    def __len__(self) -> int:
+        return self.status.size
+
+    def compute_grades(self) -> np.ndarray:
+        """This function computes the grade of every puzzle from its breakdown."""
+
+        weights = np.array([WEIGHTS[technique] for technique in self.techniques])
+        searched = self.nodes > 0
+
+        # 1. The weight of the hardest technique, or of search
+        hardest = np.max(np.where(self.uses > 0, weights, 0.0), axis=-1)
+        hardest = np.where(searched, WEIGHTS["search"], hardest)
+
+        # 2. How often techniques beyond the singles, or how deep search, was needed
+        extra = np.where(
+            searched,
+            DEPTH_WEIGHT * self.depths,
+            USE_WEIGHT * self.uses[:, 1:].sum(axis=-1),
+        )
+
+        grades = hardest + np.minimum(extra, MAX_EXTRA)
+        return np.where(self.status == CONTRADICTION, np.nan, grades)
+
+    def breakdown(self, index: int) -> dict:
+        """This function returns the grade and breakdown of a puzzle as a dict."""
+
+        grade = float(self.grades[index])
+        return {
+            "grade": None if np.isnan(grade) else round(grade, 2),
+            "status": STATUS_NAMES[self.status[index]],
+            "techniques": {
+                technique: int(count)
+                for technique, count in zip(self.techniques, self.uses[index])
+                if count
+            },
+            "search": {
+                "nodes": int(self.nodes[index]),
+                "depth": int(self.depths[index]),
+            },
+        }
+
+
+def grade_batch(
+    puzzles: np.ndarray,
+    strategies: tuple[str, ...] = DEFAULT_STRATEGIES,
+    chunk_size: int = 4096,
+    layout: Layout | None = None,
+) -> Grades:
+    """This function grades a batch of sudoku puzzles.
+
+    Args:
+        puzzles: An (N, n, n) integer array of givens where empty cells are 0.
+        strategies: The strategies tried where the singles stall, in order of cost.
+        chunk_size: The number of boards propagated together.
+        layout: The blocks and extra units of a sudoku variant, see
+            `gsolver.tables.Layout`. None for the standard rows, columns and blocks.
+
+    Returns:
+        The grades and breakdowns of the puzzles.
+    """
+
+    check_strategies(strategies=strategies)
+
+    puzzles = np.asarray(puzzles)
+    puzzle_size = puzzles.shape[-1]
+    techniques = ("singles",) + tuple(strategies)
+
+    cells = givens_to_bitmask(givens=puzzles)
+    uses = np.zeros((puzzles.shape[0], len(techniques)), dtype=np.int32)
+    status = np.empty(puzzles.shape[0], dtype=np.uint8)
+
+    # 1. Deduce as far as the techniques go, on all boards of a chunk at once
+    for start_index in range(0, puzzles.shape[0], chunk_size):
+        chunk = slice(start_index, start_index + chunk_size)
+        chunk_uses = uses[chunk]
+        status[chunk] = propagate_batch(
+            cells=cells[chunk],
+            puzzle_size=puzzle_size,
+            strategies=strategies,
+            uses=chunk_uses,
+            layout=layout,
+        )
+
+    # 2. Search the boards where every technique stalled
+    nodes = np.zeros(puzzles.shape[0], dtype=np.int64)
+    depths = np.zeros(puzzles.shape[0], dtype=np.int32)
+    for index in np.flatnonzero(status == PARTIAL):
+        engine = BacktrackingSearch(puzzle_size=puzzle_size, layout=layout)
+        solution = next(engine.solutions(cells=cells[index].tolist()), None)
+        nodes[index], depths[index] = engine.nodes, engine.max_depth
+        status[index] = CONTRADICTION if solution is None else SOLVED
+
+    logger.info(
+        f"Graded {puzzles.shape[0]} puzzles, {np.count_nonzero(nodes)} with search"
+    )
+
+    return Grades(
+        techniques=techniques, uses=uses, nodes=nodes, depths=depths, status=status
+    )
@@ -0,0 +1,115 @@
+"""This module contains the instrumentation hooks of the solver.
+
+A `Sudoku` takes an optional `SolverMetrics`. Without one (the default) the solver
+only checks `self.metrics is not None` per unit: nothing is timed, counted or
+formatted. With one attached, the solver records
+
+- the calls and eliminations of every strategy, e.g. "naked_single",
+- the time spent per phase, i.e. per unit group and in search,
+- the number of contradictions, during propagation and in search,
+
+and hands structured trace events to the attached sinks. A sink is any callable
+taking the event name and a dict of fields, which may hold whole matrices. Matrices
+are only formatted by sinks, e.g. `LoggingSink`, never by the solver itself:
+
+    metrics = SolverMetrics(sinks=[LoggingSink()])
+    sudoku = Sudoku(metrics=metrics)
+    sudoku.solve(matrix=sudoku.matrix)
+    metrics.as_dict()  # e.g. {"eliminations": {"naked_single": 412, ...}, ...}
+"""
+
+import logging
+from collections import Counter, defaultdict
+from typing import Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+TraceSink = Callable[[str, dict], None]
+
+
+class SolverMetrics:
+    """This class represents the counters and trace sinks attached to a solver."""
+
+    def __init__(self, sinks: Iterable[TraceSink] = ()):
+        self.sinks = list(sinks)
+        self.reset()
+
+    def reset(self):
+        """This function clears all counters, but keeps the sinks."""
+
+        self.strategy_calls = Counter()
+        self.eliminations = Counter()
+        self.phase_seconds = defaultdict(float)
+        self.phase_calls = Counter()
+        self.contradictions = 0
+        self.search_nodes = 0
+        self.search_contradictions = 0
+
+    @property
+    def tracing(self) -> bool:
+        """Whether any sink is attached, i.e. whether trace events are consumed."""
+        return bool(self.sinks)
+
+    def add_sink(self, sink: TraceSink):
+        """This function attaches a sink that receives every trace event."""
+        self.sinks.append(sink)
+
+    def record_strategy(self, strategy: str, eliminations: int):
+        """This function records one call of a strategy and the candidates it removed."""
+
+        self.strategy_calls[strategy] += 1
+        self.eliminations[strategy] += eliminations
+
+    def record_phase(self, phase: str, seconds: float):
+        """This function records the time spent in one phase, e.g. on the rows."""
+
+        self.phase_seconds[phase] += seconds
+        self.phase_calls[phase] += 1
+
+    def record_contradiction(self, **fields):
+        """This function records a contradiction found during propagation."""
+
+        self.contradictions += 1
+        if self.sinks:
+            self.trace("contradiction", **fields)
+
+    def record_search(self, nodes: int, contradictions: int):
+        """This function records the nodes and dead ends of a search."""
+
+        self.search_nodes += nodes
+        self.search_contradictions += contradictions
+
+    def trace(self, event: str, **fields):
+        """This function hands a trace event to every sink."""
+
+        for sink in self.sinks:
+            sink(event, fields)
+
+    def as_dict(self) -> dict[str, object]:
+        """This function returns the counters as plain types, e.g. to export them."""
+
+        return {
+            "strategy_calls": dict(self.strategy_calls),
+            "eliminations": dict(self.eliminations)
+            | {"total": sum(self.eliminations.values())},
+            "phase_seconds": dict(self.phase_seconds),
+            "phase_calls": dict(self.phase_calls),
+            "contradictions": self.contradictions,
+            "search_nodes": self.search_nodes,
+            "search_contradictions": self.search_contradictions,
+        }
+
+
+class LoggingSink:
+    """This class represents a trace sink that writes trace events to a logger."""
+
+    def __init__(self, logger: logging.Logger = logger, level: int = logging.DEBUG):
+        self.logger = logger
+        self.level = level
+
+    def __call__(self, event: str, fields: dict):
+        if not self.logger.isEnabledFor(self.level):
+            return
+
+        message = "\n".join(f"{key} = {value}" for key, value in fields.items())
+        self.logger.log(self.level, f"{event}:\n{message}")
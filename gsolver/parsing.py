@@ -0,0 +1,458 @@
+"""This module contains code to read sudoku puzzles from text.
+
+Two formats are understood and can be mixed in one stream:
+
+- The boxed format of `gsolver/sudoku_puzzle.txt`, where rows start with "|", cells
+  are separated by "." or "|" and empty cells are blank. Cells may hold multi-digit
+  numbers, e.g. "10", or symbols, e.g. "A", for puzzles larger than 9x9.
+- One puzzle per line, with n * n symbols per line and "." or "0" for empty cells,
+  e.g. the common 81 character format for 9x9 puzzles.
+
+Lines starting with "#" are comments. Comments of the form "# name: value" describe
+the layout of a sudoku variant (see `read_layout`), e.g.
+
+    # variant: diagonal windoku
+    # blocks: 111222333111222333111222333444555666...
+    # unit: 1,1 2,2 3,3 4,4 5,5 6,6 7,7 8,8 9,9
+
+Symbols are decoded with a byte lookup table, so whole corpora in the one line format
+are parsed with a handful of vectorized NumPy operations by `read_puzzles`, straight
+into a preallocated (N, n, n) array of givens. `iter_puzzles` parses lazily instead,
+line by line, for streams of unknown size.
+"""
+
+import logging
+import math
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator
+
+import numpy as np
+
+from .bitmask import mask_dtype
+from .tables import Layout
+
+logger = logging.getLogger(__name__)
+
+# Numbers 1 to 61 are written as these symbols in the one line format
+SYMBOLS = "123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+BLANKS = ".0"
+INVALID = 255
+
+# Layout comments, e.g. "# variant: diagonal", see `read_layout`
+LAYOUT_PATTERN = re.compile(r"#\s*(variant|blocks|unit)\s*:(.*)")
+
+
+@lru_cache(maxsize=None)
+def symbol_table(symbols: str = SYMBOLS) -> np.ndarray:
+    """This function returns a lookup table from byte value to number.
+
+    Blanks decode to 0 and bytes that are not a symbol decode to `INVALID`.
+    """
+
+    table = np.full(256, INVALID, dtype=np.uint8)
+    for blank in BLANKS:
+        table[ord(blank)] = 0
+    for number, symbol in enumerate(symbols, start=1):
+        table[ord(symbol)] = number
+
+    table.flags.writeable = False
+    return table
+
+
+def is_square(number: int) -> bool:
+    """This function checks whether a number is a perfect square, e.g. a block size."""
+
+    return math.isqrt(number) ** 2 == number
+
+
+def decode_symbols(data: np.ndarray, symbols: str = SYMBOLS) -> np.ndarray:
+    """This function decodes an array of symbol bytes to numbers."""
+
+    numbers = symbol_table(symbols=symbols)[data]
+    if np.any(numbers == INVALID):
+        invalid = bytes(np.unique(data[numbers == INVALID])).decode(errors="replace")
+        raise ValueError(f"Invalid puzzle symbols {invalid!r}")
+
+    return numbers
+
+
+def parse_line(line: str, symbols: str = SYMBOLS) -> np.ndarray:
+    """This function parses a one line puzzle to a (n, n) array of givens."""
+
+    data = np.frombuffer(line.strip().encode(), dtype=np.uint8)
+    if not is_square(data.size):
+        raise ValueError(f"Puzzle line of length {data.size} is not a square")
+    puzzle_size = math.isqrt(data.size)
+    if not is_square(puzzle_size):
+        raise ValueError(f"Puzzle line of size {puzzle_size} is not a square size")
+
+    numbers = decode_symbols(data=data, symbols=symbols)
+    if np.any(numbers > puzzle_size):
+        raise ValueError(f"Puzzle line has numbers larger than {puzzle_size}")
+
+    return numbers.reshape(puzzle_size, puzzle_size)
+
+
+def parse_board(board) -> np.ndarray:
+    """This function parses a board given as a one line string or nested lists.
+
+    Raises:
+        ValueError: If the board is empty, not a square of a square size, holds
+            invalid numbers or is too large for the solvers, see
+            `gsolver.bitmask.mask_dtype`.
+    """
+
+    if isinstance(board, str):
+        givens = parse_line(line=board)
+    else:
+        givens = np.asarray(board)
+        if givens.ndim != 2 or givens.shape[0] != givens.shape[1]:
+            raise ValueError("Board is not a square")
+        if not np.issubdtype(givens.dtype, np.integer):
+            raise ValueError("Board must hold integers")
+        if np.any(givens < 0) or np.any(givens > givens.shape[0]):
+            raise ValueError(f"Board numbers must be between 0 and {givens.shape[0]}")
+        if not is_square(givens.shape[0]):
+            raise ValueError("Board size must be a square number")
+
+    if givens.size == 0:
+        raise ValueError("Board is empty")
+    mask_dtype(puzzle_size=givens.shape[0])
+
+    return givens.astype(np.uint8)
+
+
+def parse_layout(spec: dict, puzzle_size: int) -> Layout | None:
+    """This function parses the layout of a sudoku variant given as JSON.
+
+    Args:
+        spec: The "variants" by name (see `gsolver.tables.VARIANTS`), the "blocks" as
+            the region of every cell from 1 to n, in the one line format or as nested
+            lists, and further "units" as lists of [row, column] cells counted from 1.
+            Every entry is optional. Every region and unit must have exactly n cells,
+            i.e. hold every number once, as partial all-different units, e.g. the
+            cages of killer sudoku, would break hidden singles and the searches.
+        puzzle_size: The size of the puzzles of the layout, i.e. "n".
+
+    Returns:
+        The layout, or None for the standard rows, columns and blocks, also if the
+        blocks are just the square blocks.
+    """
+
+    unknown = set(spec) - {"variants", "blocks", "units"}
+    if unknown:
+        raise ValueError(f"Unknown layout entries {sorted(unknown)}")
+
+    blocks = spec.get("blocks")
+    if blocks is not None:
+        regions = parse_board(blocks)
+        if regions.shape != (puzzle_size, puzzle_size) or np.any(regions == 0):
+            raise ValueError(f"Blocks must number every cell from 1 to {puzzle_size}")
+        blocks = tuple((regions.reshape(-1) - 1).tolist())
+
+    units = []
+    for unit in spec.get("units", ()):
+        cells = np.asarray(unit)
+        if cells.ndim != 2 or cells.shape[1] != 2:
+            raise ValueError(f"Unit {unit} is not a list of [row, column] cells")
+        if np.any(cells < 1) or np.any(cells > puzzle_size):
+            raise ValueError(f"Unit {unit} has cells outside of the board")
+        flat_cells = (cells[:, 0] - 1) * puzzle_size + cells[:, 1] - 1
+        units.append(tuple(flat_cells.tolist()))
+
+    layout = Layout.from_variants(
+        puzzle_size=puzzle_size,
+        variants=tuple(spec.get("variants", ())),
+        blocks=blocks,
+        extra_units=tuple(units),
+    )
+    return None if layout.is_standard else layout
+
+
+def read_layout(lines: Iterable[str]) -> dict:
+    """This function reads the layout comments of a puzzle file, see `parse_layout`.
+
+    "# variant:" names variants, "# blocks:" gives the region of every cell in the one
+    line format, and every "# unit:" adds a unit of "row,column" cells. Other lines are
+    ignored.
+
+    Returns:
+        The layout spec for `parse_layout`, empty for the standard layout.
+    """
+
+    spec = {}
+    for line in lines:
+        match = LAYOUT_PATTERN.match(line.strip())
+        if match is None:
+            continue
+
+        name, value = match.group(1), match.group(2).split()
+        if name == "variant":
+            spec.setdefault("variants", []).extend(value)
+        elif name == "blocks":
+            spec["blocks"] = "".join(value)
+        else:
+            unit = [[int(number) for number in cell.split(",")] for cell in value]
+            spec.setdefault("units", []).append(unit)
+
+    return spec
+
+
+def parse_boxed_row(
+    line: str, symbols: str = SYMBOLS, puzzle_size: int | None = None
+) -> list[int]:
+    """This function parses a row of the boxed format, e.g. "| .6. | .9. |3. . |".
+
+    Args:
+        line: The row.
+        symbols: The symbols of the numbers beyond 9.
+        puzzle_size: The number of cells of the rows before, if any. The first row of
+            a puzzle sets the size, which must be a square number.
+
+    Raises:
+        ValueError: If a cell is not a symbol, the row does not have `puzzle_size`
+            cells, or a number is larger than the size.
+    """
+
+    numbers = []
+    for cell in line.strip().strip("|").replace("|", ".").split("."):
+        cell = cell.strip()
+        if not cell:
+            numbers.append(0)
+        elif cell.isdigit():
+            numbers.append(int(cell))
+        elif len(cell) == 1 and cell in symbols:
+            numbers.append(symbols.index(cell) + 1)
+        else:
+            raise ValueError(f"Invalid boxed cell {cell!r}")
+
+    if puzzle_size is None:
+        puzzle_size = len(numbers)
+        if not is_square(puzzle_size):
+            raise ValueError(f"Boxed row of {puzzle_size} cells is not a square size")
+    elif len(numbers) != puzzle_size:
+        raise ValueError(f"Boxed row has {len(numbers)} cells, not {puzzle_size}")
+
+    if max(numbers) > puzzle_size:
+        raise ValueError(f"Boxed row has numbers larger than {puzzle_size}")
+
+    return numbers
+
+
+def iter_puzzles(
+    lines: Iterable[str], symbols: str = SYMBOLS
+) -> Iterator[np.ndarray]:
+    """This function yields the (n, n) givens of every puzzle in a stream of lines.
+
+    Lines are consumed lazily, so the stream can be arbitrarily large. A boxed puzzle
+    with an invalid row is skipped up to the next empty or comment line.
+    """
+
+    rows = []
+    skipping = False
+    for line_number, line in enumerate(lines, start=1):
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            skipping = False
+            continue
+
+        if stripped.startswith("|"):
+            if skipping:
+                continue
+
+            try:
+                row = parse_boxed_row(
+                    line=stripped,
+                    symbols=symbols,
+                    puzzle_size=len(rows[0]) if rows else None,
+                )
+            except ValueError as error:
+                logger.error(f"Skipping boxed puzzle at line {line_number}: {error}")
+                rows = []
+                skipping = True
+                continue
+
+            rows.append(row)
+
+            if len(rows) == len(rows[0]):
+                yield np.array(rows, dtype=np.uint8)
+                rows = []
+            continue
+
+        if stripped.startswith("+"):
+            continue
+
+        try:
+            yield parse_line(line=stripped, symbols=symbols)
+        except ValueError as error:
+            logger.error(f"Skipping line {line_number}: {error}")
+
+    if rows:
+        logger.error(f"Skipping incomplete boxed puzzle with {len(rows)} rows")
+
+
+def parse_lines(data: bytes, symbols: str = SYMBOLS) -> np.ndarray | None:
+    """This function parses a corpus in the one line format to an (N, n, n) array.
+
+    All lines must have the same length, except for an optional carriage return and a
+    missing newline at the end of the data. Returns None if the data is in any other
+    format, e.g. boxed puzzles or comments.
+    """
+
+    if data and not data.endswith(b"\n"):
+        data += b"\r\n" if b"\r\n" in data else b"\n"
+
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    newlines = np.flatnonzero(buffer == ord("\n"))
+    if newlines.size == 0:
+        return np.empty((0, 0, 0), dtype=np.uint8)
+
+    # Every line, including its newline, must span the same number of bytes
+    line_length = int(newlines[0]) + 1
+    if buffer.size % line_length or np.any(np.diff(newlines) != line_length):
+        return None
+
+    lines = buffer.reshape(-1, line_length)[:, :-1]
+    if lines.shape[1] and np.all(lines[:, -1] == ord("\r")):
+        lines = lines[:, :-1]
+
+    puzzle_size = math.isqrt(lines.shape[1])
+    if puzzle_size == 0 or not is_square(lines.shape[1]) or not is_square(puzzle_size):
+        return None
+
+    try:
+        givens = decode_symbols(data=lines, symbols=symbols)
+    except ValueError:
+        return None
+
+    if np.any(givens > puzzle_size):
+        return None
+
+    return givens.reshape(-1, puzzle_size, puzzle_size)
+
+
+def read_puzzles(source: str | Path | BinaryIO, symbols: str = SYMBOLS) -> np.ndarray:
+    """This function reads every puzzle of a file or binary stream at once.
+
+    Corpora in the one line format are decoded in bulk by `parse_lines`, anything else
+    falls back to `iter_puzzles`. All puzzles must have the same size.
+
+    Returns:
+        An (N, n, n) array of givens where empty cells are 0.
+    """
+
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as file:
+            data = file.read()
+    else:
+        data = source.read()
+
+    givens = parse_lines(data=data, symbols=symbols)
+    if givens is not None:
+        return givens
+
+    puzzles = list(iter_puzzles(lines=data.decode().splitlines(), symbols=symbols))
+    if not puzzles:
+        return np.empty((0, 0, 0), dtype=np.uint8)
+
+    return np.stack(puzzles)
+
+
+@lru_cache(maxsize=None)
+def symbol_bytes(symbols: str = SYMBOLS) -> np.ndarray:
+    """This function returns a lookup table from number to symbol byte, "." for 0."""
+
+    table = np.frombuffer(("." + symbols).encode(), dtype=np.uint8).copy()
+    table.flags.writeable = False
+    return table
+
+
+def encode_lines(boards: np.ndarray, symbols: str = SYMBOLS) -> np.ndarray:
+    """This function encodes an (N, n, n) array of numbers in the one line format.
+
+    Returns:
+        An (N, n * n) array of symbol bytes, without newlines.
+    """
+
+    boards = np.asarray(boards)
+    return symbol_bytes(symbols=symbols)[boards.reshape(boards.shape[0], -1)]
+
+
+@lru_cache(maxsize=None)
+def boxed_layout(puzzle_size: int) -> tuple[np.ndarray, np.ndarray]:
+    """This function returns the template of an empty boxed board and its digit offsets.
+
+    Returns:
+        The bytes of an empty board, every line ending in a newline, and an
+        (n * n, width) array with the offset of every digit of every cell.
+    """
+
+    sqrt_puzzle_size = int(np.sqrt(puzzle_size))
+    width = len(str(puzzle_size))
+
+    block_width = sqrt_puzzle_size * (width + 1) - 1
+    border = "+" + "+".join(["-" * block_width] * sqrt_puzzle_size) + "+\n"
+    blocks = [".".join([" " * width] * sqrt_puzzle_size)] * sqrt_puzzle_size
+    row = "|" + "|".join(blocks) + "|\n"
+
+    lines = [border]
+    for _ in range(sqrt_puzzle_size):
+        lines += [row] * sqrt_puzzle_size + [border]
+    template = np.frombuffer("".join(lines).encode(), dtype=np.uint8).copy()
+
+    # Cell (r, c) starts after the "|" of line 1 + r + r // s, in column c
+    rows, columns = np.divmod(np.arange(puzzle_size * puzzle_size), puzzle_size)
+    line_starts = (1 + rows + rows // sqrt_puzzle_size) * len(row)
+    cell_starts = line_starts + 1 + columns * (width + 1)
+    offsets = cell_starts[:, None] + np.arange(width)
+
+    template.flags.writeable = False
+    offsets.flags.writeable = False
+    return template, offsets
+
+
+def encode_boxed(boards: np.ndarray) -> np.ndarray:
+    """This function encodes an (N, n, n) array of numbers in the boxed format.
+
+    Numbers are written as digits, right aligned to the width of the largest number,
+    and empty cells are blank, so every board has the same number of bytes.
+
+    Returns:
+        An (N, board bytes) array with the text of every board.
+    """
+
+    boards = np.asarray(boards)
+    puzzle_size = boards.shape[-1]
+    template, offsets = boxed_layout(puzzle_size=puzzle_size)
+    numbers = boards.reshape(boards.shape[0], -1, 1).astype(np.int64)
+
+    # Digit k of a number counts 10 ** (width - 1 - k), blank while above the number
+    places = 10 ** np.arange(offsets.shape[1] - 1, -1, -1)
+    digits = np.where(
+        numbers >= places, ord("0") + (numbers // places) % 10, ord(" ")
+    ).astype(np.uint8)
+
+    text = np.repeat(template[None], boards.shape[0], axis=0)
+    text[:, offsets.reshape(-1)] = digits.reshape(boards.shape[0], -1)
+    return text
+
+
+def format_line(solution: np.ndarray, symbols: str = SYMBOLS) -> str:
+    """This function formats a (n, n) array of numbers as a one line puzzle.
+
+    Unsolved cells, i.e. 0, are written as ".".
+    """
+
+    return encode_lines(boards=solution[None], symbols=symbols).tobytes().decode()
+
+
+def format_boxed(givens: np.ndarray) -> str:
+    """This function formats a (n, n) array of numbers in the boxed format.
+
+    Numbers are written as digits, padded to the width of the largest number, and
+    empty cells are blank, e.g. "| .6. | .9. |3. . |" for a row of a 9x9 puzzle.
+    """
+
+    return encode_boxed(boards=givens[None]).tobytes().decode().rstrip("\n")
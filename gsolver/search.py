@@ -0,0 +1,531 @@
+"""This module contains code to search for sudoku solutions where propagation stalls.
+
+Two complete search engines are provided, both starting from a (partially) propagated
+board given as a flat list of cell bitmasks (see `gsolver.bitmask`):
+
+- `BacktrackingSearch` branches on the cell with the minimum remaining values, and
+  propagates naked and hidden singles after every guess. A branch fails as soon as a
+  cell has no possible solution left or a number has no place left in a unit.
+- `ExactCoverSearch` solves the puzzle as an exact cover problem with Algorithm X.
+
+The search runs on plain Python integers rather than NumPy arrays, since every node only
+touches a handful of cells and the per-call overhead of NumPy would dominate.
+
+`count_solutions` counts solutions up to a limit without building solution boards, and
+can split the top levels of the backtracking search tree across worker processes.
+"""
+
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from itertools import islice
+
+import numpy as np
+
+from . import bitmask
+from .metrics import SolverMetrics
+from .tables import Layout, get_tables
+
+logger = logging.getLogger(__name__)
+
+
+class BacktrackingSearch:
+    """This class represents a depth first search with constraint propagation."""
+
+    def __init__(self, puzzle_size: int, layout: Layout | None = None):
+        self.puzzle_size = puzzle_size
+        self.layout = layout
+        self.full_mask = bitmask.full_mask(puzzle_size)
+        tables = get_tables(puzzle_size=puzzle_size, layout=layout)
+        self.units, self.peers = tables.unit_lists, tables.peer_lists
+
+        # Cell units as unit numbers, i.e. rows first, then columns, then blocks
+        self.cell_units = tables.cell_unit_lists
+
+        self.nodes = 0
+        self.contradictions = 0
+        self.max_depth = 0
+
+    def propagate(
+        self,
+        cells: list[int],
+        solved_cells: list[int],
+        dirty_units: set[int] | None = None,
+    ) -> bool:
+        """This function propagates naked and hidden singles in place.
+
+        Hidden singles are only looked for in the units of cells that changed, so
+        the cost of a node grows with the number of changed cells rather than with
+        the size of the board.
+
+        Args:
+            cells: The flat list of cell bitmasks.
+            solved_cells: The cells that were solved since the last propagation.
+            dirty_units: The units to look for hidden singles in, besides the units
+                of changed cells. None for every unit.
+
+        Returns:
+            False if the board has a contradiction, True otherwise.
+        """
+
+        peers, cell_units = self.peers, self.cell_units
+        if dirty_units is None:
+            dirty_units = set(range(len(self.units)))
+
+        while True:
+            # 1. Remove solved numbers from the peers of newly solved cells
+            while solved_cells:
+                cell = solved_cells.pop()
+                dirty_units.update(cell_units[cell])
+                number = cells[cell]
+                for peer in peers[cell]:
+                    if cells[peer] & number:
+                        remaining = cells[peer] & ~number
+                        if not remaining:
+                            return False
+
+                        cells[peer] = remaining
+                        dirty_units.update(cell_units[peer])
+                        if not remaining & (remaining - 1):
+                            solved_cells.append(peer)
+
+            # 2. Solve numbers that only appear once in a changed unit
+            unit_indices, dirty_units = dirty_units, set()
+            for unit_index in unit_indices:
+                unit = self.units[unit_index]
+                once = twice = 0
+                for cell in unit:
+                    twice |= once & cells[cell]
+                    once |= cells[cell]
+
+                if once != self.full_mask:
+                    return False
+
+                single_appearance_solutions = once & ~twice
+                if not single_appearance_solutions:
+                    continue
+
+                for cell in unit:
+                    number = cells[cell] & single_appearance_solutions
+                    if number and cells[cell] != number:
+                        if number & (number - 1):
+                            return False
+
+                        cells[cell] = number
+                        solved_cells.append(cell)
+
+            if not solved_cells:
+                return True
+
+    def select_cell(self, cells: list[int]) -> int | None:
+        """This function returns the unsolved cell with the fewest candidates."""
+
+        best_cell = None
+        best_count = self.puzzle_size + 1
+        for cell, value in enumerate(cells):
+            if value & (value - 1):
+                count = value.bit_count()
+                if count < best_count:
+                    best_cell, best_count = cell, count
+                    if count == 2:
+                        break
+
+        return best_cell
+
+    def solutions(self, cells: list[int], max_nodes: int | None = None):
+        """This function yields every solution reachable from the given cells.
+
+        The search gives up after `max_nodes` nodes if given, e.g. to restart from a
+        different state instead of getting stuck in the heavy tail of hard searches.
+        """
+
+        node_limit = None if max_nodes is None else self.nodes + max_nodes
+        solved_cells = [
+            cell for cell, value in enumerate(cells) if not value & (value - 1)
+        ]
+        stack = [(list(cells), solved_cells, None, 0)]
+        while stack:
+            if node_limit is not None and self.nodes >= node_limit:
+                return
+
+            cells, solved_cells, dirty_units, depth = stack.pop()
+            self.nodes += 1
+            self.max_depth = max(self.max_depth, depth)
+
+            if not self.propagate(
+                cells=cells, solved_cells=solved_cells, dirty_units=dirty_units
+            ):
+                self.contradictions += 1
+                continue
+
+            cell = self.select_cell(cells=cells)
+            if cell is None:
+                yield cells
+                continue
+
+            value = cells[cell]
+            while value:
+                number = value & -value
+                value ^= number
+
+                branch = list(cells)
+                branch[cell] = number
+                stack.append((branch, [cell], set(), depth + 1))
+
+    def count(self, cells: list[int], limit: int | None = None) -> int:
+        """This function counts the solutions reachable from the given cells.
+
+        The search stops once `limit` solutions are found, if given.
+        """
+        return sum(1 for _ in islice(self.solutions(cells=cells), limit))
+
+    def split(self, cells: list[int], branches: int) -> tuple[list[list[int]], int]:
+        """This function expands the top levels of the search tree breadth first.
+
+        Nodes are expanded until there are at least `branches` open nodes, or none are
+        left. Every solution is reachable from exactly one of the open nodes, unless it
+        was already found while splitting.
+
+        Returns:
+            The cells of the open nodes and the number of solutions found.
+        """
+
+        solved_cells = [
+            cell for cell, value in enumerate(cells) if not value & (value - 1)
+        ]
+        frontier = deque([(list(cells), solved_cells, None)])
+        solutions = 0
+        while frontier and len(frontier) < branches:
+            cells, solved_cells, dirty_units = frontier.popleft()
+            self.nodes += 1
+
+            if not self.propagate(
+                cells=cells, solved_cells=solved_cells, dirty_units=dirty_units
+            ):
+                self.contradictions += 1
+                continue
+
+            cell = self.select_cell(cells=cells)
+            if cell is None:
+                solutions += 1
+                continue
+
+            value = cells[cell]
+            while value:
+                number = value & -value
+                value ^= number
+
+                branch = list(cells)
+                branch[cell] = number
+                frontier.append((branch, [cell], set()))
+
+        return [cells for cells, _, _ in frontier], solutions
+
+
+class ExactCoverSearch:
+    """This class represents an Algorithm X search over the sudoku exact cover matrix.
+
+    Every candidate (row, column, number) covers its cell and the number in every unit
+    of the cell, i.e. four constraints with the standard row, column and block.
+    """
+
+    def __init__(self, puzzle_size: int, layout: Layout | None = None):
+        self.puzzle_size = puzzle_size
+        self.layout = layout
+        self.units = get_tables(puzzle_size=puzzle_size, layout=layout).unit_lists
+        self.candidate_constraints = self.get_candidate_constraints(
+            puzzle_size=puzzle_size, layout=layout
+        )
+
+        self.nodes = 0
+        self.contradictions = 0
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def get_candidate_constraints(
+        puzzle_size: int, layout: Layout | None = None
+    ) -> tuple[tuple[int, ...], ...]:
+        """This function returns the constraint columns covered by every candidate.
+
+        Candidates are numbered `cell * n + number - 1`, constraints are numbered
+        `cell` for the cells and `n * n + unit * n + number - 1` for the units.
+        """
+
+        tables = get_tables(puzzle_size=puzzle_size, layout=layout)
+
+        # Cell units as unit numbers, i.e. rows first, then columns, then blocks
+        cell_units = tables.cell_unit_lists
+
+        return tuple(
+            (cell,)
+            + tuple(
+                tables.number_cells + unit_index * puzzle_size + number
+                for unit_index in cell_units[cell]
+            )
+            for cell in range(tables.number_cells)
+            for number in range(puzzle_size)
+        )
+
+    def solutions(self, cells: list[int]):
+        """This function yields every solution reachable from the given cells."""
+
+        for candidates in self.covers(cells=cells):
+            solution = [0] * len(cells)
+            for candidate in candidates:
+                cell, number = divmod(candidate, self.puzzle_size)
+                solution[cell] = 1 << number
+
+            yield solution
+
+    def count(self, cells: list[int], limit: int | None = None) -> int:
+        """This function counts the solutions reachable from the given cells.
+
+        The search stops once `limit` solutions are found, if given.
+        """
+        return sum(1 for _ in islice(self.covers(cells=cells), limit))
+
+    def covers(self, cells: list[int]):
+        """This function yields the selected candidates of every solution."""
+
+        columns = {}
+        for cell, value in enumerate(cells):
+            for number in range(self.puzzle_size):
+                if value >> number & 1:
+                    candidate = cell * self.puzzle_size + number
+                    for column in self.candidate_constraints[candidate]:
+                        columns.setdefault(column, set()).add(candidate)
+
+        number_columns = (self.puzzle_size + len(self.units)) * self.puzzle_size
+        if len(columns) != number_columns:
+            self.contradictions += 1
+            return
+
+        selected = []
+        for cell, value in enumerate(cells):
+            if not value & (value - 1):
+                candidate = cell * self.puzzle_size + value.bit_length() - 1
+                if candidate not in columns[cell]:
+                    self.contradictions += 1
+                    return
+
+                self.select(columns=columns, candidate=candidate)
+                selected.append(candidate)
+
+        yield from self.algorithm_x(columns=columns, selected=selected)
+
+    def algorithm_x(self, columns: dict[int, set[int]], selected: list[int]):
+        """This function yields the selected candidates of every exact cover.
+
+        The search tree is walked with an explicit stack rather than recursion, as it
+        is one level deeper per empty cell, i.e. up to n * n levels. Every level holds
+        the candidates of its column left to try, and the candidate currently selected
+        with the columns it removed, which are restored before the next one.
+        """
+
+        self.nodes += 1
+        if not columns:
+            yield list(selected)
+            return
+
+        stack = [[self.branch_candidates(columns=columns), None, None]]
+        while stack:
+            level = stack[-1]
+            candidates, candidate, removed = level
+            if candidate is not None:
+                self.deselect(columns=columns, candidate=candidate, removed=removed)
+                selected.pop()
+                level[1] = level[2] = None
+
+            if not candidates:
+                stack.pop()
+                continue
+
+            candidate = candidates.pop()
+            selected.append(candidate)
+            level[1] = candidate
+            level[2] = self.select(columns=columns, candidate=candidate)
+
+            self.nodes += 1
+            if not columns:
+                yield list(selected)
+                continue
+
+            stack.append([self.branch_candidates(columns=columns), None, None])
+
+    def branch_candidates(self, columns: dict[int, set[int]]) -> list[int]:
+        """This function returns the candidates of the column with the fewest of them.
+
+        Ties go to the lowest column, i.e. cells before units, and the candidates are
+        sorted so popping them tries the largest number first, both like
+        `BacktrackingSearch`. Following the order of the dict and sets instead, which
+        changes as columns are restored, sends large boards into long searches. A
+        column without candidates is a contradiction, which leaves nothing to try.
+        """
+
+        column = min(columns, key=lambda column: (len(columns[column]), column))
+        if not columns[column]:
+            self.contradictions += 1
+        return sorted(columns[column])
+
+    def select(self, columns: dict[int, set[int]], candidate: int) -> list[set[int]]:
+        """This function covers the columns of a candidate and removes its conflicts."""
+
+        removed = []
+        for column in self.candidate_constraints[candidate]:
+            for conflict in columns[column]:
+                for other_column in self.candidate_constraints[conflict]:
+                    if other_column != column:
+                        columns[other_column].remove(conflict)
+
+            removed.append(columns.pop(column))
+
+        return removed
+
+    def deselect(
+        self, columns: dict[int, set[int]], candidate: int, removed: list[set[int]]
+    ):
+        """This function restores the columns removed by `select`."""
+
+        for column in reversed(self.candidate_constraints[candidate]):
+            columns[column] = removed.pop()
+            for conflict in columns[column]:
+                for other_column in self.candidate_constraints[conflict]:
+                    if other_column != column:
+                        columns[other_column].add(conflict)
+
+
+search_engines = {"backtrack": BacktrackingSearch, "exact_cover": ExactCoverSearch}
+
+
+def find_solution(
+    cells: np.ndarray,
+    search: str = "backtrack",
+    metrics: SolverMetrics | None = None,
+    layout: Layout | None = None,
+) -> np.ndarray | None:
+    """This function searches for the first solution of a (n, n) bitmask matrix.
+
+    Args:
+        cells: The (n, n) bitmask matrix, e.g. after propagation by `Sudoku.solve`.
+        search: The search engine to use, either "backtrack" or "exact_cover".
+        metrics: Records the searched nodes and contradictions if given.
+        layout: The blocks and extra units of a sudoku variant, see
+            `gsolver.tables.Layout`. None for the standard rows, columns and blocks.
+
+    Returns:
+        The solved (n, n) bitmask matrix, or None if the puzzle has no solution.
+    """
+
+    puzzle_size = cells.shape[0]
+    engine = search_engines[search](puzzle_size=puzzle_size, layout=layout)
+
+    solution = next(engine.solutions(cells=cells.reshape(-1).tolist()), None)
+    logger.info(
+        f"Searched {engine.nodes} nodes with {engine.contradictions} contradictions"
+    )
+    if metrics is not None:
+        metrics.record_search(nodes=engine.nodes, contradictions=engine.contradictions)
+    if solution is None:
+        return None
+
+    return np.array(solution, dtype=cells.dtype).reshape(cells.shape)
+
+
+def count_branch(
+    cells: list[int], puzzle_size: int, limit: int | None, layout: Layout | None
+) -> tuple[int, int, int]:
+    """This function counts the solutions of one branch in a worker process.
+
+    Returns:
+        The number of solutions, searched nodes and contradictions.
+    """
+
+    engine = BacktrackingSearch(puzzle_size=puzzle_size, layout=layout)
+    count = engine.count(cells=cells, limit=limit)
+    return count, engine.nodes, engine.contradictions
+
+
+def count_branches(
+    engine: BacktrackingSearch,
+    branches: list[list[int]],
+    limit: int | None,
+    workers: int,
+) -> int:
+    """This function counts the solutions of the branches of a split in worker processes.
+
+    Counting stops once `limit` solutions are found, without waiting for the branches
+    that are still running. Their nodes are left out of the counts of `engine`.
+    """
+
+    count = 0
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [
+            executor.submit(
+                count_branch, branch, engine.puzzle_size, limit, engine.layout
+            )
+            for branch in branches
+        ]
+        for future in as_completed(futures):
+            branch_count, nodes, contradictions = future.result()
+            count += branch_count
+            engine.nodes += nodes
+            engine.contradictions += contradictions
+            if limit is not None and count >= limit:
+                break
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return count
+
+
+def count_solutions(
+    cells: np.ndarray,
+    limit: int | None = 2,
+    search: str = "backtrack",
+    workers: int = 1,
+    metrics: SolverMetrics | None = None,
+    layout: Layout | None = None,
+) -> int:
+    """This function counts the solutions of a (n, n) bitmask matrix.
+
+    Only the number of solutions is kept, no solution boards are built.
+
+    Args:
+        cells: The (n, n) bitmask matrix, e.g. after propagation by `Sudoku.solve`.
+        limit: The search stops once this many solutions are found. None counts all.
+        search: The search engine to use, either "backtrack" or "exact_cover".
+        workers: If more than 1, the top levels of the backtracking search tree are
+            split into branches that are counted by this many worker processes.
+        metrics: Records the searched nodes and contradictions if given.
+        layout: The blocks and extra units of a sudoku variant, see `find_solution`.
+
+    Returns:
+        The number of solutions, at most `limit`.
+    """
+
+    puzzle_size = cells.shape[0]
+    engine = search_engines[search](puzzle_size=puzzle_size, layout=layout)
+    cells = cells.reshape(-1).tolist()
+
+    if workers <= 1 or search != "backtrack":
+        count = engine.count(cells=cells, limit=limit)
+    else:
+        branches, count = engine.split(cells=cells, branches=4 * workers)
+        if branches and (limit is None or count < limit):
+            count += count_branches(
+                engine=engine,
+                branches=branches,
+                limit=None if limit is None else limit - count,
+                workers=workers,
+            )
+
+    logger.info(
+        f"Counted {count} solutions in {engine.nodes} nodes with "
+        f"{engine.contradictions} contradictions"
+    )
+    if metrics is not None:
+        metrics.record_search(nodes=engine.nodes, contradictions=engine.contradictions)
+
+    return count if limit is None else min(count, limit)
@@ -0,0 +1,270 @@
+"""This module contains the higher-order deduction strategies of the solver.
+
+Naked and hidden singles (see `gsolver.bitmask`) close easy puzzles, but stall on hard
+ones. The strategies here remove further candidates:
+
+- naked_pair, naked_triple: k cells of a unit that only hold k numbers between them
+  remove these numbers from the other cells of the unit.
+- hidden_pair, hidden_triple: k numbers that only fit in the same k cells of a unit
+  remove every other number from these cells.
+- pointing: a number that only fits in the cells a block shares with a row or column
+  is removed from the rest of that row or column.
+- box_line: a number that only fits in the cells a row or column shares with a block
+  is removed from the rest of that block.
+- x_wing, swordfish: a number that only fits in the same k columns of k rows is
+  removed from the other rows of these columns, and the same with rows and columns
+  swapped.
+
+Extra units of variants (see `gsolver.tables.Layout`) count as blocks for pointing and
+box_line, and as units for the subsets. Fish only use rows and columns.
+
+Like the kernels of `gsolver.bitmask`, every strategy updates a flat array of cell
+bitmasks of shape (..., n * n) in place, on every unit of every board in one call.
+Subsets, hidden subsets and fish are all the same kernel, `eliminate_subsets`, applied to
+different views of the candidates: the numbers of the cells of a unit, the cells of
+the numbers of a unit, and the columns (or rows) of the rows (or columns) of a number.
+"""
+
+import itertools
+import logging
+from functools import lru_cache, partial
+
+import numpy as np
+
+from . import bitmask
+from .metrics import SolverMetrics
+from .tables import Layout, get_tables
+
+logger = logging.getLogger(__name__)
+
+# The number of array elements a subset kernel handles at once, to bound temporaries
+CHUNK_ELEMENTS = 1 << 22
+
+
+@lru_cache(maxsize=None)
+def subset_masks(puzzle_size: int, size: int) -> np.ndarray:
+    """This function returns every mask of `puzzle_size` bits with `size` bits set."""
+
+    dtype = bitmask.mask_dtype(puzzle_size)
+    masks = np.array(
+        [
+            sum(1 << bit for bit in bits)
+            for bits in itertools.combinations(range(puzzle_size), size)
+        ],
+        dtype=dtype,
+    )
+
+    masks.flags.writeable = False
+    return masks
+
+
+def eliminate_subsets(masks: np.ndarray, size: int):
+    """Remove the bits of every subset covering exactly `size` members from the others.
+
+    A subset is a mask with `size` bits set. If exactly `size` non-empty members of a
+    group only hold bits of the subset, these members use up all of its bits, so the
+    bits are removed from every other member of the group.
+
+    Args:
+        masks: The masks of shape (..., m) of the m members of every group, each
+            holding up to m bits. Updated in place.
+        size: The number of members and bits of the subsets, e.g. 2 for pairs.
+    """
+
+    subsets = subset_masks(puzzle_size=masks.shape[-1], size=size)
+    chunk_size = max(1, CHUNK_ELEMENTS // max(masks.size, 1))
+
+    nonempty = (masks != 0)[..., None]
+    removed = np.zeros_like(masks)
+    for start in range(0, subsets.size, chunk_size):
+        chunk = subsets[start : start + chunk_size]
+
+        # (..., m, k): whether the member only holds bits of the subset
+        inside = ((masks[..., None] & ~chunk) == 0) & nonempty
+        covered = np.sum(inside, axis=-2) == size
+
+        removed |= np.bitwise_or.reduce(
+            np.where(covered[..., None, :] & ~inside, chunk, 0), axis=-1
+        )
+
+    masks &= ~removed
+
+
+def transpose_bits(masks: np.ndarray) -> np.ndarray:
+    """This function swaps the members and bits of an array of (..., m) masks of m bits.
+
+    Bit `j` of member `i` becomes bit `i` of member `j`, e.g. the numbers of the cells
+    of a unit become the cells of the numbers of the unit.
+    """
+
+    shifts = np.arange(masks.shape[-1], dtype=masks.dtype)
+    bits = (masks[..., :, None] >> shifts) & masks.dtype.type(1)
+    return np.bitwise_or.reduce(bits << shifts[:, None], axis=-2)
+
+
+def naked_subsets(
+    cells: np.ndarray, puzzle_size: int, size: int, layout: Layout | None = None
+):
+    """This function removes the numbers of naked subsets from the rest of their unit."""
+
+    # Units of a group are disjoint, so a whole group is updated at once
+    for units in get_tables(puzzle_size=puzzle_size, layout=layout).units.values():
+        vectors = cells[..., units]
+        eliminate_subsets(masks=vectors, size=size)
+        cells[..., units] = vectors
+
+
+def hidden_subsets(
+    cells: np.ndarray, puzzle_size: int, size: int, layout: Layout | None = None
+):
+    """This function removes the other numbers from the cells of hidden subsets."""
+
+    for units in get_tables(puzzle_size=puzzle_size, layout=layout).units.values():
+        positions = transpose_bits(cells[..., units])
+        eliminate_subsets(masks=positions, size=size)
+        cells[..., units] = transpose_bits(positions)
+
+
+def fish(
+    cells: np.ndarray, puzzle_size: int, size: int, layout: Layout | None = None
+):
+    """This function removes numbers confined to `size` rows and columns, e.g. X-Wings.
+
+    The rows, then the columns, of every number are the members of a group, holding
+    the columns, or rows, where the number still fits as bits. Rows and columns are
+    the same in every layout, so the layout is not needed.
+    """
+
+    board = cells.reshape(cells.shape[:-1] + (puzzle_size, puzzle_size))
+    for lines in (board, np.swapaxes(board, -1, -2)):
+        # (..., n numbers, n lines): the cross lines of every number in every line
+        positions = np.swapaxes(transpose_bits(lines), -1, -2)
+        eliminate_subsets(masks=positions, size=size)
+        lines[...] = transpose_bits(np.swapaxes(positions, -1, -2))
+
+    cells[...] = board.reshape(cells.shape)
+
+
+def intersections(
+    cells: np.ndarray, puzzle_size: int, source: str, layout: Layout | None = None
+):
+    """This function removes numbers confined to the cells a block shares with a line.
+
+    With "block" as the `source`, a number that only fits in the shared cells of the
+    block is removed from the rest of the line (pointing pairs and triples). With
+    "line", a number that only fits in the shared cells of the line is removed from the
+    rest of the block (box-line reduction). Intersections are grouped by their number
+    of shared cells, which is the same for all of them with square blocks.
+    """
+
+    tables = get_tables(puzzle_size=puzzle_size, layout=layout)
+    flat_cells = cells.reshape(-1, cells.shape[-1])
+
+    # Targets of different intersections overlap, so removals are accumulated first
+    removed = np.zeros_like(flat_cells)
+    for shared_cells, line_rests, block_rests in tables.intersections:
+        if source == "block":
+            sources, targets = block_rests, line_rests
+        else:
+            sources, targets = line_rests, block_rests
+
+        shared = np.bitwise_or.reduce(flat_cells[:, shared_cells], axis=-1)
+        rest = np.bitwise_or.reduce(flat_cells[:, sources], axis=-1)
+        confined = shared & ~rest
+
+        values = np.broadcast_to(
+            confined[..., None], confined.shape + targets.shape[-1:]
+        )
+        np.bitwise_or.at(
+            removed,
+            (slice(None), targets.reshape(-1)),
+            values.reshape(flat_cells.shape[0], -1),
+        )
+
+    flat_cells &= ~removed
+    cells[...] = flat_cells.reshape(cells.shape)
+
+
+STRATEGIES = {
+    "pointing": partial(intersections, source="block"),
+    "box_line": partial(intersections, source="line"),
+    "naked_pair": partial(naked_subsets, size=2),
+    "hidden_pair": partial(hidden_subsets, size=2),
+    "naked_triple": partial(naked_subsets, size=3),
+    "hidden_triple": partial(hidden_subsets, size=3),
+    "x_wing": partial(fish, size=2),
+    "swordfish": partial(fish, size=3),
+}
+
+# Strategies ordered from cheap to expensive
+DEFAULT_STRATEGIES = tuple(STRATEGIES)
+
+
+def check_strategies(strategies: tuple[str, ...]):
+    """This function raises a ValueError for unknown strategy names."""
+
+    for strategy in strategies:
+        if strategy not in STRATEGIES:
+            raise ValueError(
+                f"Unknown strategy {strategy}, expected one of {tuple(STRATEGIES)}"
+            )
+
+
+def apply_strategies(
+    cells: np.ndarray,
+    puzzle_size: int,
+    strategies: tuple[str, ...] = DEFAULT_STRATEGIES,
+    metrics: SolverMetrics | None = None,
+    uses: np.ndarray | None = None,
+    layout: Layout | None = None,
+) -> np.ndarray:
+    """This function applies the first strategies that make progress, in order.
+
+    Every board only gets the strategies up to the first one that removed any of its
+    candidates, so the caller can go back to the cheaper singles before trying more
+    expensive strategies.
+
+    Args:
+        cells: An (N, n * n) bitmask array, updated in place.
+        puzzle_size: The size of the sudoku puzzles, i.e. "n".
+        strategies: The names of the strategies to try, in order (see `STRATEGIES`).
+        metrics: Records the calls and eliminations of every strategy if given.
+        uses: An (N, len(strategies)) counter array. If given, the count of the
+            strategy that made progress on a board is incremented in place.
+        layout: The blocks and extra units of a sudoku variant, see
+            `gsolver.tables.Layout`. None for the standard rows, columns and blocks.
+
+    Returns:
+        A boolean array with one value per board which is True if it changed.
+    """
+
+    changed = np.zeros(cells.shape[0], dtype=bool)
+    active = np.arange(cells.shape[0])
+    for strategy in strategies:
+        if active.size == 0:
+            break
+
+        boards = cells[active]
+        boards_prev = boards.copy()
+        STRATEGIES[strategy](cells=boards, puzzle_size=puzzle_size, layout=layout)
+
+        progress = np.any(boards != boards_prev, axis=-1)
+        cells[active] = boards
+        changed[active[progress]] = True
+        if uses is not None:
+            uses[active[progress], strategies.index(strategy)] += 1
+
+        if metrics is not None:
+            metrics.record_strategy(
+                strategy=strategy,
+                eliminations=int(
+                    bitmask.popcount(boards_prev).sum(dtype=np.int64)
+                    - bitmask.popcount(boards).sum(dtype=np.int64)
+                ),
+            )
+            if metrics.tracing:
+                metrics.trace("eliminated", strategy=strategy, vectors=boards.copy())
+
+        active = active[~progress]
+
+    return changed
@@ -1,18 +1,40 @@
 """This module contains code to solve sudoku puzzle."""
 
+import itertools
 import logging
 import numpy as np
 import sys
+import time
 from pathlib import Path
+from typing import Callable, TextIO
+
+from . import binary, bitmask
+from .edits import EditLedger
+from .metrics import SolverMetrics
+from .parsing import format_boxed, iter_puzzles, parse_layout, read_layout
+from .search import count_solutions, find_solution
+from .strategies import apply_strategies, check_strategies
+from .tables import Layout, get_tables
 
-logging.basicConfig(level=logging.DEBUG, stream=sys.stdout)
 logger = logging.getLogger(__name__)
 
 
 class Sudoku:
     """This class represents a sudoku puzzle."""
 
-    def __init__(self, puzzle_file: str | None = None, string_keys: bool = False):
+    backends = ("matrix", "bitmask")
+    propagations = ("queue", "sweep")
+
+    def __init__(
+        self,
+        puzzle_file: str | None = None,
+        string_keys: bool = False,
+        backend: str = "matrix",
+        puzzle: np.ndarray | None = None,
+        metrics: SolverMetrics | None = None,
+        strategies: tuple[str, ...] = (),
+        layout: Layout | None = None,
+    ):
         """Initialize the sudoku puzzle.
 
         Args:
@@ -31,73 +53,88 @@ class Sudoku:
                 | . . . | . . . | . 8 . |
                 | . . . | . . . | . . 9 |
                 +-------+-------+-------+
+            string_keys: Whether the app expects "row,column" string keys.
+            backend: The candidate representation used by the solver. Either "matrix"
+                for the nxnxn one-hot matrix or "bitmask" for one integer bitmask per
+                cell (see `gsolver.bitmask`).
+            puzzle: The givens of the puzzle as a (n, n) array with 0 for empty cells.
+                If given, the puzzle is not read from `puzzle_file`.
+            metrics: Collects strategy, phase and contradiction counts and receives
+                trace events (see `gsolver.metrics`). None disables instrumentation.
+            strategies: The higher-order strategies tried in order once naked and
+                hidden singles stall, e.g. ("pointing", "naked_pair"). See
+                `gsolver.strategies`.
+            layout: The blocks and extra units of a sudoku variant, see
+                `gsolver.tables.Layout`. If not given, the layout comments of the
+                puzzle file are used (see `gsolver.parsing.read_layout`), and
+                otherwise the standard rows, columns and blocks.
         """
 
+        if backend not in self.backends:
+            raise ValueError(
+                f"Unknown backend {backend}, expected one of {self.backends}"
+            )
+        check_strategies(strategies=strategies)
+
+        self.backend = backend
+        self.strategies = tuple(strategies)
+        self.metrics = metrics
         self.string_keys = string_keys
         self.puzzle_file = puzzle_file or "./sudoku_puzzle.txt"
 
-        self.numbers_by_index, self.puzzle_size = self.read_puzzle(
-            puzzle_file=self.puzzle_file
-        )
+        if puzzle is not None:
+            self.numbers_by_index, self.puzzle_size = self.givens_to_numbers_by_index(
+                givens=puzzle
+            )
+        else:
+            self.numbers_by_index, self.puzzle_size = self.read_puzzle(
+                puzzle_file=self.puzzle_file
+            )
+            if layout is None:
+                layout = self.read_layout(puzzle_file=self.puzzle_file)
 
+        self.layout = layout
+        self.tables = get_tables(puzzle_size=self.puzzle_size, layout=layout)
+        self.unit_groups = self.tables.unit_groups
         self.numbers_encoded, self.numbers_decoded = self.encode_numbers(
             puzzle_size=self.puzzle_size
         )
 
-        self.matrix = self.numbers_by_index_to_matrix(
-            numbers_by_index=self.numbers_by_index,
-            puzzle_size=self.puzzle_size,
-            numbers_encoded=self.numbers_encoded,
-        )
-
-        # Blocks are numbered from left to right and secondarily from top to bottom
-        self.blocks = self.get_blocks(puzzle_size=self.puzzle_size, matrix=self.matrix)
-        self.rows = self.get_rows(matrix=self.matrix)
-        self.columns = self.get_columns(matrix=self.matrix)
+        if self.backend == "bitmask":
+            self.matrix = bitmask.numbers_by_index_to_bitmask(
+                numbers_by_index=self.numbers_by_index, puzzle_size=self.puzzle_size
+            )
+        else:
+            self.matrix = self.numbers_by_index_to_matrix(
+                numbers_by_index=self.numbers_by_index,
+                puzzle_size=self.puzzle_size,
+                numbers_encoded=self.numbers_encoded,
+            )
 
         self.solution = None
         self.number_iterations = 0
+        self.units_processed = 0
         self.partial_solution = False
-        self.last_solved = ("block", self.puzzle_size - 1)
+        last_group = self.unit_groups[-1]
+        self.last_solved = (last_group, len(self.tables.units[last_group]) - 1)
+        self.last_step = None
         self.solution_file = Path(self.puzzle_file).parent / "sudoku_solution.txt"
 
-    def get_blocks(self, puzzle_size: int, matrix: np.ndarray):
-        """This function returns the blocks in the sudoku puzzle."""
-
-        blocks = []
-        sqrt_puzzle_size = int(np.sqrt(puzzle_size))
-
-        for row in range(0, puzzle_size, sqrt_puzzle_size):
-            for col in range(0, puzzle_size, sqrt_puzzle_size):
-                block = matrix[
-                    row : row + sqrt_puzzle_size, col : col + sqrt_puzzle_size
-                ]
-                blocks.append(block)
-
-        return blocks
-
-    def get_rows(self, matrix: np.ndarray):
-        """This function returns the rows in the sudoku puzzle."""
-        return [matrix[row, :, :] for row in range(matrix.shape[0])]
-
-    def get_columns(self, matrix: np.ndarray):
-        """This function returns the columns in the sudoku puzzle."""
-        return [matrix[:, col, :] for col in range(matrix.shape[1])]
+        # Built on the first edit, see `edit_ledger`
+        self.edits = None
+        self.deduced = False
 
     @classmethod
     def encode_numbers(cls, puzzle_size: int):
-        """This function encodes the numbers in the puzzle."""
-        logger.info("Encoding numbers")
+        """This function encodes the numbers in the puzzle.
 
-        np.eye(puzzle_size)
-
-        numbers_encoded = {}
-        numbers_decoded = {}
-        for number in range(1, puzzle_size + 1):
-            numbers_encoded[number] = np.eye(puzzle_size)[:, number - 1]
-            numbers_decoded[tuple(numbers_encoded[number])] = number
+        The encodings are shared by all puzzles of the same size (see `gsolver.tables`)
+        and must not be modified.
+        """
+        logger.info("Encoding numbers")
 
-        return numbers_encoded, numbers_decoded
+        tables = get_tables(puzzle_size=puzzle_size)
+        return tables.numbers_encoded, tables.numbers_decoded
 
     def read_puzzle(self, puzzle_file: str | None = None) -> list[list[int]]:
         """This function reads a sudoku puzzle from the user."""
@@ -107,121 +144,211 @@ class Sudoku:
             logger.info("Reading local puzzle at [./sudoku_puzzle.txt]")
             puzzle_file = "./sudoku_puzzle.txt"
 
-        puzzle_file = (
-            Path(__file__).parent / puzzle_file
-            if puzzle_file.startswith(".")
-            else Path(puzzle_file)
-        )
+        puzzle_file = self.puzzle_path(puzzle_file=puzzle_file)
         if not puzzle_file.exists():
             logger.error("Puzzle file not found")
             return []
 
         with open(puzzle_file, "r") as file:
-            puzzle_lines = file.readlines()
+            givens = next(iter_puzzles(lines=file), None)
 
-        numbers_by_index = {}
-        numbers_by_index_string_keys = {}
-        row = 0
-        column = 0
-        for line in puzzle_lines:
-            if line.startswith("|"):
-                row += 1
-                column = 1
-                for char in line[1:-2]:
-                    if char == "." or char == "|":
-                        column += 1
-                        continue
-
-                    if char.isdigit():
-                        string_key = f"{row},{column}"
-                        numbers_by_index_string_keys[string_key] = int(char)
-                        key = (row, column)
-                        numbers_by_index[key] = int(char)
-
-        if row != column:
+        if givens is None:
             logger.error("Puzzle is not a square")
-            logger.error(f"row = {row}, column = {column}")
             raise ValueError("Puzzle is not a square")
 
-        puzzle_size = row
-
         logger.info("Puzzle read successfully")
-        logger.debug(f"numbers_by_index = {numbers_by_index}")
-        logger.debug(f"puzzle_size = {puzzle_size}")
+        return self.givens_to_numbers_by_index(givens=givens)
+
+    @staticmethod
+    def puzzle_path(puzzle_file: str) -> Path:
+        """This function resolves paths starting with "." against the package."""
+
+        if puzzle_file.startswith("."):
+            return Path(__file__).parent / puzzle_file
+        return Path(puzzle_file)
+
+    def read_layout(self, puzzle_file: str) -> Layout | None:
+        """This function reads the layout comments of the puzzle file, if any."""
+
+        puzzle_file = self.puzzle_path(puzzle_file=puzzle_file)
+        if not puzzle_file.exists():
+            return None
+
+        with open(puzzle_file, "r") as file:
+            spec = read_layout(lines=file)
+
+        return parse_layout(spec=spec, puzzle_size=self.puzzle_size)
+
+    def givens_to_numbers_by_index(
+        self, givens: np.ndarray
+    ) -> tuple[dict[tuple[int, int], int], int]:
+        """This function converts a (n, n) array of givens to the numbers_by_index.
+
+        Empty cells are 0 in the givens and are left out of the numbers_by_index.
+        """
+
+        givens = np.asarray(givens)
+        if givens.ndim != 2 or givens.shape[0] != givens.shape[1]:
+            logger.error(f"Puzzle of shape {givens.shape} is not a square")
+            raise ValueError("Puzzle is not a square")
+
+        rows, columns = np.nonzero(givens)
+        numbers = givens[rows, columns].tolist()
+        rows, columns = (rows + 1).tolist(), (columns + 1).tolist()
+
+        numbers_by_index = dict(zip(zip(rows, columns), numbers))
+        self.numbers_by_index_str_keys = {
+            f"{row},{column}": number
+            for row, column, number in zip(rows, columns, numbers)
+        }
+        puzzle_size = givens.shape[0]
+
+        if self.metrics is not None and self.metrics.tracing:
+            self.metrics.trace(
+                "givens", numbers_by_index=numbers_by_index, puzzle_size=puzzle_size
+            )
 
-        self.numbers_by_index_str_keys = numbers_by_index_string_keys
         return numbers_by_index, puzzle_size
 
+    def decode_solution(self, solution: np.array) -> tuple[np.ndarray, np.ndarray]:
+        """This function decodes the possible solutions of every cell at once.
+
+        Returns:
+            The (n, n) numbers of solved cells, 0 for the others, and the (n, n) number
+            of possible solutions of every cell.
+        """
+
+        if self.backend == "bitmask":
+            counts = bitmask.popcount(solution)
+            numbers = bitmask.single_bit_index(solution) + 1
+        else:
+            counts = np.sum(solution, axis=-1, dtype=np.int64)
+            numbers = np.argmax(solution, axis=-1) + 1
+
+        return np.where(counts == 1, numbers, 0), counts
+
+    def cell_keys(self, string_keys: bool = False) -> list:
+        """This function returns the keys of the cells in row major order."""
+
+        cells = itertools.product(
+            range(1, self.puzzle_size + 1), range(1, self.puzzle_size + 1)
+        )
+        if string_keys:
+            return [f"{row},{column}" for row, column in cells]
+        return list(cells)
+
     def solution_to_numbers_by_index(
         self, solution: np.array, string_keys: bool = False
     ):
         """This function converts the solution to a dictionary of numbers by index.
 
         If there are multiple solutions for a cell, the function will return all the
-        possible solutions for that cell in a list.
+        possible solutions for that cell in a list. Solved cells are decoded for the
+        whole board at once, the lists are only built for the unsolved cells.
         """
 
         logger.info("Converting solution to numbers by index")
 
-        numbers_by_index = {}
-        for row in range(solution.shape[0]):
-            for column in range(solution.shape[1]):
-                try:
-                    number = self.numbers_decoded[tuple(solution[row, column])]
-                except KeyError:
-                    encoded_numbers = np.where(solution[row, column] == 1)[0] + 1
-                    number = encoded_numbers.tolist()
-
-                if string_keys:
-                    key = f"{row + 1},{column + 1}"
-                else:
-                    key = (row + 1, column + 1)
+        numbers, counts = self.decode_solution(solution=solution)
+        keys = self.cell_keys(string_keys=string_keys)
+        numbers_by_index = dict(zip(keys, numbers.reshape(-1).tolist()))
 
-                numbers_by_index[key] = number
+        flat_solution = solution.reshape(self.puzzle_size * self.puzzle_size, -1)
+        for cell in np.flatnonzero(counts != 1).tolist():
+            if self.backend == "bitmask":
+                numbers_by_index[keys[cell]] = bitmask.mask_to_numbers(
+                    mask=flat_solution[cell, 0], puzzle_size=self.puzzle_size
+                )
+            else:
+                encoded_numbers = np.flatnonzero(flat_solution[cell] == 1) + 1
+                numbers_by_index[keys[cell]] = encoded_numbers.tolist()
 
-        logger.debug(f"numbers_by_index = {numbers_by_index}")
+        if self.metrics is not None and self.metrics.tracing:
+            self.metrics.trace("solution", numbers_by_index=numbers_by_index)
 
         return numbers_by_index
 
-    def solution_to_board(self, solution: np.array, partial: bool = False):
-        """This function converts the solution to a sudoku board txt."""
+    def decode_bitmask(self, mask: int) -> int | list[int]:
+        """This function decodes a cell bitmask to its number or list of possible numbers."""
+
+        numbers = bitmask.mask_to_numbers(mask=mask, puzzle_size=self.puzzle_size)
+        return numbers[0] if len(numbers) == 1 else numbers
+
+    def solution_to_board(
+        self,
+        solution: np.array,
+        partial: bool = False,
+        stream: TextIO | None = None,
+    ):
+        """This function writes the solution in the boxed format of the puzzle file.
+
+        Unsolved cells are blank. The board is written at once, to `stream` if given,
+        e.g. `sys.stdout`, and otherwise to `self.solution_file`.
+        """
 
         logger.info("Converting solution to board")
 
-        sqrt_puzzle_size = int(np.sqrt(self.puzzle_size))
-        row_border = ("+" + "-" * (int(sqrt_puzzle_size) + 2)) * int(
-            sqrt_puzzle_size
-        ) + "+"
+        numbers, _ = self.decode_solution(solution=solution)
+        text = ("Partial solution\n" if partial else "") + format_boxed(givens=numbers)
+
+        if stream is not None:
+            stream.write(text)
+            return
 
         with open(self.solution_file, "w") as file:
-            if partial:
-                file.write("Partial solution\n")
+            file.write(text)
 
-            for row in range(solution.shape[0]):
+        logger.info(f"Solution saved to file [{self.solution_file}]")
+
+    def solution_to_binary(self, solution: np.array, binary_file: str | None = None):
+        """This function saves the solution with its candidates to a binary board file.
+
+        Partial solutions keep the possible solutions of every cell, see
+        `gsolver.binary`, and can be loaded again with `Sudoku.from_binary`.
+        """
 
-                if row % sqrt_puzzle_size == 0:
-                    file.write(f"{row_border}\n")
+        logger.info("Converting solution to binary")
 
-                for column in range(solution.shape[1]):
-                    col_mod = True if column % sqrt_puzzle_size == 0 else False
-                    if col_mod:
-                        file.write("|")
+        if self.backend == "bitmask":
+            cells = solution
+        else:
+            cells = bitmask.matrix_to_bitmask(solution)
 
-                    try:
-                        number = self.numbers_decoded[tuple(solution[row, column])]
-                        file.write(f"{number}")
+        binary_file = binary_file or self.solution_file.with_suffix(".gsb")
+        binary.write_boards(
+            path=binary_file, boards=cells[None], kind=binary.CANDIDATES
+        )
 
-                    except KeyError:
-                        file.write(" ")
+        logger.info(f"Solution saved to file [{binary_file}]")
 
-                    if not (column + 1) % sqrt_puzzle_size == 0:
-                        file.write(".")
+    @classmethod
+    def from_binary(cls, binary_file: str, index: int = 0, **kwargs) -> "Sudoku":
+        """This function loads a puzzle from a binary board file.
 
-                file.write("|\n")
+        Args:
+            binary_file: The binary board file, see `gsolver.binary`.
+            index: The index of the board in the file.
+            kwargs: Any other arguments of `Sudoku`.
+        """
 
-            file.write(f"{row_border}")
+        board_file = binary.BoardFile(path=binary_file)
+        board = board_file[index]
+        if board_file.kind == binary.CELLS:
+            return cls(puzzle=board, **kwargs)
+
+        # Solved cells become the givens, the remaining candidates are restored after
+        solved = bitmask.popcount(board) == 1
+        givens = np.where(solved, bitmask.single_bit_index(board) + 1, 0)
+        sudoku = cls(puzzle=givens, **kwargs)
+        sudoku.deduced = True
+        if sudoku.backend == "bitmask":
+            sudoku.matrix[...] = board
+        else:
+            sudoku.matrix[...] = bitmask.bitmask_to_matrix(
+                cells=board, puzzle_size=sudoku.puzzle_size
+            )
 
-        logger.info(f"Solution saved to file [{self.solution_file}]")
+        return sudoku
 
     def numbers_by_index_to_matrix(
         self,
@@ -234,7 +361,7 @@ class Sudoku:
         The numbers_by_index is a dictionary with the key being a tuple of the row and
         column index and the value being the number at that index.
 
-        The matrix is a nxnxn np array where n is the size of the sudoku puzzle. Each cell
+        The matrix is a nxnxn uint8 array where n is the size of the sudoku puzzle. Each cell
         in the puzzle is represented by a nx1 binary vector where the index of the 1 in the
         vector represents the number at that cell. Then, there are n rows of nx1 vectors and
         also n columns of nx1 vectors.
@@ -255,15 +382,15 @@ class Sudoku:
 
         logger.info("Converting numbers_by_index to matrix")
 
-        # Initialize the matrix to all 1's
-        matrix = np.ones((puzzle_size, puzzle_size, puzzle_size))
+        # Initialize the matrix to all 1's, one byte per candidate instead of a float
+        matrix = np.ones((puzzle_size, puzzle_size, puzzle_size), dtype=np.uint8)
 
         # Fill in the numbers that have been solved for
         for (row, column), number in numbers_by_index.items():
             matrix[row - 1, column - 1] = numbers_encoded[number]
 
-        logger.debug(f"matrix = {matrix}")
-        logger.debug(f"matrix.shape = {matrix.shape}")
+        if self.metrics is not None and self.metrics.tracing:
+            self.metrics.trace("matrix", matrix=matrix)
 
         return matrix
 
@@ -272,7 +399,6 @@ class Sudoku:
 
         # 1. Find vector indices where sum of all vectors along third axis is 1
         solved_vector_inds = np.where(np.sum(vectors, axis=-1) == 1)
-        logger.debug(f"solved_vector_inds = {solved_vector_inds}")
 
         # 2. Use vector indices to return solved vectors
         solved_vectors = vectors[solved_vector_inds]
@@ -310,7 +436,10 @@ class Sudoku:
         unsolved_vectors = vectors[unsolved_vector_inds]
 
         # 2. Find all possible solutions that only appear once in the unsolved vectors
-        global_single_appearance_solutions = np.where(np.sum(vectors, axis=0) == 1)[0]
+        all_vectors = vectors.reshape(-1, vectors.shape[-1])
+        global_single_appearance_solutions = np.where(
+            np.sum(all_vectors, axis=0) == 1
+        )[0]
         local_single_appearance_solutions = np.where(
             np.sum(unsolved_vectors, axis=0) == 1
         )[0]
@@ -330,26 +459,319 @@ class Sudoku:
         solutions_ordered = unsolved_single_appearance_solutions[solution_inds]
 
         # 4. Use single appearance solutions to update unsolved vectors
-        unsolved_vectors[vector_inds, :] = np.eye(self.puzzle_size)[solutions_ordered]
+        unsolved_vectors[vector_inds, :] = self.tables.identity[solutions_ordered]
         vectors[unsolved_vector_inds] = unsolved_vectors
 
     def update_vectors(self, vectors: np.array):
-        """This function updates the possible solutions for a single vector group."""
+        """This function updates the possible solutions for a single vector group.
+
+        `vectors` is an array of flat cell indices of one unit into `self.matrix`, or
+        for the "bitmask" backend also of a whole group of units (see
+        `gsolver.tables`).
+        """
+
+        if self.backend == "bitmask":
+            cells = self.matrix.reshape(-1)
+            okay = self.apply_strategy(
+                "naked_single",
+                bitmask.remove_impossible_solutions,
+                vectors,
+                cells=cells,
+                units=vectors,
+            )
+            self.apply_strategy(
+                "hidden_single",
+                bitmask.use_single_appearance_solution,
+                vectors,
+                cells=cells,
+                units=vectors,
+            )
+            return bool(np.all(okay))
+
+        # 0. Gather the (n, n) one-hot vectors of the unit, they are written back at 3.
+        cells = self.matrix.reshape(self.puzzle_size * self.puzzle_size, -1)
+        unit_vectors = cells[vectors]
 
         # 1. Remove solved numbers from unsolved vectors
-        okay = self.remove_impossible_solutions(vectors=vectors)
+        okay = self.apply_strategy(
+            "naked_single",
+            self.remove_impossible_solutions,
+            unit_vectors,
+            vectors=unit_vectors,
+        )
         if not okay:
             return False
 
         # 2. Find possible solutions that only appear once in the unsolved vectors
-        self.use_single_appearance_solution(vectors=vectors)
+        self.apply_strategy(
+            "hidden_single",
+            self.use_single_appearance_solution,
+            unit_vectors,
+            vectors=unit_vectors,
+        )
 
+        # 3. Write the updated vectors back to the matrix
+        cells[vectors] = unit_vectors
         return True
 
-    def solve(self, matrix: np.array, single_iteration: bool = False):
-        """This function solves the sudoku puzzle."""
+    def apply_strategy(
+        self, strategy: str, function: Callable, unit: np.array, **kwargs
+    ):
+        """This function applies a strategy to one or more units, see `update_vectors`.
+
+        Without metrics attached the strategy is simply called. Otherwise its call and
+        the number of possible solutions it eliminated are recorded, and the unit is
+        traced before and after if a sink is attached.
+        """
+
+        metrics = self.metrics
+        if metrics is None:
+            return function(**kwargs)
+
+        if metrics.tracing:
+            metrics.trace(
+                "strategy", strategy=strategy, vectors=self.trace_vectors(vectors=unit)
+            )
+
+        candidates = self.count_candidates(vectors=unit)
+        result = function(**kwargs)
+        metrics.record_strategy(
+            strategy=strategy,
+            eliminations=candidates - self.count_candidates(vectors=unit),
+        )
+
+        if metrics.tracing:
+            metrics.trace(
+                "eliminated", strategy=strategy, vectors=self.trace_vectors(vectors=unit)
+            )
+
+        return result
+
+    def count_candidates(self, vectors: np.array) -> int:
+        """This function counts the possible solutions left in the cells of units."""
+
+        if self.backend == "bitmask":
+            return int(bitmask.popcount(self.matrix.reshape(-1)[vectors]).sum())
+
+        return int(np.sum(vectors))
+
+    def trace_vectors(self, vectors: np.array) -> np.array:
+        """This function returns a copy of the possible solutions of units to trace."""
+
+        if self.backend == "bitmask":
+            return self.matrix.reshape(-1)[vectors]
+
+        return np.copy(vectors)
+
+    def get_units(self, group: str):
+        """This function returns the units of a group as arrays of flat cell indices."""
+        return self.tables.units[group]
+
+    def is_solved(self, matrix: np.array) -> bool:
+        """This function checks whether every cell of the puzzle has a single solution."""
+
+        if self.backend == "bitmask":
+            return bool(np.all(bitmask.popcount(matrix) == 1))
+
+        return np.sum(np.sum(matrix, axis=2) == 1) == matrix.shape[0] ** 2
+
+    def has_empty_cells(self, matrix: np.array) -> bool:
+        """This function checks whether any cell of the puzzle has no possible solution."""
+
+        if self.backend == "bitmask":
+            return bool(np.any(matrix == 0))
+
+        return bool(np.any(np.sum(matrix, axis=-1) == 0))
+
+    def next_unit(self) -> tuple[str, int]:
+        """This function returns the unit to solve after the last solved unit."""
+
+        group, index = self.last_solved
+        if index != len(self.get_units(group)) - 1:
+            return group, index + 1
+
+        group_index = (self.unit_groups.index(group) + 1) % len(self.unit_groups)
+        return self.unit_groups[group_index], 0
+
+    def solve(
+        self,
+        matrix: np.array,
+        single_iteration: bool = False,
+        search: str | None = None,
+        propagation: str = "queue",
+    ):
+        """This function solves the sudoku puzzle.
+
+        The puzzle is solved by alternating between the rows, columns and blocks, and
+        the groups of extra units of the layout. If `single_iteration` is True, only
+        the unit after `self.last_solved` is updated.
+
+        Args:
+            matrix: The matrix of possible solutions, updated in place.
+            single_iteration: Whether to only update the next unit.
+            search: If the alternating strategy stalls, the solution is completed from
+                the propagated state with the "backtrack" or "exact_cover" search
+                engine (see `gsolver.search`).
+            propagation: Either "queue" to only revisit units whose cells changed (see
+                `propagate`), or "sweep" to revisit every unit until nothing changes
+                (see `sweep`).
+        """
+
+        if propagation not in self.propagations:
+            raise ValueError(
+                f"Unknown propagation {propagation}, expected one of "
+                f"{self.propagations}"
+            )
 
         self.partial_solution = False
+        self.deduced = True
+        if self.backend == "bitmask":
+            self.matrix = matrix
+
+        if single_iteration:
+            self.number_iterations = 1
+            self.units_processed = 1
+            group, index = self.next_unit()
+            if self.metrics is not None and self.metrics.tracing:
+                self.metrics.trace("unit", group=group, index=index)
+
+            cells = self.get_units(group)[index]
+            candidates = self.get_candidates(cells=cells)
+            okay = self.update_phase(group=group, vectors=cells)
+            self.last_solved = (group, index)
+            self.partial_solution = not self.is_solved(matrix)
+            self.last_step = self.get_step(
+                group=group,
+                index=index,
+                cells=cells,
+                candidates=candidates,
+                contradiction=not okay,
+            )
+            self.solution = matrix
+            return matrix
+
+        if propagation == "queue":
+            self.propagate(matrix=matrix)
+        else:
+            self.sweep(matrix=matrix)
+
+        logger.info(
+            f"num_iterations = {self.number_iterations}, "
+            f"units_processed = {self.units_processed}"
+        )
+
+        if search is not None and self.partial_solution:
+            self.search_solution(matrix=matrix, search=search)
+
+        self.matrix = matrix
+        self.solution = matrix
+        return matrix
+
+    def get_candidates(self, cells: np.array) -> np.array:
+        """This function returns a copy of the possible solutions of flat cell indices."""
+
+        if self.backend == "bitmask":
+            return self.matrix.reshape(-1)[cells]
+
+        return self.matrix.reshape(self.puzzle_size * self.puzzle_size, -1)[cells]
+
+    def get_step(
+        self,
+        group: str,
+        index: int,
+        cells: np.array,
+        candidates: np.array,
+        contradiction: bool = False,
+    ) -> dict:
+        """This function records the changes of one unit visit.
+
+        Only the cells of the visited unit can change, so the step costs O(n) cells,
+        and only the cells that changed are part of it.
+
+        Args:
+            group: The group of the visited unit, i.e. "row", "column" or "block".
+            index: The index of the visited unit in its group.
+            cells: The flat cell indices of the unit.
+            candidates: The possible solutions of the cells before the visit, see
+                `get_candidates`.
+            contradiction: Whether the visit found a contradiction.
+
+        Returns:
+            The step with the "unit" as [group, index], the new value of every changed
+            cell in "cells" (a number, or a list of the possible numbers), the
+            "eliminations" (the removed possible numbers) and "placements" (the
+            solved number) per changed cell, and whether the puzzle is "solved" or
+            has a "contradiction". Cells are keyed like `solution_to_numbers_by_index`.
+        """
+
+        changed_candidates = self.get_candidates(cells=cells)
+        if self.backend == "bitmask":
+            changed = np.flatnonzero(changed_candidates != candidates)
+        else:
+            changed = np.flatnonzero(np.any(changed_candidates != candidates, axis=-1))
+
+        step = {
+            "unit": [group, int(index)],
+            "cells": {},
+            "eliminations": {},
+            "placements": {},
+            "solved": not self.partial_solution,
+            "contradiction": contradiction,
+        }
+        for position in changed.tolist():
+            row, column = divmod(int(cells[position]), self.puzzle_size)
+            if self.string_keys:
+                key = f"{row + 1},{column + 1}"
+            else:
+                key = (row + 1, column + 1)
+
+            if self.backend == "bitmask":
+                eliminated = candidates[position] & ~changed_candidates[position]
+                numbers = bitmask.mask_to_numbers(
+                    mask=changed_candidates[position], puzzle_size=self.puzzle_size
+                )
+                eliminated = bitmask.mask_to_numbers(
+                    mask=eliminated, puzzle_size=self.puzzle_size
+                )
+            else:
+                numbers = (np.flatnonzero(changed_candidates[position]) + 1).tolist()
+                eliminated = np.flatnonzero(
+                    (candidates[position] == 1) & (changed_candidates[position] == 0)
+                )
+                eliminated = (eliminated + 1).tolist()
+
+            step["cells"][key] = numbers[0] if len(numbers) == 1 else numbers
+            step["eliminations"][key] = eliminated
+            if len(numbers) == 1:
+                step["placements"][key] = numbers[0]
+
+        return step
+
+    def iter_steps(self, max_steps: int | None = None):
+        """This function solves the puzzle one unit at a time and yields every step.
+
+        Stepping stops when the puzzle is solved or contradicts, after `max_steps`
+        steps, or once a full round over all units changed nothing, i.e. the puzzle
+        needs search. See `get_step` for the steps.
+        """
+
+        number_units = self.tables.number_units
+        unchanged_steps = 0
+        for _ in itertools.count() if max_steps is None else range(max_steps):
+            self.solve(matrix=self.matrix, single_iteration=True)
+            yield self.last_step
+
+            if self.last_step["solved"] or self.last_step["contradiction"]:
+                return
+
+            unchanged_steps = 0 if self.last_step["cells"] else unchanged_steps + 1
+            if unchanged_steps >= number_units:
+                return
+
+    def sweep(self, matrix: np.array):
+        """This function updates every unit of the puzzle until nothing changes."""
+
+        self.units_processed = 0
         matrix_prev = np.copy(matrix) + 1
 
         num_iterations = 0
@@ -359,98 +781,54 @@ class Sudoku:
             self.number_iterations = num_iterations
 
             # 0. Check if puzzle is solved
-            if np.sum(np.sum(matrix, axis=2) == 1) == matrix.shape[0] ** 2:
+            if self.is_solved(matrix):
                 logger.info("Puzzle solved!")
                 break
 
-            matrix_prev = np.copy(matrix)
-
-            # 1. Solve for rows
-            solve_for_row = self.last_solved == ("block", self.puzzle_size - 1) or (
-                self.last_solved[0] == "row"
-                and self.last_solved[1] != self.puzzle_size - 1
-            )
-            logger.debug(f"Solving for row: {solve_for_row}")
-            if not single_iteration or solve_for_row:
-                rows = (
-                    self.rows
-                    if not single_iteration
-                    else [self.rows[(self.last_solved[1] + 1) % self.puzzle_size]]
-                )
-                for index, row in enumerate(rows):
-                    index = (
-                        (self.last_solved[1] + 1) % self.puzzle_size
-                        if single_iteration
-                        else index
-                    )
-                    logger.debug(f"Solving for row {index} = \n{row}")
-                    okay = self.update_vectors(vectors=row)
-                    if not okay or (single_iteration and solve_for_row):
-                        self.partial_solution = True
-                        break
-
-            if single_iteration and solve_for_row:
-                self.last_solved = ("row", index)
+            # 0b. Check if any cell has no possible solution left
+            if self.has_empty_cells(matrix):
+                logger.error("Cell without possible solution found!")
+                self.partial_solution = True
                 break
 
-            # 2. Solve for columns
-            solve_for_column = self.last_solved == ("row", self.puzzle_size - 1) or (
-                self.last_solved[0] == "column"
-                and self.last_solved[1] != self.puzzle_size - 1
-            )
-            logger.debug(f"Solving for columns: {solve_for_column}")
-            if not single_iteration or solve_for_column:
-                columns = (
-                    self.columns
-                    if not single_iteration
-                    else [self.columns[(self.last_solved[1] + 1) % self.puzzle_size]]
-                )
-                for index, column in enumerate(columns):
-                    index = (
-                        (self.last_solved[1] + 1) % self.puzzle_size
-                        if single_iteration
-                        else index
-                    )
-                    logger.debug(f"Solving for column {index} = \n{column}")
-                    okay = self.update_vectors(vectors=column)
-                    if (not okay) or (single_iteration and solve_for_column):
-                        self.partial_solution = True
-                        break
-
-            if single_iteration and solve_for_column:
-                self.last_solved = ("column", index)
-                break
+            matrix_prev = np.copy(matrix)
 
-            # 3. Solve for blocks
-            solve_for_block = self.last_solved == ("column", self.puzzle_size - 1) or (
-                self.last_solved[0] == "block"
-                and self.last_solved[1] != self.puzzle_size - 1
-            )
-            logger.debug(f"Solving for blocks: {solve_for_block}")
-            if not single_iteration or solve_for_block:
-                blocks = (
-                    self.blocks
-                    if not single_iteration
-                    else [self.blocks[(self.last_solved[1] + 1) % self.puzzle_size]]
-                )
-                for index, block in enumerate(blocks):
-                    index = (
-                        (self.last_solved[1] + 1) % self.puzzle_size
-                        if single_iteration
-                        else index
-                    )
-                    logger.debug(f"Solving for block {index} = \n{block}")
-                    okay = self.update_vectors(vectors=block)
-                    if (not okay) or (single_iteration and solve_for_block):
+            # 1. Solve for rows, 2. columns and 3. blocks, then the extra units
+            for group in self.unit_groups:
+                units = self.get_units(group)
+                self.units_processed += len(units)
+                if self.backend == "bitmask":
+                    # Units of a group are disjoint, so they are all updated at once
+                    units = [units]
+
+                for index, vectors in enumerate(units):
+                    if self.metrics is not None and self.metrics.tracing:
+                        self.metrics.trace("unit", group=group, index=index)
+
+                    okay = self.update_phase(group=group, vectors=vectors)
+                    if not okay:
+                        if self.metrics is not None:
+                            self.metrics.record_contradiction(group=group, index=index)
                         self.partial_solution = True
-                        self.last_solved = ("block", index)
                         break
 
-            if single_iteration and solve_for_block:
-                self.last_solved = ("block", index)
-                break
+                if self.partial_solution:
+                    break
+
+            # 4. Try the higher-order strategies, then check if unsolvable
+            if np.array_equal(matrix_prev, matrix):
+                changed_cells = self.apply_strategies(matrix=matrix)
+                if self.has_empty_cells(
+                    matrix.reshape(self.puzzle_size * self.puzzle_size, -1)[
+                        changed_cells
+                    ]
+                ):
+                    logger.error("Contradiction found by the strategies")
+                    if self.metrics is not None:
+                        self.metrics.record_contradiction(group="strategies")
+                    self.partial_solution = True
+                    break
 
-            # 7. Check if unsolvable
             if np.array_equal(matrix_prev, matrix):
                 logger.error(
                     f"No change in matrix solution after iteration {num_iterations}."
@@ -464,33 +842,363 @@ class Sudoku:
                 )
                 break
 
-            # 8. Repeat from 1
-            if single_iteration:
-                break
+            # 5. Repeat from 1
 
-        logger.info(f"num_iterations = {num_iterations}")
+    def propagate(self, matrix: np.array, dirty_cells: np.ndarray | None = None):
+        """This function updates only the units whose cells changed until none are left.
 
-        self.matrix = matrix
-        self.solution = matrix
-        return matrix
+        Every unit starts out dirty, or only the units of `dirty_cells` if given, e.g.
+        the cells an edit changed (see `apply_edit`). Updating the dirty units of a
+        group marks every unit of every cell whose possible solutions shrank as dirty
+        again, so unchanged parts of the puzzle are never revisited. Each round goes
+        over the dirty units of every group once and counts as one iteration.
 
-    def update(self, key: str, value: int):
-        """This function updates the puzzle with the user's input."""
-        logger.info(f"Updating puzzle with user input: {key} = {value}")
+        Once no dirty units are left, the higher-order strategies (see
+        `apply_strategies`) mark the units of the cells they changed as dirty.
+        """
 
-        row, column = key.split(",")
-        row = int(row)
-        column = int(column)
+        units = self.tables.units
+        cell_units = self.tables.cell_units
+        cells = matrix.reshape(self.puzzle_size * self.puzzle_size, -1)
 
-        # Would be nice if user could delete a number, but doing this messes up the options
-        # if value == 0:
-        #     self.matrix[row - 1, column - 1] = np.ones(self.puzzle_size)
+        # One flag per unit, plus the flag of `cell_units` for cells outside of any
+        # unit of a group, which is ignored
+        flags = np.ones(self.tables.number_units + 1, dtype=bool)
+        if dirty_cells is not None:
+            flags[:] = False
+            flags[cell_units[dirty_cells]] = True
+        dirty = flags[:-1]
+
+        self.number_iterations = 0
+        self.units_processed = 0
+        while dirty.any():
+            self.number_iterations += 1
+
+            for group in self.unit_groups:
+                offset = self.tables.group_offsets[group]
+                group_dirty = dirty[offset : offset + len(units[group])]
+                indices = np.flatnonzero(group_dirty)
+                if indices.size == 0:
+                    continue
+
+                group_dirty[indices] = False
+                self.units_processed += indices.size
+
+                unit_cells = units[group][indices]
+                cells_prev = cells[unit_cells]
+
+                # 1. Solve for the dirty units of the group
+                if self.metrics is not None and self.metrics.tracing:
+                    self.metrics.trace("unit", group=group, index=indices)
+
+                if self.backend == "bitmask":
+                    # Units of a group are disjoint, so they are all updated at once
+                    okay = self.update_phase(group=group, vectors=unit_cells)
+                else:
+                    okay = all(
+                        self.update_phase(group=group, vectors=units[group][index])
+                        for index in indices
+                    )
+
+                # 2. Find the cells that changed and mark their units as dirty
+                changed = np.any(cells[unit_cells] != cells_prev, axis=-1)
+                changed_cells = unit_cells[changed]
+                flags[cell_units[changed_cells]] = True
+
+                # 3. Fail fast on contradictions in the changed cells
+                if not okay or self.has_empty_cells(cells[changed_cells]):
+                    logger.error(f"Contradiction found in {group}s {indices.tolist()}")
+                    if self.metrics is not None:
+                        self.metrics.record_contradiction(group=group, index=indices)
+                    self.partial_solution = True
+                    return
+
+            if dirty.any() or self.is_solved(matrix):
+                continue
+
+            # 4. Once the singles stall, mark the units changed by the strategies
+            changed_cells = self.apply_strategies(matrix=matrix)
+            flags[cell_units[changed_cells]] = True
+            if self.has_empty_cells(cells[changed_cells]):
+                logger.error("Contradiction found by the strategies")
+                if self.metrics is not None:
+                    self.metrics.record_contradiction(group="strategies")
+                self.partial_solution = True
+                return
+
+        if self.is_solved(matrix):
+            logger.info("Puzzle solved!")
+        else:
+            logger.error("No dirty units left. Partial solution found.")
+            self.partial_solution = True
+
+    def apply_strategies(self, matrix: np.array) -> np.array:
+        """This function applies the higher-order strategies to the whole puzzle.
+
+        The strategies are tried in the order of `self.strategies` until one of them
+        removes a possible solution (see `gsolver.strategies.apply_strategies`).
+
+        Returns:
+            The flat indices of the cells whose possible solutions shrank.
+        """
+
+        if not self.strategies:
+            return np.empty(0, dtype=np.intp)
+
+        if self.backend == "bitmask":
+            cells = matrix.reshape(1, -1)
+        else:
+            cells = bitmask.matrix_to_bitmask(matrix).reshape(1, -1)
+
+        cells_prev = cells.copy()
+        start = time.perf_counter()
+        apply_strategies(
+            cells=cells,
+            puzzle_size=self.puzzle_size,
+            strategies=self.strategies,
+            metrics=self.metrics,
+            layout=self.layout,
+        )
+        if self.metrics is not None:
+            self.metrics.record_phase(
+                phase="strategies", seconds=time.perf_counter() - start
+            )
+
+        changed_cells = np.flatnonzero(cells[0] != cells_prev[0])
+        if self.backend == "bitmask":
+            matrix.reshape(-1)[changed_cells] = cells[0, changed_cells]
+        else:
+            matrix.reshape(self.puzzle_size * self.puzzle_size, -1)[
+                changed_cells
+            ] = bitmask.bitmask_to_matrix(
+                cells=cells[0, changed_cells], puzzle_size=self.puzzle_size
+            )
+
+        return changed_cells
+
+    def update_phase(self, group: str, vectors: np.array) -> bool:
+        """This function updates units of a group and times it if metrics are attached."""
+
+        if self.metrics is None:
+            return self.update_vectors(vectors=vectors)
+
+        start = time.perf_counter()
+        okay = self.update_vectors(vectors=vectors)
+        self.metrics.record_phase(phase=group, seconds=time.perf_counter() - start)
+        return okay
+
+    def search_solution(self, matrix: np.array, search: str):
+        """This function completes a partial solution in place by searching."""
+
+        cells = (
+            matrix if self.backend == "bitmask" else bitmask.matrix_to_bitmask(matrix)
+        )
+        if self.metrics is None:
+            solution = find_solution(cells=cells, search=search, layout=self.layout)
+        else:
+            start = time.perf_counter()
+            solution = find_solution(
+                cells=cells, search=search, metrics=self.metrics, layout=self.layout
+            )
+            self.metrics.record_phase(
+                phase="search", seconds=time.perf_counter() - start
+            )
+        if solution is None:
+            logger.error("Puzzle has no solution.")
+            return
+
+        if self.backend == "bitmask":
+            matrix[...] = solution
+        else:
+            matrix[...] = bitmask.bitmask_to_matrix(
+                cells=solution, puzzle_size=self.puzzle_size
+            )
+
+        logger.info("Puzzle solved by search!")
+        self.partial_solution = False
+
+    def count_solutions(
+        self, limit: int | None = 2, search: str = "backtrack", workers: int = 1
+    ) -> int:
+        """This function counts the solutions of the puzzle, see `gsolver.search`.
+
+        Counting starts from the current possible solutions, which are left untouched,
+        and stops once `limit` solutions are found. With more than one worker, the top
+        levels of the search tree are split across a process pool.
+        """
+
+        cells = (
+            np.copy(self.matrix)
+            if self.backend == "bitmask"
+            else bitmask.matrix_to_bitmask(self.matrix)
+        )
+        return count_solutions(
+            cells=cells,
+            limit=limit,
+            search=search,
+            workers=workers,
+            metrics=self.metrics,
+            layout=self.layout,
+        )
+
+    def is_unique(self, workers: int = 1) -> bool:
+        """This function checks whether the puzzle has exactly one solution."""
+        return self.count_solutions(limit=2, workers=workers) == 1
+
+    def edit_ledger(self) -> EditLedger:
+        """This function returns the edit ledger, which is built on the first edit."""
+
+        if self.edits is None:
+            givens = np.zeros((self.puzzle_size, self.puzzle_size), dtype=np.uint8)
+            for (row, column), number in self.numbers_by_index.items():
+                givens[row - 1, column - 1] = number
+            self.edits = EditLedger(givens=givens, layout=self.layout)
+
+        return self.edits
+
+    def apply_edit(self, cells: np.ndarray, removed: int) -> dict:
+        """This function brings the possible solutions in line with an edit.
+
+        Before the puzzle is solved, the cells the edit changed, i.e. the edited cell
+        and its peers, take the candidates the placements leave. Afterwards the
+        eliminations of the solver are kept: a cleared cell starts over from the
+        candidates the placements leave, peers only get the removed number back, and
+        the units of the changed cells are propagated again (see `propagate`).
+        Eliminations elsewhere that rested on the removed number are kept as well,
+        until the puzzle is solved again.
+
+        Args:
+            cells: The flat cells whose candidates the edit changed, the edited cell
+                first.
+            removed: The placed number the edit removed, or 0.
+
+        Returns:
+            The new value of every updated cell, keyed like
+            `solution_to_numbers_by_index`.
+        """
+
+        edits = self.edit_ledger()
+        candidates = edits.candidates[cells]
+        if self.deduced and cells.size:
+            before = self.get_candidates(cells=np.arange(self.puzzle_size**2))
+            if self.backend != "bitmask":
+                before = bitmask.matrix_to_bitmask(before)
+
+            # Empty peers keep their candidates, plus the removed number where the
+            # placements allow it, while placed and cleared cells are reset
+            regained = edits.bits[removed - 1] if removed else 0
+            kept = (before[cells] | (candidates & regained)) & candidates
+            reset = edits.numbers[cells] > 0
+            reset[0] = True
+            candidates = np.where(reset, candidates, kept)
+
+        if self.backend == "bitmask":
+            self.matrix.reshape(-1)[cells] = candidates
+        else:
+            vectors = self.matrix.reshape(-1, self.puzzle_size)
+            vectors[cells] = bitmask.bitmask_to_matrix(
+                cells=candidates, puzzle_size=self.puzzle_size
+            )
+
+        if self.deduced and cells.size:
+            self.propagate(matrix=self.matrix, dirty_cells=cells)
+            after = self.get_candidates(cells=np.arange(self.puzzle_size**2))
+            if self.backend != "bitmask":
+                after = bitmask.matrix_to_bitmask(after)
+            cells = np.union1d(cells, np.flatnonzero(after != before))
+            candidates = after[cells]
+
+        numbers_by_index = {}
+        for cell, mask in zip(cells.tolist(), candidates.tolist()):
+            row, column = divmod(cell, self.puzzle_size)
+            if self.string_keys:
+                key = f"{row + 1},{column + 1}"
+            else:
+                key = (row + 1, column + 1)
+
+            numbers_by_index[key] = self.decode_bitmask(mask=mask)
+
+        return numbers_by_index
+
+    def set_number(self, row: int, column: int, number: int) -> dict:
+        """This function places a number in a cell, or clears the cell with 0.
+
+        Only the cell and its peers are recomputed, see `gsolver.edits` and
+        `apply_edit`. The edit can be reverted with `undo`, also when it places the
+        number the solver already deduced for the cell.
+
+        Args:
+            row: The row of the cell, starting at 1.
+            column: The column of the cell, starting at 1.
+            number: The number to place, or 0 to clear the cell.
+
+        Returns:
+            The new value of every updated cell, see `apply_edit`.
+        """
+
+        cell = (row - 1) * self.puzzle_size + (column - 1)
+        cells, removed = self.edit_ledger().edit(cell=cell, number=number)
+        return self.apply_edit(cells=cells, removed=removed)
+
+    def clear_number(self, row: int, column: int) -> dict:
+        """This function clears the number of a cell, see `set_number`."""
+        return self.set_number(row=row, column=column, number=0)
+
+    def undo(self) -> dict:
+        """This function reverts the last edit, see `set_number`."""
+
+        cells, removed = self.edit_ledger().undo()
+        return self.apply_edit(cells=cells, removed=removed)
+
+    def redo(self) -> dict:
+        """This function applies the last undone edit again, see `set_number`."""
+
+        cells, removed = self.edit_ledger().redo()
+        return self.apply_edit(cells=cells, removed=removed)
+
+    def parse_update(self, key: str, value: int) -> tuple[int, int, int]:
+        """This function checks the user's input for a cell without applying it.
+
+        Args:
+            key: The cell as "row,column", starting at 1.
+            value: The number to place, or 0 to clear the cell.
+
+        Returns:
+            The row, column and number for `set_number`.
+
+        Raises:
+            ValueError: If the cell or number is invalid, or the cell is a given.
+        """
+
+        try:
+            row, column = (int(index) for index in key.split(","))
+        except (AttributeError, ValueError):
+            raise ValueError(f"Cell {key!r} is not a row,column pair")
+
+        if not (1 <= row <= self.puzzle_size and 1 <= column <= self.puzzle_size):
+            raise ValueError(f"Cell {key} is not on the board")
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise ValueError(f"Number {value!r} of cell {key} is not an integer")
+        if not 0 <= value <= self.puzzle_size:
+            raise ValueError(f"Number {value} is not between 0 and {self.puzzle_size}")
+        if self.edit_ledger().givens[(row - 1) * self.puzzle_size + (column - 1)]:
+            raise ValueError(f"Cell {key} is a given")
+
+        return row, column, value
+
+    def update(self, key: str, value: int) -> dict:
+        """This function updates the puzzle with the user's input.
+
+        A value of 0 clears the cell. See `parse_update` and `set_number`.
+        """
+        logger.info(f"Updating puzzle with user input: {key} = {value}")
 
-        if value > 0:
-            self.matrix[row - 1, column - 1] = self.numbers_encoded[value]
+        row, column, number = self.parse_update(key=key, value=value)
+        return self.set_number(row=row, column=column, number=number)
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG, stream=sys.stdout)
     sudoku = Sudoku(puzzle_file="./sudoku_puzzle.txt")
     for _ in range(100):
         soln = sudoku.solve(matrix=sudoku.matrix, single_iteration=True)
@@ -0,0 +1,326 @@
+"""This module contains the index tables shared by every sudoku puzzle of a layout.
+
+The tables only depend on the puzzle size and the layout of its units, so they are
+built once per layout by `get_tables`, made read-only, and shared by all `Sudoku`
+instances and solver backends.
+
+Every unit is an all-different constraint over n cells, i.e. it holds every number
+once. Rows and columns are always units. The blocks are the square blocks, or any
+other partition of the board into n regions of n cells, e.g. the irregular regions of
+jigsaw puzzles. Any number of extra units can be added on top, e.g. the diagonals of
+X-sudoku or the windows of windoku (see `VARIANTS`):
+
+    layout = Layout(puzzle_size=9, extra_units=VARIANTS["diagonal"](9))
+    tables = get_tables(puzzle_size=9, layout=layout)
+
+The extra units are compiled into groups of disjoint units, so every group is a
+(k, n) index array just like the rows, columns and blocks, and the vectorized kernels
+update a whole group at once without knowing which variant it belongs to. The
+diagonals of a 9x9 puzzle share their center cell, for example, so they become two
+groups of one unit each.
+"""
+
+import logging
+from functools import lru_cache
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def read_only(array: np.ndarray) -> np.ndarray:
+    """This function marks an array as read-only and returns it."""
+    array.flags.writeable = False
+    return array
+
+
+def diagonal_units(puzzle_size: int) -> tuple[tuple[int, ...], ...]:
+    """This function returns the two main diagonals of X-sudoku as flat cell units."""
+
+    cells = np.arange(puzzle_size * puzzle_size).reshape(puzzle_size, puzzle_size)
+    return (
+        tuple(np.diagonal(cells).tolist()),
+        tuple(np.diagonal(np.fliplr(cells)).tolist()),
+    )
+
+
+def window_units(puzzle_size: int) -> tuple[tuple[int, ...], ...]:
+    """This function returns the windows of windoku as flat cell units.
+
+    Windows are square blocks shifted by one cell from the board edge, with a gap of
+    one cell between them, e.g. the four windows at rows and columns 2-4 and 6-8 of a
+    9x9 puzzle.
+    """
+
+    block_size = int(np.sqrt(puzzle_size))
+    cells = np.arange(puzzle_size * puzzle_size).reshape(puzzle_size, puzzle_size)
+    starts = range(1, puzzle_size - block_size + 1, block_size + 1)
+    windows = [
+        cells[row : row + block_size, column : column + block_size]
+        for row in starts
+        for column in starts
+    ]
+    return tuple(tuple(window.ravel().tolist()) for window in windows)
+
+
+VARIANTS = {
+    "diagonal": diagonal_units,
+    "windoku": window_units,
+}
+
+
+class Layout:
+    """This class represents the blocks and extra units of a sudoku variant.
+
+    Layouts are hashable, so they key the shared tables of `get_tables`.
+
+    Attributes:
+        puzzle_size: The size of the puzzle, i.e. "n".
+        blocks: The region, from 0 to n - 1, of every flat cell, or None for the square
+            blocks. Regions that are just the square blocks, in any numbering, become
+            None.
+        extra_units: The units besides rows, columns and blocks, each a tuple of n
+            flat cell indices.
+    """
+
+    def __init__(
+        self,
+        puzzle_size: int,
+        blocks: tuple[int, ...] | None = None,
+        extra_units: tuple[tuple[int, ...], ...] = (),
+    ):
+        number_cells = puzzle_size * puzzle_size
+        if blocks is not None:
+            blocks = tuple(int(block) for block in blocks)
+            counts = np.bincount(blocks, minlength=puzzle_size) if blocks else []
+            if len(blocks) != number_cells or len(counts) != puzzle_size:
+                raise ValueError(
+                    f"Blocks must number the {number_cells} cells from 0 to "
+                    f"{puzzle_size - 1}"
+                )
+            if min(blocks) < 0 or np.any(counts != puzzle_size):
+                raise ValueError(f"Every block must have {puzzle_size} cells")
+
+            # Both partitions have n regions of n cells, so they are the same if every
+            # region lies in one square block
+            block_size = int(np.sqrt(puzzle_size))
+            if block_size * block_size == puzzle_size:
+                rows, columns = np.divmod(np.arange(number_cells), puzzle_size)
+                squares = rows // block_size * block_size + columns // block_size
+                if len(set(zip(blocks, squares.tolist()))) == puzzle_size:
+                    blocks = None
+
+        extra_units = tuple(tuple(int(cell) for cell in unit) for unit in extra_units)
+        for unit in extra_units:
+            if len(set(unit)) != puzzle_size or len(unit) != puzzle_size:
+                raise ValueError(f"Unit {unit} does not have {puzzle_size} cells")
+            if min(unit) < 0 or max(unit) >= number_cells:
+                raise ValueError(f"Unit {unit} has cells outside of the board")
+
+        self.puzzle_size = puzzle_size
+        self.blocks = blocks
+        self.extra_units = tuple(dict.fromkeys(extra_units))
+
+    @classmethod
+    def from_variants(
+        cls,
+        puzzle_size: int,
+        variants: tuple[str, ...] = (),
+        blocks: tuple[int, ...] | None = None,
+        extra_units: tuple[tuple[int, ...], ...] = (),
+    ) -> "Layout":
+        """This function builds a layout from variant names, see `VARIANTS`."""
+
+        for variant in variants:
+            if variant not in VARIANTS:
+                raise ValueError(
+                    f"Unknown variant {variant}, expected one of {tuple(VARIANTS)}"
+                )
+            extra_units += VARIANTS[variant](puzzle_size)
+
+        return cls(puzzle_size=puzzle_size, blocks=blocks, extra_units=extra_units)
+
+    @property
+    def is_standard(self) -> bool:
+        """Whether the layout only has rows, columns and square blocks."""
+        return self.blocks is None and not self.extra_units
+
+    def key(self) -> tuple:
+        return (self.puzzle_size, self.blocks, self.extra_units)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Layout) and self.key() == other.key()
+
+    def __hash__(self) -> int:
+        return hash(self.key())
+
+    def __repr__(self) -> str:
+        blocks = "square" if self.blocks is None else "irregular"
+        return (
+            f"Layout(puzzle_size={self.puzzle_size}, blocks={blocks}, "
+            f"extra_units={len(self.extra_units)})"
+        )
+
+
+def disjoint_groups(
+    units: tuple[tuple[int, ...], ...]
+) -> list[list[tuple[int, ...]]]:
+    """This function splits units into groups of disjoint units, first fit in order."""
+
+    groups, group_cells = [], []
+    for unit in units:
+        for group, cells in zip(groups, group_cells):
+            if cells.isdisjoint(unit):
+                group.append(unit)
+                cells.update(unit)
+                break
+        else:
+            groups.append([unit])
+            group_cells.append(set(unit))
+
+    return groups
+
+
+class PuzzleTables:
+    """This class represents the unit, peer, intersection and encoding tables.
+
+    Units are numbered by group in the order of `unit_groups`, i.e. rows first, then
+    columns, then blocks, then the groups of extra units: row `r` is unit `r`, column
+    `c` is unit `n + c` and block `b` is unit `2 * n + b`. Square blocks are numbered
+    from left to right and secondarily from top to bottom, irregular blocks by their
+    region. `group_offsets` holds the number of the first unit of every group.
+    """
+
+    def __init__(self, puzzle_size: int, layout: Layout | None = None):
+        logger.info(f"Building tables for puzzle size {puzzle_size} and {layout}")
+
+        self.puzzle_size = puzzle_size
+        self.layout = layout or Layout(puzzle_size=puzzle_size)
+        self.number_cells = puzzle_size * puzzle_size
+        sqrt_puzzle_size = int(np.sqrt(puzzle_size))
+
+        # Unit -> cells: flat cell indices of the j-th cell in the i-th unit of a group
+        cells = np.arange(self.number_cells).reshape(puzzle_size, puzzle_size)
+        if self.layout.blocks is None:
+            blocks = (
+                cells.reshape(
+                    sqrt_puzzle_size,
+                    sqrt_puzzle_size,
+                    sqrt_puzzle_size,
+                    sqrt_puzzle_size,
+                )
+                .transpose(0, 2, 1, 3)
+                .reshape(puzzle_size, puzzle_size)
+            )
+        else:
+            regions = np.array(self.layout.blocks)
+            blocks = np.argsort(regions, kind="stable").reshape(
+                puzzle_size, puzzle_size
+            )
+        self.units = {
+            "row": read_only(cells.copy()),
+            "column": read_only(cells.T.copy()),
+            "block": read_only(blocks.copy()),
+        }
+        for index, group in enumerate(disjoint_groups(self.layout.extra_units)):
+            self.units[f"extra_{index + 1}"] = read_only(np.array(group, dtype=np.intp))
+
+        self.unit_groups = tuple(self.units)
+        self.unit_cells = read_only(
+            np.concatenate([self.units[group] for group in self.unit_groups])
+        )
+        self.number_units = self.unit_cells.shape[0]
+        offsets = np.cumsum([0] + [len(self.units[group]) for group in self.units])
+        self.group_offsets = dict(zip(self.unit_groups, offsets[:-1].tolist()))
+
+        # Cell -> units: the number of the unit of every group holding every cell, or
+        # `number_units` where no unit of the group holds the cell
+        cell_units = np.full(
+            (self.number_cells, len(self.unit_groups)), self.number_units, dtype=np.intp
+        )
+        for group_index, group in enumerate(self.unit_groups):
+            unit_numbers = self.group_offsets[group] + np.arange(len(self.units[group]))
+            cell_units[self.units[group], group_index] = unit_numbers[:, None]
+        self.cell_units = read_only(cell_units)
+        self.cell_unit_lists = tuple(
+            tuple(unit for unit in units if unit != self.number_units)
+            for units in cell_units.tolist()
+        )
+
+        # Cell -> peers: every other cell sharing a unit with the cell. Cells of extra
+        # units have more peers than the others, so there is one array per cell
+        peer_lists = [set() for _ in range(self.number_cells)]
+        for unit in self.unit_cells.tolist():
+            for cell in unit:
+                peer_lists[cell].update(unit)
+        self.peer_lists = tuple(
+            tuple(sorted(peers - {cell})) for cell, peers in enumerate(peer_lists)
+        )
+        self.peers = tuple(
+            read_only(np.array(peers, dtype=np.intp)) for peers in self.peer_lists
+        )
+        self.unit_lists = tuple(tuple(unit) for unit in self.unit_cells.tolist())
+
+        # Intersections: the cells a block or extra unit shares with a row or column,
+        # the rest of that row or column and the rest of the block, as one set of
+        # arrays per number of shared cells
+        boxes = [
+            unit
+            for group in self.unit_groups[2:]
+            for unit in self.units[group].tolist()
+        ]
+        intersections = {}
+        lines = self.units["row"].tolist() + self.units["column"].tolist()
+        for line in lines:
+            for box in boxes:
+                shared = set(line) & set(box)
+                if not 2 <= len(shared) < puzzle_size:
+                    continue
+
+                intersections.setdefault(len(shared), []).append(
+                    (
+                        sorted(shared),
+                        sorted(set(line) - shared),
+                        sorted(set(box) - shared),
+                    )
+                )
+
+        self.intersections = tuple(
+            tuple(
+                read_only(np.array(arrays, dtype=np.intp))
+                for arrays in zip(*intersections[size])
+            )
+            for size in sorted(intersections)
+        )
+
+        # Identity / one-hot encoding of the numbers, one byte per candidate
+        self.identity = read_only(np.eye(puzzle_size, dtype=np.uint8))
+        self.numbers_encoded = {
+            number: self.identity[:, number - 1]
+            for number in range(1, puzzle_size + 1)
+        }
+        self.numbers_decoded = {
+            tuple(encoded): number for number, encoded in self.numbers_encoded.items()
+        }
+
+
+def get_tables(puzzle_size: int, layout: Layout | None = None) -> PuzzleTables:
+    """This function returns the shared tables of a puzzle size and layout.
+
+    Raises:
+        ValueError: If the layout is for another puzzle size.
+    """
+
+    if layout is None or layout.is_standard:
+        return build_tables(puzzle_size=puzzle_size, layout=None)
+    if layout.puzzle_size != puzzle_size:
+        raise ValueError(
+            f"Layout of size {layout.puzzle_size} for a puzzle of size {puzzle_size}"
+        )
+    return build_tables(puzzle_size=puzzle_size, layout=layout)
+
+
+@lru_cache(maxsize=None)
+def build_tables(puzzle_size: int, layout: Layout | None) -> PuzzleTables:
+    """This function builds the tables of a layout once, see `get_tables`."""
+    return PuzzleTables(puzzle_size=puzzle_size, layout=layout)
@@ -0,0 +1,172 @@
+"""This module contains the writers that stream solved boards to any binary stream.
+
+Every writer takes whole batches of boards, e.g. the chunks of
+`gsolver.cli.solve_stream`, encodes a batch with a handful of vectorized NumPy
+operations (see `gsolver.parsing.encode_lines` and `encode_boxed`) and hands it to the
+stream in one bulk write, so writing stays cheap next to solving even for millions of
+boards:
+
+- line: one board per line in the one line format, followed by its status,
+- boxed: the boxed format of `gsolver/sudoku_puzzle.txt`, with the status as a "#"
+  comment line above every board, so the output can be read again,
+- json: one JSON object per line with the "solution" in the one line format and the
+  "status",
+- binary: the binary board format of `gsolver.binary`, without the status.
+
+    with open("solutions.txt", "wb") as file:
+        writer = get_writer(name="json", stream=file, puzzle_size=9)
+        for solutions, status in solve_stream(puzzles=puzzles):
+            writer.write(solutions=solutions, status=status)
+        writer.close()
+"""
+
+import logging
+from abc import ABC, abstractmethod
+from typing import BinaryIO
+
+import numpy as np
+
+from . import binary
+from .batch import STATUS_NAMES
+from .parsing import encode_boxed, encode_lines
+
+logger = logging.getLogger(__name__)
+
+
+class OutputWriter(ABC):
+    """This class represents a writer of batches of (n, n) boards to a binary stream.
+
+    Streams are flushed, but never closed, by the writer.
+    """
+
+    def __init__(self, stream: BinaryIO, puzzle_size: int):
+        self.stream = stream
+        self.puzzle_size = puzzle_size
+        self.count = 0
+
+    @abstractmethod
+    def write(self, solutions: np.ndarray, status: np.ndarray | None = None):
+        """This function writes an (N, n, n) batch of boards.
+
+        Args:
+            solutions: The boards, where unsolved cells are 0.
+            status: The status of every board as an index into `STATUS_NAMES`, if
+                known.
+        """
+
+    def close(self):
+        """This function flushes the stream."""
+
+        self.stream.flush()
+        logger.info(f"Wrote {self.count} boards")
+
+
+class TextWriter(OutputWriter):
+    """This class represents a writer that encodes every batch to bytes at once."""
+
+    @abstractmethod
+    def encode(self, solutions: np.ndarray, status: np.ndarray | None) -> bytes:
+        """This function encodes an (N, n, n) batch of boards and their status."""
+
+    def write(self, solutions: np.ndarray, status: np.ndarray | None = None):
+        """This function writes an (N, n, n) batch of boards in one bulk write."""
+
+        self.stream.write(self.encode(solutions=solutions, status=status))
+        self.count += solutions.shape[0]
+
+
+def join_records(records: np.ndarray, prefixes: list[bytes], suffixes: list[bytes]):
+    """This function joins fixed size records with a prefix and suffix per record."""
+
+    data = records.tobytes()
+    size = records.shape[1]
+    return b"".join(
+        prefix + data[start : start + size] + suffix
+        for prefix, start, suffix in zip(
+            prefixes, range(0, len(data), size), suffixes
+        )
+    )
+
+
+class LineWriter(TextWriter):
+    """This class represents a writer of one board per line and its status."""
+
+    def encode(self, solutions: np.ndarray, status: np.ndarray | None) -> bytes:
+        lines = encode_lines(boards=solutions)
+        if status is None:
+            newlines = np.full((lines.shape[0], 1), ord("\n"), dtype=np.uint8)
+            return np.concatenate([lines, newlines], axis=1).tobytes()
+
+        suffixes = [f" {name}\n".encode() for name in STATUS_NAMES]
+        return join_records(
+            records=lines,
+            prefixes=[b""] * lines.shape[0],
+            suffixes=[suffixes[board_status] for board_status in status.tolist()],
+        )
+
+
+class BoxedWriter(TextWriter):
+    """This class represents a writer of boards in the boxed format."""
+
+    def encode(self, solutions: np.ndarray, status: np.ndarray | None) -> bytes:
+        boards = encode_boxed(boards=solutions)
+        if status is None:
+            prefixes = [b""] * boards.shape[0]
+        else:
+            comments = [f"# {name}\n".encode() for name in STATUS_NAMES]
+            prefixes = [comments[board_status] for board_status in status.tolist()]
+
+        return join_records(
+            records=boards, prefixes=prefixes, suffixes=[b"\n"] * boards.shape[0]
+        )
+
+
+class JsonWriter(TextWriter):
+    """This class represents a writer of one JSON object per board and line."""
+
+    def encode(self, solutions: np.ndarray, status: np.ndarray | None) -> bytes:
+        lines = encode_lines(boards=solutions)
+        if status is None:
+            suffixes = [b'"}\n'] * lines.shape[0]
+        else:
+            names = [f'", "status": "{name}"}}\n'.encode() for name in STATUS_NAMES]
+            suffixes = [names[board_status] for board_status in status.tolist()]
+
+        return join_records(
+            records=lines,
+            prefixes=[b'{"solution": "'] * lines.shape[0],
+            suffixes=suffixes,
+        )
+
+
+class BinaryWriter(OutputWriter):
+    """This class represents a writer of boards in the binary board format."""
+
+    def __init__(self, stream: BinaryIO, puzzle_size: int):
+        super().__init__(stream=stream, puzzle_size=puzzle_size)
+        self.board_writer = binary.BoardWriter(path=stream, puzzle_size=puzzle_size)
+
+    def write(self, solutions: np.ndarray, status: np.ndarray | None = None):
+        self.board_writer.write(boards=solutions)
+        self.count += solutions.shape[0]
+
+    def close(self):
+        self.board_writer.close()
+        super().close()
+
+
+WRITERS = {
+    "line": LineWriter,
+    "boxed": BoxedWriter,
+    "json": JsonWriter,
+    "binary": BinaryWriter,
+}
+
+
+def get_writer(name: str, stream: BinaryIO, puzzle_size: int) -> OutputWriter:
+    """This function returns the writer of a format, see `WRITERS`."""
+
+    if name not in WRITERS:
+        raise ValueError(f"Unknown format {name}, expected one of {tuple(WRITERS)}")
+
+    return WRITERS[name](stream=stream, puzzle_size=puzzle_size)
@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+from gsolver import bitmask
+from gsolver.batch import (
+    CONTRADICTION,
+    PARTIAL,
+    SOLVED,
+    bitmask_to_solutions,
+    givens_to_bitmask,
+    is_valid,
+    solve_batch,
+)
+from gsolver.benchmark import load_corpus
+from gsolver.search import count_solutions
+from gsolver.sudoku import Sudoku
+
+SEARCHES = ("backtrack", "exact_cover")
+
+
+def assert_solutions(puzzles: np.ndarray, solutions: np.ndarray):
+    """This function checks that solutions are valid and keep every given."""
+
+    puzzle_size = puzzles.shape[-1]
+    cells = givens_to_bitmask(givens=solutions)
+    assert np.all(solutions > 0)
+    assert np.all(is_valid(cells=cells, puzzle_size=puzzle_size))
+    assert np.all((puzzles == 0) | (puzzles == solutions))
+
+
+@pytest.mark.parametrize("corpus", ["easy", "medium"])
+def test_propagation_solves_simple_corpora(corpus):
+    puzzles = load_corpus(name=corpus, limit=20)
+    solutions, status = solve_batch(puzzles=puzzles)
+
+    assert np.all(status == SOLVED)
+    assert_solutions(puzzles=puzzles, solutions=solutions)
+
+
+@pytest.mark.parametrize("search", SEARCHES)
+@pytest.mark.parametrize("corpus", ["hard", "17_clue", "16x16"])
+def test_search_solves_corpora(corpus, search):
+    puzzles = load_corpus(name=corpus, limit=10)
+    solutions, status = solve_batch(puzzles=puzzles, search=search)
+
+    assert np.all(status == SOLVED)
+    assert_solutions(puzzles=puzzles, solutions=solutions)
+
+
+def test_chunks_do_not_change_the_result():
+    puzzles = load_corpus(name="hard", limit=10)
+    solutions, status = solve_batch(puzzles=puzzles, search="backtrack")
+    chunked, chunked_status = solve_batch(
+        puzzles=puzzles, search="backtrack", chunk_size=3
+    )
+
+    np.testing.assert_array_equal(chunked, solutions)
+    np.testing.assert_array_equal(chunked_status, status)
+
+
+@pytest.mark.parametrize("backend", Sudoku.backends)
+def test_backends_agree_with_the_batch_solver(backend):
+    puzzles = load_corpus(name="17_clue", limit=5)
+    solutions, _ = solve_batch(puzzles=puzzles, search="backtrack")
+
+    for puzzle, solution in zip(puzzles, solutions):
+        sudoku = Sudoku(puzzle=puzzle, backend=backend)
+        sudoku.solve(matrix=sudoku.matrix, search="backtrack")
+        assert sudoku.is_solved(sudoku.matrix)
+
+        cells = sudoku.matrix
+        if backend == "matrix":
+            cells = bitmask.matrix_to_bitmask(cells)
+        numbers = bitmask_to_solutions(cells=cells.reshape(1, -1), puzzle_size=9)
+        np.testing.assert_array_equal(numbers[0], solution)
+
+
+def test_conflicting_givens_are_a_contradiction():
+    puzzle = np.zeros((1, 9, 9), dtype=np.uint8)
+    puzzle[0, 0, :2] = 5
+
+    _, status = solve_batch(puzzles=puzzle, search="backtrack")
+    assert status[0] == CONTRADICTION
+
+
+def test_stalled_boards_stay_partial_without_search():
+    puzzles = load_corpus(name="17_clue", limit=5)
+    solutions, status = solve_batch(puzzles=puzzles)
+
+    assert np.any(status == PARTIAL)
+    assert np.all((puzzles == 0) | (puzzles == solutions))
+
+
+@pytest.mark.parametrize("search", SEARCHES)
+def test_search_solves_empty_large_boards(search):
+    puzzles = np.zeros((1, 36, 36), dtype=np.uint8)
+    solutions, status = solve_batch(puzzles=puzzles, search=search)
+
+    assert status[0] == SOLVED
+    assert_solutions(puzzles=puzzles, solutions=solutions)
+
+
+@pytest.mark.parametrize("search", SEARCHES)
+def test_count_solutions(search):
+    empty = givens_to_bitmask(givens=np.zeros((1, 4, 4), dtype=np.uint8))
+    assert count_solutions(cells=empty.reshape(4, 4), limit=None, search=search) == 288
+
+    puzzle = load_corpus(name="17_clue", limit=1)
+    cells = givens_to_bitmask(givens=puzzle)[0].reshape(9, 9)
+    assert count_solutions(cells=cells, limit=2, search=search) == 1
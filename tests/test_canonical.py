@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from gsolver.batch import solve_batch
+from gsolver.benchmark import load_corpus
+from gsolver.cache import SolutionCache
+from gsolver.canonical import canonical_form
+from gsolver.generator import random_transform
+
+
+@pytest.mark.parametrize("corpus", ["easy", "17_clue", "16x16"])
+def test_canonical_form_is_invariant_under_symmetries(corpus):
+    rng = np.random.default_rng(7)
+    for puzzle in load_corpus(name=corpus, limit=5):
+        canonical, transform = canonical_form(givens=puzzle)
+        np.testing.assert_array_equal(transform.apply(puzzle), canonical)
+        np.testing.assert_array_equal(transform.invert(canonical), puzzle)
+
+        for _ in range(3):
+            shuffled = random_transform(puzzle_size=puzzle.shape[0], rng=rng)
+            equivalent, _ = canonical_form(givens=shuffled.apply(puzzle))
+            np.testing.assert_array_equal(equivalent, canonical)
+
+
+def test_different_puzzles_have_different_canonical_forms():
+    forms = {
+        canonical_form(givens=puzzle)[0].tobytes()
+        for puzzle in load_corpus(name="easy", limit=10)
+    }
+    assert len(forms) == 10
+
+
+def test_cache_answers_equivalent_puzzles():
+    puzzle = load_corpus(name="hard", limit=1)[0]
+    solution = solve_batch(puzzles=puzzle[None], search="backtrack")[0][0]
+
+    cache = SolutionCache(max_size=4)
+    assert cache.get(givens=puzzle) is None
+    cache.put(givens=puzzle, solution=solution)
+    np.testing.assert_array_equal(cache.get(givens=puzzle), solution)
+
+    transform = random_transform(puzzle_size=9, rng=np.random.default_rng(3))
+    equivalent = transform.apply(puzzle)
+    np.testing.assert_array_equal(
+        cache.get(givens=equivalent), transform.apply(solution)
+    )
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+
+def test_cache_evicts_the_least_recently_used_puzzle():
+    puzzles = load_corpus(name="easy", limit=3)
+    solutions, _ = solve_batch(puzzles=puzzles)
+
+    cache = SolutionCache(max_size=2)
+    for puzzle, solution in zip(puzzles, solutions):
+        cache.put(givens=puzzle, solution=solution)
+
+    assert len(cache) == 2
+    assert cache.get(givens=puzzles[0]) is None
+    np.testing.assert_array_equal(cache.get(givens=puzzles[2]), solutions[2])
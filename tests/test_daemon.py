@@ -0,0 +1,78 @@
+import json
+import time
+
+import pytest
+
+from gsolver.benchmark import load_corpus
+from gsolver.daemon import SolverDaemon
+from gsolver.parsing import format_line
+
+PUZZLE = format_line(load_corpus(name="hard", limit=1)[0])
+
+
+@pytest.fixture(scope="module")
+def daemon():
+    solver = SolverDaemon(workers=2, warm_sizes=())
+    yield solver
+    solver.shutdown()
+
+
+def handle(daemon: SolverDaemon, request) -> dict:
+    """This function answers one request, given as an object or a raw line."""
+
+    line = request if isinstance(request, str) else json.dumps(request)
+    return daemon.handle(line=line, start=time.perf_counter())
+
+
+def test_solve_and_count(daemon):
+    response = handle(daemon, {"id": 1, "op": "solve", "puzzle": PUZZLE})
+    assert response["id"] == 1
+    assert response["result"]["status"] == "solved"
+    assert "." not in response["result"]["solution"]
+
+    response = handle(daemon, {"id": 2, "op": "count", "puzzle": PUZZLE})
+    assert response["result"] == {"solutions": 1, "unique": True}
+
+
+def test_solves_are_cached(daemon):
+    handle(daemon, {"op": "solve", "puzzle": PUZZLE})
+    hits = handle(daemon, {"op": "stats"})["result"]["cache"]["hits"]
+    handle(daemon, {"op": "solve", "puzzle": PUZZLE})
+    assert handle(daemon, {"op": "stats"})["result"]["cache"]["hits"] == hits + 1
+
+
+@pytest.mark.parametrize(
+    "request_line, error",
+    [
+        ("not json", "Expecting value"),
+        ("[1, 2]", "Request is not a JSON object"),
+        ({"op": "shout"}, "Unknown op shout"),
+        ({"op": "solve"}, "Missing 'puzzle'"),
+        ({"op": "solve", "puzzle": "1" * 36}, "not a square size"),
+        ({"op": "solve", "puzzle": ""}, "Board is empty"),
+        ({"op": "solve", "puzzle": PUZZLE, "search": "bfs"}, "Unknown search"),
+        ({"op": "solve", "puzzle": PUZZLE, "strategies": ["guess"]}, "Unknown strat"),
+        ({"op": "count", "puzzle": PUZZLE, "search": None}, "Unknown search null"),
+        ({"op": "count", "puzzle": PUZZLE, "limit": 0}, "not a positive integer"),
+        ({"op": "solve", "puzzle": PUZZLE, "layout": {"rows": []}}, "Unknown layout"),
+    ],
+)
+def test_invalid_requests_are_answered_with_an_error(daemon, request_line, error):
+    response = handle(daemon, request_line)
+    assert "result" not in response
+    assert error in response["error"]
+    assert not response["error"].startswith("Internal error")
+
+
+def test_serve_lines_answers_every_request(daemon):
+    lines = [json.dumps({"id": index, "op": "ping"}) for index in range(10)]
+    responses = []
+    daemon.serve_lines(
+        lines=lines + ["", "not json"], write=lambda text: responses.append(text)
+    )
+
+    responses = [json.loads(response) for response in responses]
+    assert sorted(
+        response["id"] for response in responses if response["id"] is not None
+    ) == list(range(10))
+    assert sum("error" in response for response in responses) == 1
@@ -0,0 +1,131 @@
+import numpy as np
+import pytest
+
+from gsolver import bitmask
+from gsolver.benchmark import load_corpus
+from gsolver.edits import EditLedger
+from gsolver.sudoku import Sudoku
+
+
+def ledger_of(numbers: np.ndarray) -> EditLedger:
+    """This function builds a ledger with numbers placed as givens."""
+    return EditLedger(givens=numbers.reshape(9, 9))
+
+
+def random_edits(ledger: EditLedger, rng: np.random.Generator, count: int):
+    """This function sets and clears random empty cells of a ledger."""
+
+    cells = np.flatnonzero(~ledger.givens)
+    for _ in range(count):
+        ledger.edit(cell=int(rng.choice(cells)), number=int(rng.integers(10)))
+
+
+def assert_same_state(ledger: EditLedger, other: EditLedger):
+    """This function checks that two ledgers have the same placements and candidates."""
+
+    np.testing.assert_array_equal(ledger.numbers, other.numbers)
+    np.testing.assert_array_equal(ledger.counts, other.counts)
+    np.testing.assert_array_equal(ledger.candidates, other.candidates)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_edits_match_a_ledger_built_from_scratch(seed):
+    puzzle = load_corpus(name="easy", limit=1)[0]
+    ledger = EditLedger(givens=puzzle)
+    random_edits(ledger=ledger, rng=np.random.default_rng(seed), count=50)
+
+    assert_same_state(ledger, ledger_of(numbers=ledger.numbers))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_undo_and_redo_round_trip(seed):
+    puzzle = load_corpus(name="easy", limit=1)[0]
+    ledger = EditLedger(givens=puzzle)
+    initial = EditLedger(givens=puzzle)
+    random_edits(ledger=ledger, rng=np.random.default_rng(seed), count=30)
+    edited = ledger_of(numbers=ledger.numbers)
+
+    while ledger.undo_edits:
+        ledger.undo()
+    assert_same_state(ledger, initial)
+
+    while ledger.redo_edits:
+        ledger.redo()
+    assert_same_state(ledger, edited)
+
+
+def test_edits_only_change_the_cell_and_its_peers():
+    puzzle = load_corpus(name="easy", limit=1)[0]
+    ledger = EditLedger(givens=puzzle)
+    cell = int(np.flatnonzero(puzzle.reshape(-1) == 0)[0])
+
+    cells, removed = ledger.edit(cell=cell, number=1)
+    assert cells[0] == cell and removed == 0
+    assert set(cells[1:].tolist()) <= set(ledger.peers[cell].tolist())
+
+    cells, removed = ledger.edit(cell=cell, number=0)
+    assert cells[0] == cell and removed == 1
+
+
+def test_givens_cannot_be_edited():
+    puzzle = load_corpus(name="easy", limit=1)[0]
+    ledger = EditLedger(givens=puzzle)
+    with pytest.raises(ValueError):
+        ledger.edit(cell=int(np.flatnonzero(puzzle.reshape(-1))[0]), number=0)
+
+
+def candidates_of(sudoku: Sudoku) -> np.ndarray:
+    """This function returns the flat candidate bitmasks of a puzzle."""
+
+    if sudoku.backend == "bitmask":
+        return sudoku.matrix.reshape(-1).copy()
+    return bitmask.matrix_to_bitmask(sudoku.matrix).reshape(-1)
+
+
+@pytest.mark.parametrize("backend", Sudoku.backends)
+def test_undo_after_a_solve_keeps_the_solution(backend):
+    puzzle = load_corpus(name="easy", limit=1)[0]
+    row, column = (int(index) + 1 for index in np.argwhere(puzzle == 0)[0])
+    sudoku = Sudoku(puzzle=puzzle, backend=backend)
+    sudoku.solve(matrix=sudoku.matrix)
+    solved = candidates_of(sudoku=sudoku)
+    number = int(np.log2(solved[(row - 1) * 9 + column - 1])) + 1
+
+    sudoku.set_number(row=row, column=column, number=number)
+    cells = sudoku.undo()
+
+    assert len(cells) < 81
+    assert sudoku.is_solved(sudoku.matrix)
+    np.testing.assert_array_equal(candidates_of(sudoku=sudoku), solved)
+
+
+@pytest.mark.parametrize("backend", Sudoku.backends)
+def test_placing_the_deduced_number_is_an_edit(backend):
+    puzzle = load_corpus(name="easy", limit=1)[0]
+    row, column = (int(index) + 1 for index in np.argwhere(puzzle == 0)[0])
+    sudoku = Sudoku(puzzle=puzzle, backend=backend)
+    sudoku.solve(matrix=sudoku.matrix)
+    number = int(np.log2(candidates_of(sudoku=sudoku)[(row - 1) * 9 + column - 1])) + 1
+
+    sudoku.set_number(row=row, column=column, number=number)
+    assert sudoku.edit_ledger().undo_edits == [((row - 1) * 9 + column - 1, 0, number)]
+
+    sudoku.clear_number(row=row, column=column)
+    assert sudoku.edit_ledger().numbers[(row - 1) * 9 + column - 1] == 0
+
+
+@pytest.mark.parametrize("backend", Sudoku.backends)
+def test_clearing_a_wrong_number_before_a_solve(backend):
+    puzzle = load_corpus(name="easy", limit=1)[0]
+    sudoku = Sudoku(puzzle=puzzle, backend=backend)
+    row, column = (int(index) + 1 for index in np.argwhere(puzzle == 0)[0])
+
+    sudoku.set_number(row=row, column=column, number=1)
+    cells = sudoku.clear_number(row=row, column=column)
+
+    # The changed cells take the candidates the givens leave
+    expected = EditLedger(givens=puzzle).candidates
+    assert (row, column) in cells
+    for (row, column), value in cells.items():
+        mask = int(expected[(row - 1) * 9 + column - 1])
+        assert value == sudoku.decode_bitmask(mask=mask)
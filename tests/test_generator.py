@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from gsolver.batch import givens_to_bitmask, is_valid
+from gsolver.generator import (
+    DIFFICULTIES,
+    generate_puzzle,
+    generate_stream,
+    grade,
+    random_grid,
+)
+from gsolver.search import count_solutions
+
+
+def is_unique(givens: np.ndarray) -> bool:
+    """This function checks whether a puzzle has exactly one solution."""
+
+    cells = givens_to_bitmask(givens=givens[None])[0].reshape(givens.shape)
+    return count_solutions(cells=cells, limit=2) == 1
+
+
+@pytest.mark.parametrize("puzzle_size", [4, 9, 16])
+def test_random_grids_are_valid(puzzle_size):
+    grid = random_grid(puzzle_size=puzzle_size, rng=np.random.default_rng(5))
+    cells = givens_to_bitmask(givens=grid[None])
+    assert is_valid(cells=cells, puzzle_size=puzzle_size)[0]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_generated_puzzles_are_unique(seed):
+    givens = generate_puzzle(puzzle_size=9, rng=np.random.default_rng(seed))
+    assert is_unique(givens=givens)
+
+
+def test_generated_puzzles_meet_the_clue_target():
+    givens = generate_puzzle(puzzle_size=9, rng=np.random.default_rng(1), clues=30)
+    assert np.count_nonzero(givens) <= 30
+    assert is_unique(givens=givens)
+
+
+@pytest.mark.parametrize("symmetry, flip", [("rotational", (0, 1)), ("mirror", 1)])
+def test_generated_puzzles_keep_the_symmetry(symmetry, flip):
+    givens = generate_puzzle(
+        puzzle_size=9, rng=np.random.default_rng(2), symmetry=symmetry
+    )
+    clues = givens > 0
+    np.testing.assert_array_equal(clues, np.flip(clues, axis=flip))
+    assert is_unique(givens=givens)
+
+
+@pytest.mark.parametrize("difficulty", DIFFICULTIES)
+def test_generated_puzzles_meet_the_difficulty(difficulty):
+    givens = generate_puzzle(
+        puzzle_size=9, rng=np.random.default_rng(3), difficulty=difficulty
+    )
+    assert grade(givens=givens) == difficulty
+    assert is_unique(givens=givens)
+
+
+def test_streams_are_reproducible():
+    first = np.concatenate(list(generate_stream(puzzle_size=4, count=10, seed=4)))
+    second = np.concatenate(
+        list(generate_stream(puzzle_size=4, count=10, seed=4, chunk_size=3))
+    )
+    np.testing.assert_array_equal(first, second)
+
+
+def test_unknown_targets_are_rejected():
+    with pytest.raises(ValueError):
+        generate_puzzle(puzzle_size=9, rng=np.random.default_rng(), symmetry="spiral")
+    with pytest.raises(ValueError):
+        generate_puzzle(puzzle_size=9, rng=np.random.default_rng(), difficulty="evil")
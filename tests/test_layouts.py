@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from gsolver import bitmask
+from gsolver.batch import SOLVED, givens_to_bitmask, is_valid, solve_batch
+from gsolver.parsing import parse_layout
+from gsolver.sudoku import Sudoku
+from gsolver.tables import Layout
+
+JIGSAW = (
+    "111222333111222333111222333644455566644455566644455566777888999777888999777888999"
+)
+SPECS = {
+    "diagonal": {"variants": ["diagonal"]},
+    "windoku": {"variants": ["windoku"]},
+    "jigsaw": {"blocks": JIGSAW},
+    "jigsaw_diagonal": {"blocks": JIGSAW, "variants": ["diagonal"]},
+}
+
+
+def layout_puzzle(spec: dict, seed: int) -> tuple[np.ndarray, Layout]:
+    """This function returns a puzzle of a layout with half of its cells emptied."""
+
+    layout = parse_layout(spec=spec, puzzle_size=9)
+    empty = np.zeros((1, 9, 9), dtype=np.uint8)
+    grid = solve_batch(puzzles=empty, search="backtrack", layout=layout)[0][0]
+
+    rng = np.random.default_rng(seed)
+    puzzle = grid.copy()
+    puzzle.flat[rng.choice(81, size=40, replace=False)] = 0
+    return puzzle, layout
+
+
+@pytest.mark.parametrize("search", ["backtrack", "exact_cover"])
+@pytest.mark.parametrize("name", SPECS)
+def test_layout_solutions_are_valid(name, search):
+    puzzle, layout = layout_puzzle(spec=SPECS[name], seed=1)
+    solutions, status = solve_batch(puzzles=puzzle[None], search=search, layout=layout)
+
+    assert status[0] == SOLVED
+    assert np.all((puzzle == 0) | (puzzle == solutions[0]))
+    cells = givens_to_bitmask(givens=solutions)
+    assert is_valid(cells=cells, puzzle_size=9, layout=layout)[0]
+
+
+@pytest.mark.parametrize("backend", Sudoku.backends)
+@pytest.mark.parametrize("name", SPECS)
+def test_backends_solve_layouts(name, backend):
+    puzzle, layout = layout_puzzle(spec=SPECS[name], seed=2)
+    sudoku = Sudoku(puzzle=puzzle, backend=backend, layout=layout)
+    sudoku.solve(matrix=sudoku.matrix, search="backtrack")
+
+    cells = sudoku.matrix
+    if backend == "matrix":
+        cells = bitmask.matrix_to_bitmask(cells)
+    assert sudoku.is_solved(sudoku.matrix)
+    assert is_valid(cells=cells.reshape(1, -1), puzzle_size=9, layout=layout)[0]
+
+
+def test_extra_units_constrain_the_solution():
+    layout = parse_layout(spec=SPECS["diagonal"], puzzle_size=9)
+    grid = solve_batch(puzzles=np.zeros((1, 9, 9), dtype=np.uint8), search="backtrack")
+    cells = givens_to_bitmask(givens=grid[0])
+
+    # The first standard solution repeats numbers on the diagonals
+    assert is_valid(cells=cells, puzzle_size=9)[0]
+    assert not is_valid(cells=cells, puzzle_size=9, layout=layout)[0]
+
+
+def test_square_blocks_are_the_standard_layout():
+    rows, columns = np.divmod(np.arange(81), 9)
+    blocks = "".join(str(9 - block) for block in rows // 3 * 3 + columns // 3)
+    assert parse_layout(spec={"blocks": blocks}, puzzle_size=9) is None
+    assert parse_layout(spec={}, puzzle_size=9) is None
+
+
+@pytest.mark.parametrize(
+    "spec",
+    [
+        {"units": [[[1, 1], [1, 2], [1, 3]]]},
+        {"blocks": "1" * 81},
+        {"variants": ["killer"]},
+        {"units": [[[0, 1]] * 9]},
+    ],
+)
+def test_invalid_layouts_are_rejected(spec):
+    with pytest.raises(ValueError):
+        parse_layout(spec=spec, puzzle_size=9)
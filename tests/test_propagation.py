@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from gsolver.benchmark import load_corpus
+from gsolver.strategies import DEFAULT_STRATEGIES
+from gsolver.sudoku import Sudoku
+
+
+def propagate(puzzle: np.ndarray, backend: str, propagation: str, **kwargs) -> Sudoku:
+    """This function propagates a puzzle without searching."""
+
+    sudoku = Sudoku(puzzle=puzzle, backend=backend, **kwargs)
+    sudoku.solve(matrix=sudoku.matrix, propagation=propagation)
+    return sudoku
+
+
+@pytest.mark.parametrize("backend", Sudoku.backends)
+@pytest.mark.parametrize("corpus", ["easy", "hard", "16x16"])
+def test_queue_reaches_the_fixed_point_of_the_sweep(backend, corpus):
+    for puzzle in load_corpus(name=corpus, limit=5):
+        queue = propagate(puzzle=puzzle, backend=backend, propagation="queue")
+        sweep = propagate(puzzle=puzzle, backend=backend, propagation="sweep")
+
+        np.testing.assert_array_equal(queue.matrix, sweep.matrix)
+        assert queue.partial_solution == sweep.partial_solution
+
+
+@pytest.mark.parametrize("backend", Sudoku.backends)
+def test_queue_with_strategies_reaches_the_fixed_point_of_the_sweep(backend):
+    for puzzle in load_corpus(name="hard", limit=5):
+        queue, sweep = (
+            propagate(
+                puzzle=puzzle,
+                backend=backend,
+                propagation=propagation,
+                strategies=DEFAULT_STRATEGIES,
+            )
+            for propagation in ("queue", "sweep")
+        )
+
+        np.testing.assert_array_equal(queue.matrix, sweep.matrix)
+
+
+def test_queue_only_revisits_changed_units():
+    units_processed = {"queue": 0, "sweep": 0}
+    for puzzle in load_corpus(name="16x16", limit=5):
+        for propagation in units_processed:
+            sudoku = propagate(
+                puzzle=puzzle, backend="bitmask", propagation=propagation
+            )
+            units_processed[propagation] += sudoku.units_processed
+
+    assert units_processed["queue"] < units_processed["sweep"]
+
+
+def test_unknown_propagation_is_rejected():
+    sudoku = Sudoku(puzzle=load_corpus(name="easy", limit=1)[0])
+    with pytest.raises(ValueError):
+        sudoku.solve(matrix=sudoku.matrix, propagation="depth_first")
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from gsolver.batch import (
+    SOLVED,
+    givens_to_bitmask,
+    propagate_batch,
+    solve_batch,
+)
+from gsolver.benchmark import load_corpus
+from gsolver.strategies import (
+    DEFAULT_STRATEGIES,
+    STRATEGIES,
+    apply_strategies,
+    check_strategies,
+)
+
+
+def stalled_boards(corpus: str, limit: int) -> tuple[np.ndarray, np.ndarray]:
+    """This function returns the bitmasks of a corpus after the singles and solved."""
+
+    puzzles = load_corpus(name=corpus, limit=limit)
+    solutions, _ = solve_batch(puzzles=puzzles, search="backtrack")
+
+    cells = givens_to_bitmask(givens=puzzles)
+    propagate_batch(cells=cells, puzzle_size=puzzles.shape[-1])
+    return cells, givens_to_bitmask(givens=solutions)
+
+
+@pytest.mark.parametrize("strategy", list(STRATEGIES))
+@pytest.mark.parametrize("corpus", ["hard", "17_clue", "16x16"])
+def test_strategies_keep_the_solution(strategy, corpus):
+    cells, solutions = stalled_boards(corpus=corpus, limit=20)
+    puzzle_size = load_corpus(name=corpus, limit=1).shape[-1]
+
+    # Alternate the strategy and the singles until neither makes progress
+    for _ in range(20):
+        changed = apply_strategies(
+            cells=cells, puzzle_size=puzzle_size, strategies=(strategy,)
+        )
+        assert np.all(cells & solutions == solutions)
+        if not changed.any():
+            break
+        propagate_batch(cells=cells, puzzle_size=puzzle_size)
+        assert np.all(cells & solutions == solutions)
+
+
+def test_strategies_make_progress_where_the_singles_stall():
+    cells, _ = stalled_boards(corpus="hard", limit=20)
+    changed = apply_strategies(cells=cells, puzzle_size=9)
+    assert changed.any()
+
+
+def test_strategies_solve_more_puzzles():
+    puzzles = load_corpus(name="hard", limit=20)
+    _, singles = solve_batch(puzzles=puzzles)
+    solutions, status = solve_batch(puzzles=puzzles, strategies=DEFAULT_STRATEGIES)
+
+    assert np.sum(status == SOLVED) > np.sum(singles == SOLVED)
+    assert np.all((puzzles == 0) | (puzzles == solutions))
+
+
+def test_unknown_strategies_are_rejected():
+    with pytest.raises(ValueError):
+        check_strategies(strategies=("pointing", "jellyfish"))